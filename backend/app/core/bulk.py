@@ -0,0 +1,76 @@
+# app/core/bulk.py
+"""
+PATCH /projects/{id}/tasks/bulk kao jedan UPDATE.
+
+Polja iz BulkUpdate se prevode u SET izraze – "__COPY__start_soll" postaje
+start_ist = COALESCE(start_soll, start_ist) – pa baza radi cijeli posao, a
+id-evi pogođenih taskova dolaze kroz RETURNING (Postgres, SQLite >= 3.35).
+Starije baze dobiju id-eve jednim SELECT-om i UPDATE po id-u u serijama.
+"""
+from datetime import date
+
+from sqlalchemy import select, update, func, or_
+from sqlalchemy.orm import Session
+
+from app.core.filters import TaskFilter, update_scope
+from app.models.task import Task
+
+CHUNK = 500
+
+COPY_START_SOLL = "__COPY__start_soll"
+COPY_END_SOLL = "__COPY__end_soll"
+
+
+def bulk_values(
+    start_ist: date | str | None = None,
+    end_ist: date | str | None = None,
+    status: str | None = None,
+    sub_id: int | None = None,
+) -> tuple[dict, list]:
+    """
+    (SET vrijednosti, dodatni WHERE). __COPY__ mijenja samo taskove koji imaju
+    Soll datum; ako su sva polja __COPY__, ostali taskovi nisu "pogođeni" i
+    ne ulaze u UPDATE (isto kao ranija petlja po taskovima).
+    """
+    values: dict = {}
+    copy_conds: list = []
+    if start_ist == COPY_START_SOLL:
+        values[Task.start_ist] = func.coalesce(Task.start_soll, Task.start_ist)
+        copy_conds.append(Task.start_soll.isnot(None))
+    elif isinstance(start_ist, date):
+        values[Task.start_ist] = start_ist
+    if end_ist == COPY_END_SOLL:
+        values[Task.end_ist] = func.coalesce(Task.end_soll, Task.end_ist)
+        copy_conds.append(Task.end_soll.isnot(None))
+    elif isinstance(end_ist, date):
+        values[Task.end_ist] = end_ist
+    if status is not None:
+        values[Task.status] = status
+    if sub_id is not None:
+        values[Task.sub_id] = sub_id
+
+    if copy_conds and len(copy_conds) == len(values):
+        return values, [or_(*copy_conds)]
+    return values, []
+
+
+def apply_bulk_update(db: Session, project_id: int, f: TaskFilter, values: dict, extra: list = ()) -> list[int]:
+    """Jedan UPDATE nad filtriranim taskovima; vraća sortirane id-eve pogođenih."""
+    if not values:
+        return []
+    values = {**values, Task.version: Task.version + 1}
+    conds = [*update_scope(project_id, f), *extra]
+    stmt = update(Task).where(*conds).values(values).execution_options(synchronize_session=False)
+    if db.get_bind().dialect.update_returning:
+        return sorted(db.execute(stmt.returning(Task.id)).scalars())
+
+    # baza bez UPDATE ... RETURNING: id-evi prije, pa UPDATE po id-u u serijama
+    ids = sorted(db.execute(select(Task.id).where(*conds)).scalars())
+    for i in range(0, len(ids), CHUNK):
+        db.execute(
+            update(Task)
+            .where(Task.id.in_(ids[i:i + CHUNK]))
+            .values(values)
+            .execution_options(synchronize_session=False)
+        )
+    return ids
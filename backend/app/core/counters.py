@@ -0,0 +1,169 @@
+# app/core/counters.py
+"""
+project_gewerk_counters: done / in_progress / offen po projektu × gewerku,
+održavano inkrementalno. tasks_changed() uzme snimak pogođenih taskova iz
+read-modela prije i poslije osvježavanja i upiše samo razliku – u istoj
+transakciji kao i sama promjena.
+
+Za /stats bez "until" se čita nekoliko redova umjesto svih taskova.
+Provjera / rebuild: python verify_counters.py [--fix] [project_id ...]
+"""
+from collections import Counter
+from typing import Iterable
+
+from sqlalchemy import select, delete, insert, update, func, case, literal
+from sqlalchemy.orm import Session
+
+from app.core.stats import status_class, gewerk_label
+from app.models.counters import ProjectGewerkCounter
+from app.models.timeline_view import TaskTimelineRow
+from app.models.task import Task
+from app.models.process import ProcessStep
+from app.models.gewerk import Gewerk
+
+NO_GEWERK = 0
+CLASSES = ("done", "in_progress", "offen")
+CHUNK = 500
+
+
+def _view_class():
+    V = TaskTimelineRow
+    return case(
+        (V.end_ist.isnot(None), literal("done")),
+        (V.start_ist.isnot(None), literal("in_progress")),
+        else_=literal("offen"),
+    )
+
+
+def snapshot(db: Session, task_ids: Iterable[int]) -> Counter:
+    """{(project_id, gewerk_id, status): broj} za taskove, po read-modelu (zadnje brojano stanje)."""
+    V = TaskTimelineRow
+    ids = sorted({int(i) for i in task_ids if i is not None})
+    gid = func.coalesce(V.gewerk_id, NO_GEWERK)
+    cls = _view_class()
+    out: Counter = Counter()
+    for i in range(0, len(ids), CHUNK):
+        rows = db.execute(
+            select(V.project_id, gid, cls, func.count())
+            .where(V.task_id.in_(ids[i:i + CHUNK]))
+            .group_by(V.project_id, gid, cls)
+        )
+        for pid, g, c, n in rows:
+            out[(pid, g, c)] += n
+    return out
+
+
+def apply_delta(db: Session, before: Counter, after: Counter) -> None:
+    deltas: dict[tuple, dict] = {}
+    for key in set(before) | set(after):
+        d = after.get(key, 0) - before.get(key, 0)
+        if d:
+            pid, g, c = key
+            deltas.setdefault((pid, g), dict.fromkeys(CLASSES, 0))[c] += d
+
+    C = ProjectGewerkCounter
+    for (pid, g), d in deltas.items():
+        updated = db.execute(
+            update(C)
+            .where(C.project_id == pid, C.gewerk_id == g)
+            .values(
+                done=C.done + d["done"],
+                in_progress=C.in_progress + d["in_progress"],
+                offen=C.offen + d["offen"],
+            )
+        ).rowcount
+        if not updated:
+            db.execute(insert(C).values(project_id=pid, gewerk_id=g, **d))
+
+
+# --- Rebuild / provjera (izvor istine su taskovi) ----------------------------------
+
+def _computed_select(project_ids: list[int] | None = None):
+    gid = func.coalesce(Gewerk.id, NO_GEWERK).label("gewerk_id")
+    cls = status_class()
+    q = (
+        select(
+            Task.project_id, gid,
+            func.sum(case((cls == "done", 1), else_=0)),
+            func.sum(case((cls == "in_progress", 1), else_=0)),
+            func.sum(case((cls == "offen", 1), else_=0)),
+        )
+        .select_from(Task)
+        .outerjoin(ProcessStep, ProcessStep.id == Task.process_step_id)
+        .outerjoin(Gewerk, Gewerk.id == ProcessStep.gewerk_id)
+        .group_by(Task.project_id, gid)
+    )
+    if project_ids:
+        q = q.where(Task.project_id.in_(project_ids))
+    return q
+
+
+def computed(db: Session, project_ids: list[int] | None = None) -> dict[tuple, tuple]:
+    return {(r[0], r[1]): tuple(r[2:]) for r in db.execute(_computed_select(project_ids))}
+
+
+def stored(db: Session, project_ids: list[int] | None = None) -> dict[tuple, tuple]:
+    C = ProjectGewerkCounter
+    q = select(C.project_id, C.gewerk_id, C.done, C.in_progress, C.offen)
+    if project_ids:
+        q = q.where(C.project_id.in_(project_ids))
+    return {(r[0], r[1]): tuple(r[2:]) for r in db.execute(q) if any(r[2:])}
+
+
+def verify(db: Session, project_ids: list[int] | None = None) -> list[tuple]:
+    """[(project_id, gewerk_id, očekivano, upisano)] – prazno ako se sve slaže."""
+    want, have = computed(db, project_ids), stored(db, project_ids)
+    zero = (0, 0, 0)
+    return [
+        (*key, want.get(key, zero), have.get(key, zero))
+        for key in sorted(set(want) | set(have))
+        if want.get(key, zero) != have.get(key, zero)
+    ]
+
+
+def rebuild(db: Session, project_ids: list[int] | None = None) -> None:
+    C = ProjectGewerkCounter
+    q = delete(C)
+    if project_ids:
+        q = q.where(C.project_id.in_(project_ids))
+    db.execute(q)
+    db.execute(
+        insert(C).from_select(
+            ["project_id", "gewerk_id", "done", "in_progress", "offen"],
+            _computed_select(project_ids),
+        )
+    )
+
+
+# --- Čitanje -------------------------------------------------------------------
+
+def counter_stats(db: Session, project_id: int) -> dict:
+    """Isti JSON kao app.core.stats.project_stats(until=None), iz brojača."""
+    C = ProjectGewerkCounter
+    rows = db.execute(
+        select(gewerk_label(), C.done, C.in_progress, C.offen)
+        .select_from(C)
+        .outerjoin(Gewerk, Gewerk.id == C.gewerk_id)
+        .where(C.project_id == project_id)
+    ).all()
+
+    totals = dict.fromkeys(CLASSES, 0)
+    by_gewerk: dict[str, dict] = {}
+    for g, done, in_prog, offen in rows:
+        if not (done or in_prog or offen):
+            continue
+        entry = by_gewerk.setdefault(g, {"gewerk": g, "done": 0, "in_progress": 0, "offen": 0})
+        for c, n in zip(CLASSES, (done, in_prog, offen)):
+            entry[c] += n
+            totals[c] += n
+
+    total = sum(totals.values())
+    done = totals["done"]
+    return {
+        "total": total,
+        "done": done,
+        "in_progress": totals["in_progress"],
+        "offen": totals["offen"],
+        "percent_done": round((done / total) * 100, 2) if total else 0.0,
+        "by_gewerk": sorted(by_gewerk.values(), key=lambda r: r["gewerk"].lower()),
+    }
@@ -0,0 +1,128 @@
+# app/core/facets.py
+"""
+Faceti za filter-sidebar timeline-a (gewerk, status, top, ebene, stiege,
+bauteil, activity, processModel) s brojem taskova.
+
+Disjunktivno, kao kod pretraživača: brojevi jednog faceta računaju se uz sve
+ostale aktivne filtere, ali bez njegovog vlastitog – tako se vidi koliko bi
+taskova dala druga vrijednost istog faceta.
+
+Jedan SELECT (filteri koji nisu faceti: datumi, delayed, taskName, beschreibung, topIds)
+i jedan prolaz u Pythonu. Rezultat se kešira po (projekt, revizija, filter).
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+from datetime import date
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.filters import TaskFilter, apply_joins, filter_tasks
+from app.core.interval_index import narrow_window
+from app.core.natural_sort import natural_key
+from app.core.search import narrow_search
+from app.core.revision import current_revision
+from app.models.task import Task
+from app.models.structure import Top, Ebene, Stiege, Bauteil
+from app.models.process import ProcessStep, ProcessModel
+from app.models.gewerk import Gewerk
+
+# facet (ime query parametra) → polje u TaskFilter-u
+FACETS = {
+    "gewerk": "gewerk",
+    "status": "statuses",
+    "top": "top",
+    "ebene": "ebene",
+    "stiege": "stiege",
+    "bauteil": "bauteil",
+    "activity": "activity",
+    "processModel": "process_model",
+}
+STRUCTURE_FACETS = ("top", "ebene", "stiege", "bauteil")
+_JOINS = ("top", "ebene", "stiege", "bauteil", "step", "gewerk", "model")
+
+MAX_ENTRIES = 256
+
+_lock = threading.Lock()
+_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+
+
+def status_of(start_ist: date | None, end_ist: date | None) -> str:
+    if end_ist is not None:
+        return "Erledigt"
+    if start_ist is not None:
+        return "In Bearbeitung"
+    return "Offen"
+
+
+def _sorted_values(facet: str, counts: dict, selected) -> list[dict]:
+    for v in selected:
+        counts.setdefault(v, 0)  # odabrana vrijednost ostaje vidljiva i s 0
+    if facet in STRUCTURE_FACETS:
+        key = lambda v: natural_key(v)
+    else:
+        key = lambda v: v.casefold()
+    return [{"value": v, "count": counts[v]} for v in sorted(counts, key=key)]
+
+
+def compute_facets(db: Session, project_id: int, f: TaskFilter, window: str | None = None) -> dict:
+    # SQL dio: sve osim facet filtera
+    base = replace(f, **{field: () for field in FACETS.values()})
+    base = narrow_search(db, project_id, narrow_window(db, project_id, base, window))
+
+    q = apply_joins(
+        select(
+            Gewerk.name, Top.name, Ebene.name, Stiege.name, Bauteil.name,
+            ProcessStep.activity, ProcessModel.name, Task.start_ist, Task.end_ist,
+        ).select_from(Task),
+        _JOINS,
+    ).where(Task.project_id == project_id)
+    q = filter_tasks(q, base, have=_JOINS)
+
+    names = list(FACETS)
+    wanted = [set(getattr(f, FACETS[n])) for n in names]
+    counts: list[dict] = [{} for _ in names]
+    total = 0
+
+    for gewerk, top, ebene, stiege, bauteil, activity, model, s_ist, e_ist in db.execute(q):
+        values = (gewerk, status_of(s_ist, e_ist), top, ebene, stiege, bauteil, activity, model)
+        misses = [i for i, v in enumerate(values) if wanted[i] and v not in wanted[i]]
+        if not misses:
+            total += 1
+            for i, v in enumerate(values):
+                if v is not None:
+                    counts[i][v] = counts[i].get(v, 0) + 1
+        elif len(misses) == 1:
+            # prolazi sve osim jednog faceta → broji se samo u tom facetu
+            i = misses[0]
+            v = values[i]
+            if v is not None:
+                counts[i][v] = counts[i].get(v, 0) + 1
+
+    return {
+        "total": total,
+        "facets": {
+            n: _sorted_values(n, counts[i], getattr(f, FACETS[n]))
+            for i, n in enumerate(names)
+        },
+    }
+
+
+def project_facets(db: Session, project_id: int, f: TaskFilter, window: str | None = None) -> dict:
+    rev = current_revision(db, project_id)
+    # delayed ovisi o današnjem danu
+    key = (project_id, rev, f, window, date.today() if f.delayed else None)
+    with _lock:
+        hit = _cache.get(key)
+        if hit is not None:
+            _cache.move_to_end(key)
+            return hit
+
+    result = {"revision": rev, **compute_facets(db, project_id, f, window)}
+
+    with _lock:
+        _cache[key] = result
+        while len(_cache) > MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return result
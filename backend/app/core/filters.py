@@ -0,0 +1,294 @@
+# app/core/filters.py
+"""
+Jedan filter-engine za /tasks-timeline (ORM, Core, read-model), bulk,
+skip-window i structure-timeline.
+
+- TaskFilter je normalizovan oblik filtera (iz query parametara, BulkFilters
+  ili SkipWindowFilters) – isti filteri daju isti objekt.
+- Svaki join se dodaje najviše jednom, uvijek kao outer join i uvijek u istom
+  (kanonskom) redoslijedu. Outer join + WHERE na imenu filtrira isto kao
+  inner join, a query za sortiranje/eager-load može dijeliti iste joinove.
+- Vrijednosti idu isključivo kao bind parametri (IN liste kao "expanding"),
+  pa ista kombinacija filtera daje isti cache key i SQLAlchemy preskače
+  ponovno kompajliranje SQL-a (compiled cache na engine-u).
+"""
+from dataclasses import dataclass
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Iterable, NamedTuple
+
+from sqlalchemy import and_, or_, select
+
+from app.models.task import Task
+from app.models.structure import Top, Ebene, Stiege, Bauteil
+from app.models.process import ProcessStep, ProcessModel
+from app.models.gewerk import Gewerk
+from app.models.user import User
+from app.models.timeline_view import TaskTimelineRow
+from app.core.search import text_contains
+
+STATUS_ORDER = ("Erledigt", "In Bearbeitung", "Offen")
+
+
+# --- Joinovi -----------------------------------------------------------------
+# Kanonski redoslijed; svaki join ovisi samo o onima prije njega.
+
+JOINS = {
+    "top": (Top, Top.id == Task.top_id),
+    "ebene": (Ebene, Ebene.id == Top.ebene_id),
+    "stiege": (Stiege, Stiege.id == Ebene.stiege_id),
+    "bauteil": (Bauteil, Bauteil.id == Stiege.bauteil_id),
+    "step": (ProcessStep, ProcessStep.id == Task.process_step_id),
+    "gewerk": (Gewerk, Gewerk.id == ProcessStep.gewerk_id),
+    "model": (ProcessModel, ProcessModel.id == ProcessStep.model_id),
+    "sub": (User, User.id == Task.sub_id),
+}
+JOIN_ORDER = tuple(JOINS)
+_REQUIRES = {"ebene": "top", "stiege": "ebene", "bauteil": "stiege", "gewerk": "step", "model": "step"}
+
+STRUCTURE_JOINS = frozenset({"top", "ebene", "stiege", "bauteil"})
+
+
+@lru_cache(maxsize=256)
+def join_plan(needed: frozenset) -> tuple[str, ...]:
+    """Potrebni joinovi (uklj. međukorake) u kanonskom redoslijedu."""
+    names = set(needed)
+    for name in needed:
+        while name in _REQUIRES:
+            name = _REQUIRES[name]
+            names.add(name)
+    return tuple(n for n in JOIN_ORDER if n in names)
+
+
+def apply_joins(stmt, needed: Iterable[str], have: Iterable[str] = ()):
+    """Dodaje outer joinove (Select ili ORM Query) – svaki najviše jednom."""
+    have = set(have)
+    for name in join_plan(frozenset(needed)):
+        if name not in have:
+            target, onclause = JOINS[name]
+            stmt = stmt.outerjoin(target, onclause)
+    return stmt
+
+
+# --- Kolone nad kojima se filtrira ---------------------------------------------
+
+class FilterColumns(NamedTuple):
+    task_id: object
+    top_id: object
+    start_soll: object
+    end_soll: object
+    start_ist: object
+    end_ist: object
+    activity: object
+    gewerk: object
+    process_model: object
+    top: object
+    ebene: object
+    stiege: object
+    bauteil: object
+    beschreibung: object
+
+
+TASK_COLUMNS = FilterColumns(
+    Task.id, Task.top_id, Task.start_soll, Task.end_soll, Task.start_ist, Task.end_ist,
+    ProcessStep.activity, Gewerk.name, ProcessModel.name,
+    Top.name, Ebene.name, Stiege.name, Bauteil.name, Task.beschreibung,
+)
+
+_V = TaskTimelineRow
+VIEW_FILTER_COLUMNS = FilterColumns(
+    _V.task_id, _V.top_id, _V.start_soll, _V.end_soll, _V.start_ist, _V.end_ist,
+    _V.task, _V.gewerk_name, _V.process_model,
+    _V.top, _V.ebene, _V.stiege, _V.bauteil, _V.beschreibung,
+)
+
+
+# --- Normalizovani filter ----------------------------------------------------------
+
+def _names(values) -> tuple[str, ...]:
+    return tuple(sorted({v for v in values or () if v is not None and v != ""}))
+
+
+def _ids(values) -> tuple[int, ...] | None:
+    if not values:
+        return None
+    return tuple(sorted({int(v) for v in values}))
+
+
+def _day(v) -> date | None:
+    if v is None or v == "":
+        return None
+    if isinstance(v, datetime):
+        return v.date()
+    if isinstance(v, date):
+        return v
+    return datetime.strptime(v, "%Y-%m-%d").date()
+
+
+@dataclass(frozen=True)
+class TaskFilter:
+    ids: tuple[int, ...] | None = None
+    top_ids: tuple[int, ...] | None = None
+    gewerk: tuple[str, ...] = ()
+    statuses: tuple[str, ...] = ()
+    start: date | None = None
+    end: date | None = None
+    window: str = "soll"  # start/end nad "soll", "ist" ili "any" (interval_index.BASES)
+    delayed: bool = False
+    task_name: str | None = None
+    beschreibung: str | None = None
+    top: tuple[str, ...] = ()
+    ebene: tuple[str, ...] = ()
+    stiege: tuple[str, ...] = ()
+    bauteil: tuple[str, ...] = ()
+    activity: tuple[str, ...] = ()
+    process_model: tuple[str, ...] = ()
+
+    @classmethod
+    def from_params(
+        cls,
+        gewerk=None, startDate=None, endDate=None, statuses=None, delayed=None,
+        taskName=None, top=None, ebene=None, stiege=None, bauteil=None,
+        activity=None, processModel=None, topIds=None, ids=None, beschreibung=None,
+    ) -> "TaskFilter":
+        """Query parametri kao u /tasks-timeline (datumi kao "YYYY-MM-DD" ili date)."""
+        return cls(
+            ids=_ids(ids),
+            top_ids=_ids(topIds),
+            gewerk=_names(gewerk),
+            statuses=tuple(s for s in STATUS_ORDER if s in (statuses or ())),
+            start=_day(startDate),
+            end=_day(endDate),
+            delayed=bool(delayed),
+            task_name=taskName or None,
+            beschreibung=beschreibung or None,
+            top=_names(top),
+            ebene=_names(ebene),
+            stiege=_names(stiege),
+            bauteil=_names(bauteil),
+            activity=_names(activity),
+            process_model=_names(processModel),
+        )
+
+    @classmethod
+    def from_bulk(cls, f, ids=None) -> "TaskFilter":
+        """BulkFilters (+ eksplicitni ID-jevi iz BulkBody)."""
+        if f is None:
+            return cls(ids=_ids(ids))
+        return cls.from_params(
+            gewerk=f.gewerk, startDate=f.startDate, endDate=f.endDate, statuses=f.status,
+            delayed=f.delayed, taskName=f.taskName, top=f.tops, ebene=f.ebenen,
+            stiege=f.stiegen, bauteil=f.bauteile, activity=f.activities,
+            processModel=f.processModels, topIds=f.topIds, ids=ids,
+            beschreibung=f.beschreibung,
+        )
+
+    @classmethod
+    def from_skip_window(cls, f) -> "TaskFilter":
+        if f is None:
+            return cls()
+        return cls.from_params(
+            gewerk=f.gewerk, top=f.top, ebene=f.ebene, stiege=f.stiege, bauteil=f.bauteil,
+            activity=f.activity, processModel=f.processModel, topIds=f.topIds,
+        )
+
+    def joins(self) -> frozenset:
+        """Joinovi potrebni samo za filtere (bez sortiranja/eager-loada)."""
+        needed = set()
+        if self.top:
+            needed.add("top")
+        if self.ebene:
+            needed.add("ebene")
+        if self.stiege:
+            needed.add("stiege")
+        if self.bauteil:
+            needed.add("bauteil")
+        if self.task_name or self.activity:
+            needed.add("step")
+        if self.gewerk:
+            needed.add("gewerk")
+        if self.process_model:
+            needed.add("model")
+        return frozenset(needed)
+
+    def _window_cond(self, c: FilterColumns):
+        """Prozor nad Ist ("ist") ili Soll ILI Ist ("any"), iste semantike kao interval_index."""
+        soll, ist = [], [c.start_ist.isnot(None)]
+        if self.start:
+            soll.append(c.end_soll >= self.start)
+            # Ist bez kraja još traje → otvoren nadesno
+            ist.append(or_(c.end_ist.is_(None), c.end_ist >= self.start))
+        if self.end:
+            soll.append(c.start_soll <= self.end)
+            ist.append(c.start_ist <= self.end)
+        if self.window == "ist":
+            return and_(*ist)
+        return or_(and_(*soll), and_(*ist))
+
+    def where(self, cols: FilterColumns = TASK_COLUMNS, today: date | None = None) -> list:
+        """WHERE uslovi, uvijek istim redoslijedom (stabilan oblik statementa)."""
+        c = cols
+        conds = []
+        if self.ids is not None:
+            conds.append(c.task_id.in_(self.ids))
+        if self.top_ids is not None:
+            conds.append(c.top_id.in_(self.top_ids))
+        if self.gewerk:
+            conds.append(c.gewerk.in_(self.gewerk))
+        if self.window == "soll":
+            if self.start:
+                conds.append(c.end_soll >= self.start)
+            if self.end:
+                conds.append(c.start_soll <= self.end)
+        elif self.start or self.end:
+            conds.append(self._window_cond(c))
+        if self.statuses:
+            status_conds = []
+            if "Erledigt" in self.statuses:
+                status_conds.append(c.end_ist.isnot(None))
+            if "In Bearbeitung" in self.statuses:
+                status_conds.append(and_(c.start_ist.isnot(None), c.end_ist.is_(None)))
+            if "Offen" in self.statuses:
+                status_conds.append(and_(c.start_ist.is_(None), c.end_ist.is_(None)))
+            conds.append(or_(*status_conds))
+        if self.delayed:
+            today = today or date.today()
+            conds.append(or_(
+                and_(c.end_ist.is_(None), c.end_soll < today),
+                c.end_ist > c.end_soll,
+            ))
+        if self.task_name:
+            conds.append(text_contains(c.activity, self.task_name))
+        if self.beschreibung:
+            conds.append(text_contains(c.beschreibung, self.beschreibung))
+        if self.top:
+            conds.append(c.top.in_(self.top))
+        if self.ebene:
+            conds.append(c.ebene.in_(self.ebene))
+        if self.stiege:
+            conds.append(c.stiege.in_(self.stiege))
+        if self.bauteil:
+            conds.append(c.bauteil.in_(self.bauteil))
+        if self.activity:
+            conds.append(c.activity.in_(self.activity))
+        if self.process_model:
+            conds.append(c.process_model.in_(self.process_model))
+        return conds
+
+
+def filter_tasks(stmt, f: TaskFilter, have: Iterable[str] = ()):
+    """
+    Select/Query nad Task-om → dodaj joinove koji filterima trebaju (osim onih
+    koji su već u `have`) i WHERE uslove.
+    """
+    stmt = apply_joins(stmt, f.joins(), have=have)
+    conds = f.where()
+    return stmt.where(*conds) if conds else stmt
+
+
+def update_scope(project_id: int, f: TaskFilter) -> list:
+    """WHERE za UPDATE nad tasks (bez JOIN-a): filteri koji traže JOIN idu kroz id IN (podupit)."""
+    if f.joins():
+        ids = filter_tasks(select(Task.id).where(Task.project_id == project_id), f).correlate(None)
+        return [Task.project_id == project_id, Task.id.in_(ids)]
+    return [Task.project_id == project_id, *f.where()]
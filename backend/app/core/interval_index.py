@@ -0,0 +1,146 @@
+# app/core/interval_index.py
+"""
+In-memory indeks intervala (Soll i Ist) po projektu, za prozor datuma
+(startDate/endDate) na timeline-u.
+
+Taskovi su sortirani po startu; nad krajevima je segmentno stablo (max).
+Upit [lo, hi] = binarna pretraga za zadnji start <= hi, pa obilazak stabla
+samo kroz grane čiji max(end) >= lo → O(log n + k).
+Indeks se drži u procesu i vrijedi dok se revizija projekta ne promijeni.
+"""
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import replace
+from datetime import date
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.filters import TaskFilter
+from app.core.revision import current_revision
+from app.models.task import Task
+
+NEG = -1          # nema kraja  → ne preklapa nijedan prozor s donjom granicom
+POS = 10 ** 9     # nema starta → ne preklapa nijedan prozor s gornjom granicom
+
+MAX_PROJECTS = 32        # koliko projekata držimo u memoriji (LRU)
+SELECTIVE_SHARE = 0.5    # prozor s više pogodaka od ovoga (udio projekta) → ostaje SQL predikat
+MAX_IDS = 5000           # ... ili s više od ovoliko ID-jeva (IN lista = bind parametar po tasku)
+
+BASES = ("soll", "ist", "any")
+
+
+class IntervalIndex:
+    def __init__(self, items):
+        """items: (task_id, start_ordinal, end_ordinal) – bez starta POS, bez kraja NEG."""
+        items = sorted(items, key=lambda r: (r[1], r[0]))
+        self.ids = [r[0] for r in items]
+        self.starts = [r[1] for r in items]
+        n = len(items)
+        self.size = 1
+        while self.size < n:
+            self.size *= 2
+        tree = [NEG] * (2 * self.size)
+        for i, r in enumerate(items):
+            tree[self.size + i] = r[2]
+        for node in range(self.size - 1, 0, -1):
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+        self.tree = tree
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def overlapping(self, lo: int = NEG, hi: int = POS) -> list[int]:
+        """ID-jevi taskova s end >= lo i start <= hi."""
+        limit = bisect_right(self.starts, hi)
+        if not limit:
+            return []
+        tree, size, ids = self.tree, self.size, self.ids
+        out: list[int] = []
+        stack = [(1, 0, size)]
+        while stack:
+            node, left, right = stack.pop()
+            if left >= limit or tree[node] < lo:
+                continue
+            if node >= size:
+                out.append(ids[left])
+                continue
+            mid = (left + right) // 2
+            stack.append((2 * node + 1, mid, right))
+            stack.append((2 * node, left, mid))
+        return out
+
+
+def _ord(d: date | None, missing: int) -> int:
+    return d.toordinal() if d else missing
+
+
+def build_indexes(rows) -> dict[str, IntervalIndex]:
+    """rows: (id, start_soll, end_soll, start_ist, end_ist)."""
+    soll, ist = [], []
+    for tid, s_soll, e_soll, s_ist, e_ist in rows:
+        soll.append((tid, _ord(s_soll, POS), _ord(e_soll, NEG)))
+        if s_ist:
+            # Ist bez kraja = još traje → otvoren nadesno
+            ist.append((tid, s_ist.toordinal(), _ord(e_ist, POS)))
+    return {"soll": IntervalIndex(soll), "ist": IntervalIndex(ist)}
+
+
+_lock = threading.Lock()
+_cache: "OrderedDict[int, tuple[int, dict[str, IntervalIndex]]]" = OrderedDict()
+
+
+def project_indexes(db: Session, project_id: int) -> dict[str, IntervalIndex]:
+    rev = current_revision(db, project_id)
+    with _lock:
+        hit = _cache.get(project_id)
+        if hit and hit[0] == rev:
+            _cache.move_to_end(project_id)
+            return hit[1]
+
+    rows = db.execute(
+        select(Task.id, Task.start_soll, Task.end_soll, Task.start_ist, Task.end_ist)
+        .where(Task.project_id == project_id)
+    ).all()
+    indexes = build_indexes(rows)
+
+    with _lock:
+        _cache[project_id] = (rev, indexes)
+        _cache.move_to_end(project_id)
+        while len(_cache) > MAX_PROJECTS:
+            _cache.popitem(last=False)
+    return indexes
+
+
+def overlapping_ids(indexes: dict[str, IntervalIndex], start: date | None, end: date | None,
+                    basis: str = "soll") -> set[int]:
+    lo = start.toordinal() if start else NEG
+    hi = end.toordinal() if end else POS
+    if basis == "any":
+        return set(indexes["soll"].overlapping(lo, hi)) | set(indexes["ist"].overlapping(lo, hi))
+    return set(indexes[basis].overlapping(lo, hi))
+
+
+def selective(ids: set[int], total: int) -> bool:
+    """Isplati li se prozor poslati kao IN lista ID-jeva umjesto start/end predikata."""
+    return len(ids) <= MAX_IDS and len(ids) <= SELECTIVE_SHARE * total
+
+
+def narrow_window(db: Session, project_id: int, f: TaskFilter, basis: str | None = None) -> TaskFilter:
+    """
+    Prozor datuma iz filtera → eksplicitni ID-jevi iz indeksa (start/end se brišu).
+    Prozor koji pogađa većinu projekta (ili više od MAX_IDS taskova) ostaje
+    običan SQL predikat nad Soll i/ili Ist datumima (TaskFilter.window).
+    """
+    basis = basis if basis in BASES else "soll"
+    if not (f.start or f.end):
+        return f
+
+    indexes = project_indexes(db, project_id)
+    ids = overlapping_ids(indexes, f.start, f.end, basis)
+    if not selective(ids, len(indexes["soll"])):
+        return replace(f, window=basis)
+    if f.ids is not None:
+        ids &= set(f.ids)
+    return replace(f, start=None, end=None, ids=tuple(sorted(ids)))
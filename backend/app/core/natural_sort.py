@@ -0,0 +1,16 @@
+# app/core/natural_sort.py
+import re
+
+_DIGITS = re.compile(r"\d+")
+_PAD = 10
+
+
+def natural_key(name: str | None) -> str | None:
+    """
+    "Top 2" → "top 0000000002", "Top 10" → "top 0000000010": ključ koji se
+    sortira kao string, a daje prirodni redoslijed (Top 2 prije Top 10).
+    """
+    if name is None:
+        return None
+    s = name.strip().casefold()
+    return _DIGITS.sub(lambda m: m.group(0).zfill(_PAD), s)
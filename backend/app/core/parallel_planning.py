@@ -0,0 +1,99 @@
+# app/core/parallel_planning.py
+"""
+Planiranje datuma za velike generate/sync zahtjeve u ProcessPoolExecutor-u.
+
+TOP-ovi se dijele u komade od CHUNK_TOPS; svaki komad ide u worker kao čisti
+podaci (neradni dani, predlošci modela, {top_id: (model_id, datum)}) i vraća
+{top_id: (starts, ends)}. Rezultati se spajaju i upisuju jednim serijskim
+upisom u ruti. Ispod PARALLEL_MIN_TOPS (ili GENERATE_WORKERS=0) se planira u
+procesu – pokretanje workera bi koštalo više od samog računa.
+
+Zahtjev za to vrijeme čeka na `await`, pa event loop može odgovarati na
+polling napretka (app/core/progress.py).
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from app.core import progress
+from app.core.step_templates import StepTemplate, plan_tops
+from app.core.workdays import WorkCalendar, calendar_for
+
+PARALLEL_MIN_TOPS = int(os.getenv("GENERATE_PARALLEL_MIN_TOPS", "5000"))
+CHUNK_TOPS = int(os.getenv("GENERATE_CHUNK_TOPS", "2000"))
+WORKERS = int(os.getenv("GENERATE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_lock = threading.Lock()
+_pool: ProcessPoolExecutor | None = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            # spawn: bez kopiranja niti / konekcija iz web procesa
+            _pool = ProcessPoolExecutor(
+                max_workers=WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _plan_chunk(
+    closures: tuple[tuple[date, date], ...],
+    templates: dict[int, StepTemplate],
+    bases: dict[int, tuple[int, date]],
+) -> dict[int, tuple[list[date], list[date]]]:
+    # izvršava se u workeru; kalendar se kešira i tamo (calendar_for)
+    return plan_tops(calendar_for(closures), templates, bases)
+
+
+def _chunks(bases: dict[int, tuple[int, date]], size: int):
+    items = list(bases.items())
+    for i in range(0, len(items), size):
+        yield dict(items[i:i + size])
+
+
+async def plan_tops_async(
+    cal: WorkCalendar,
+    templates: dict[int, StepTemplate],
+    bases: dict[int, tuple[int, date]],
+    job: str | None = None,
+) -> dict[int, tuple[list[date], list[date]]]:
+    """Kao step_templates.plan_tops, uz komade u procesnom poolu za velike zahtjeve."""
+    progress.update(job, phase="plan", total=len(bases), done=0)
+    if WORKERS <= 0 or len(bases) < PARALLEL_MIN_TOPS:
+        progress.update(job, mode="inline")
+        out = plan_tops(cal, templates, bases)
+        progress.advance(job, len(bases))
+        return out
+
+    progress.update(job, mode="pool")
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    futures = []
+    for chunk in _chunks(bases, CHUNK_TOPS):
+        used = {m: templates[m] for m, _ in chunk.values()}
+        futures.append(loop.run_in_executor(pool, _plan_chunk, cal.closures, used, chunk))
+
+    out: dict[int, tuple[list[date], list[date]]] = {}
+    try:
+        for fut in asyncio.as_completed(futures):
+            part = await fut
+            out.update(part)
+            progress.advance(job, len(part))
+    except BaseException:
+        for fut in futures:
+            fut.cancel()
+        raise
+    return out
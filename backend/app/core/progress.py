@@ -0,0 +1,76 @@
+# app/core/progress.py
+"""
+Napredak dugih operacija (generate/sync) po job id-u koji šalje klijent
+(?job=<id>), za polling s GET /generate-jobs/{job_id}. Registar je u
+procesu – polling mora doći na isti worker (ili jedan worker po podu).
+"""
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+MAX_JOBS = 200
+
+_lock = threading.Lock()
+_jobs: "OrderedDict[str, dict]" = OrderedDict()
+
+
+def start(job_id: str | None, kind: str, project_id: int) -> None:
+    if not job_id:
+        return
+    with _lock:
+        _jobs[job_id] = {
+            "job": job_id,
+            "kind": kind,
+            "project_id": project_id,
+            "phase": "load",
+            "done": 0,
+            "total": 0,
+            "mode": None,
+            "started": time.time(),
+            "finished": None,
+            "error": None,
+        }
+        _jobs.move_to_end(job_id)
+        while len(_jobs) > MAX_JOBS:
+            _jobs.popitem(last=False)
+
+
+def update(job_id: str | None, **fields) -> None:
+    if not job_id:
+        return
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is not None:
+            job.update(fields)
+
+
+def advance(job_id: str | None, n: int) -> None:
+    if not job_id:
+        return
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is not None:
+            job["done"] += n
+
+
+def finish(job_id: str | None, error: str | None = None) -> None:
+    update(job_id, phase="error" if error else "done", error=error, finished=time.time())
+
+
+def get(job_id: str) -> dict | None:
+    with _lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+
+@contextmanager
+def tracking(job_id: str | None, kind: str, project_id: int):
+    """with tracking(job, "generate", pid): ... – "done" na kraju, "error" kod iznimke."""
+    start(job_id, kind, project_id)
+    try:
+        yield
+    except Exception as e:
+        finish(job_id, error=str(e) or type(e).__name__)
+        raise
+    finish(job_id)
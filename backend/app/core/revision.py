@@ -0,0 +1,118 @@
+# app/core/revision.py
+import hashlib
+from datetime import date
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.revision import ProjectRevision
+from app.models.structure import Bauteil, Stiege, Ebene, Top
+
+
+def current_revision(db: Session, project_id: int) -> int:
+    rev = db.execute(
+        select(ProjectRevision.revision).where(ProjectRevision.project_id == project_id)
+    ).scalar()
+    return int(rev or 0)
+
+
+def bump_revision(db: Session, project_id: int | None) -> int:
+    """Povećaj reviziju projekta u tekućoj transakciji (commit radi pozivatelj)."""
+    if project_id is None:
+        return 0
+    updated = (
+        db.query(ProjectRevision)
+        .filter(ProjectRevision.project_id == project_id)
+        .update({ProjectRevision.revision: ProjectRevision.revision + 1}, synchronize_session=False)
+    )
+    if not updated:
+        db.add(ProjectRevision(project_id=project_id, revision=1))
+        db.flush()
+    return current_revision(db, project_id)
+
+
+# --- Kojem projektu pripada čvor strukture ----------------------------------
+
+def project_id_of_structure(db: Session, model, obj_id: int) -> int | None:
+    if model is Bauteil:
+        q = select(Bauteil.project_id).where(Bauteil.id == obj_id)
+    elif model is Stiege:
+        q = select(Bauteil.project_id).join(Stiege, Stiege.bauteil_id == Bauteil.id).where(Stiege.id == obj_id)
+    elif model is Ebene:
+        q = (
+            select(Bauteil.project_id)
+            .join(Stiege, Stiege.bauteil_id == Bauteil.id)
+            .join(Ebene, Ebene.stiege_id == Stiege.id)
+            .where(Ebene.id == obj_id)
+        )
+    elif model is Top:
+        q = (
+            select(Bauteil.project_id)
+            .join(Stiege, Stiege.bauteil_id == Bauteil.id)
+            .join(Ebene, Ebene.stiege_id == Stiege.id)
+            .join(Top, Top.ebene_id == Ebene.id)
+            .where(Top.id == obj_id)
+        )
+    else:
+        return None
+    return db.execute(q).scalar()
+
+
+# --- ETag / If-None-Match ----------------------------------------------------
+
+def project_etag(db: Session, request: Request, project_id: int, variant: str = "") -> str:
+    """
+    Weak ETag iz revizije projekta + putanje, query parametara i Accept-a.
+    `variant`: stanje koje nije u reviziji projekta (npr. verzija scenarija).
+    """
+    rev = current_revision(db, project_id)
+    params = sorted(request.query_params.multi_items())
+    accept = request.headers.get("accept", "")
+    key = f"{request.url.path}?{params!r}|{accept}".encode()
+    digest = hashlib.blake2s(key, digest_size=8).hexdigest()
+    return f'W/"r{rev}{variant}-{digest}"'
+
+
+def day_variant(on: bool = True) -> str:
+    """Dio ETag-a za odgovore koji ovise o današnjem danu ("delayed") – revizija se tada ne mijenja."""
+    return f"d{date.today().isoformat()}" if on else ""
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # usporedba je "weak": W/ prefiks se zanemaruje
+    strip = lambda v: v.strip().removeprefix("W/")
+    return strip(etag) in {strip(v) for v in header.split(",")}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def set_etag(response: Response, etag: str) -> Response:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"  # uvijek revalidiraj, ali uz 304
+    response.headers["Vary"] = "Accept"
+    return response
+
+
+# --- If-Match / verzija taska (optimističko zaključavanje) ------------------
+
+def version_etag(version: int | None) -> str:
+    return f'"{version or 0}"'
+
+
+def if_match_version(request: Request) -> int | None:
+    """
+    If-Match: "<verzija>" → verzija; bez headera ili "*" → None (bez provjere).
+    Nevažeća vrijednost → ValueError.
+    """
+    header = (request.headers.get("if-match") or "").strip()
+    if not header or header == "*":
+        return None
+    return int(header.removeprefix("W/").strip('"'))
@@ -0,0 +1,244 @@
+# app/core/scenarios.py
+"""
+"Šta ako" scenariji plana kao copy-on-write nad Soll datumima.
+
+Scenarij ne kopira taskove: scenario_task_overrides drži samo (start_soll,
+end_soll) za taskove koji se u scenariju razlikuju od baze. Čitanje ide kroz
+outer join + COALESCE(override, task), pa timeline i statistike vide
+scenarij istim upitima kao bazu. Override jednak bazi se odmah briše;
+commit upiše overridee u tasks jednim executemany UPDATE-om. Override pamti
+i Soll baze pri upisu: task promijenjen u bazi poslije toga je konflikt.
+"""
+from dataclasses import replace
+from datetime import date
+from typing import Iterable
+
+import numpy as np
+from sqlalchemy import select, delete, insert, func, and_
+from sqlalchemy.orm import Session
+
+from app.core.filters import TaskFilter, FilterColumns, TASK_COLUMNS, apply_joins
+from app.core.interval_index import project_indexes, overlapping_ids, selective
+from app.core.schedule import shift_by_start
+from app.core.workdays import WorkCalendar, as_days, to_dates
+from app.models.scenario import ScheduleScenario, ScenarioTaskOverride
+from app.models.task import Task
+
+CHUNK = 500
+
+_O = ScenarioTaskOverride
+
+
+def effective_start():
+    return func.coalesce(_O.start_soll, Task.start_soll)
+
+
+def effective_end():
+    return func.coalesce(_O.end_soll, Task.end_soll)
+
+
+def overlay(stmt, scenario_id: int):
+    """Select nad Task-om → outer join na overridee scenarija."""
+    return stmt.outerjoin(_O, and_(_O.task_id == Task.id, _O.scenario_id == scenario_id))
+
+
+def filter_columns() -> FilterColumns:
+    """Kolone za TaskFilter.where: Soll prozor / "delayed" gledaju datume scenarija."""
+    return TASK_COLUMNS._replace(start_soll=effective_start(), end_soll=effective_end())
+
+
+def filter_scenario(stmt, f: TaskFilter, have: Iterable[str] = ()):
+    """Kao filters.filter_tasks, ali nad datumima scenarija (overlay() mora već biti u stmt)."""
+    stmt = apply_joins(stmt, f.joins(), have=have)
+    conds = f.where(filter_columns())
+    return stmt.where(*conds) if conds else stmt
+
+
+def narrow_window_any(db: Session, project_id: int, scenario_id: int, f: TaskFilter) -> TaskFilter:
+    """
+    window=any uz scenarij: Ist prozor iz indeksa intervala (Ist scenarij ne mijenja)
+    ILI Soll prozor nad datumima scenarija (SQL) → eksplicitni ID-jevi. Neselektivan
+    prozor ostaje predikat (filter_columns() daje Soll scenarija, Ist iz taskova).
+    """
+    if not (f.start or f.end):
+        return f
+    indexes = project_indexes(db, project_id)
+    total = len(indexes["soll"])
+    ids = overlapping_ids(indexes, f.start, f.end, "ist")
+    if not selective(ids, total):
+        return replace(f, window="any")
+    conds = [Task.project_id == project_id]
+    if f.start:
+        conds.append(effective_end() >= f.start)
+    if f.end:
+        conds.append(effective_start() <= f.end)
+    ids |= set(db.execute(overlay(select(Task.id), scenario_id).where(*conds)).scalars())
+    if not selective(ids, total):
+        return replace(f, window="any")
+    if f.ids is not None:
+        ids &= set(f.ids)
+    return replace(f, start=None, end=None, ids=tuple(sorted(ids)))
+
+
+# --- Čitanje -----------------------------------------------------------------
+
+def change_count(db: Session, scenario_id: int) -> int:
+    return int(db.execute(
+        select(func.count()).select_from(_O).where(_O.scenario_id == scenario_id)
+    ).scalar() or 0)
+
+
+def changes(db: Session, scenario: ScheduleScenario) -> list[dict]:
+    """Taskovi koje scenarij mijenja: Soll u bazi (sada i pri upisu overridea) i u scenariju."""
+    rows = db.execute(
+        select(
+            Task.id, Task.start_soll, Task.end_soll,
+            _O.base_start_soll, _O.base_end_soll, _O.start_soll, _O.end_soll,
+        )
+        .join(_O, _O.task_id == Task.id)
+        .where(_O.scenario_id == scenario.id, Task.project_id == scenario.project_id)
+        .order_by(Task.id)
+    ).all()
+    return [
+        {
+            "id": tid,
+            "start_soll_base": bs,
+            "end_soll_base": be,
+            "start_soll_origin": os_,
+            "end_soll_origin": oe,
+            "start_soll": s,
+            "end_soll": e,
+        }
+        for tid, bs, be, os_, oe, s, e in rows
+    ]
+
+
+def conflicts(rows: list[dict]) -> list[dict]:
+    """Redovi iz changes() čiji se Soll u bazi promijenio poslije upisa u scenarij."""
+    return [
+        c for c in rows
+        if (c["start_soll_base"], c["end_soll_base"]) != (c["start_soll_origin"], c["end_soll_origin"])
+    ]
+
+
+def task_dates(
+    db: Session, scenario: ScheduleScenario, task_ids: Iterable[int]
+) -> dict[int, tuple[date | None, date | None, date | None, date | None]]:
+    """{task_id: (start baza, end baza, start scenarij, end scenarij)} za taskove projekta."""
+    ids = sorted({int(i) for i in task_ids})
+    out = {}
+    for i in range(0, len(ids), CHUNK):
+        rows = db.execute(
+            overlay(
+                select(Task.id, Task.start_soll, Task.end_soll, effective_start(), effective_end()),
+                scenario.id,
+            ).where(Task.project_id == scenario.project_id, Task.id.in_(ids[i:i + CHUNK]))
+        )
+        for tid, bs, be, s, e in rows:
+            out[tid] = (bs, be, s, e)
+    return out
+
+
+# --- Upis u scenarij ------------------------------------------------------------
+
+def write_overrides(
+    db: Session,
+    scenario: ScheduleScenario,
+    dates: dict[int, tuple[date, date]],
+    base: dict[int, tuple[date | None, date | None]],
+) -> list[int]:
+    """
+    {task_id: (start, end)} → overridei scenarija; datum jednak bazi briše
+    override (task se opet čita iz baze). Vraća id-eve taskova koji se mijenjaju.
+    Postojeći override zadržava Soll baze iz prvog upisa (provjera konflikta na commitu).
+    """
+    ids = sorted(dates)
+    origin: dict[int, tuple[date | None, date | None]] = {}
+    for i in range(0, len(ids), CHUNK):
+        chunk = ids[i:i + CHUNK]
+        rows = db.execute(
+            select(_O.task_id, _O.base_start_soll, _O.base_end_soll)
+            .where(_O.scenario_id == scenario.id, _O.task_id.in_(chunk))
+        )
+        origin.update((tid, (bs, be)) for tid, bs, be in rows)
+        db.execute(delete(_O).where(_O.scenario_id == scenario.id, _O.task_id.in_(chunk)))
+    rows = []
+    for tid, (s, e) in sorted(dates.items()):
+        if (s, e) == base.get(tid):
+            continue
+        bs, be = origin.get(tid) or base.get(tid) or (None, None)
+        rows.append({
+            "scenario_id": scenario.id, "task_id": tid, "start_soll": s, "end_soll": e,
+            "base_start_soll": bs, "base_end_soll": be,
+        })
+    for i in range(0, len(rows), CHUNK):
+        db.execute(insert(_O), rows[i:i + CHUNK])
+    scenario.version = (scenario.version or 0) + 1
+    return ids
+
+
+def shift_tasks(
+    db: Session, scenario: ScheduleScenario, f: TaskFilter, days: int, cal: WorkCalendar | None
+) -> list[dict]:
+    """
+    Pomjeri filtrirane taskove u scenariju za `days` dana (od datuma scenarija);
+    uz kalendar novi start neradnog dana ide na prvi radni, kraj za isto.
+    """
+    q = filter_scenario(
+        overlay(
+            select(Task.id, Task.start_soll, Task.end_soll, effective_start(), effective_end()),
+            scenario.id,
+        ).where(
+            Task.project_id == scenario.project_id,
+            effective_start().isnot(None),
+            effective_end().isnot(None),
+        ),
+        f,
+    ).order_by(Task.id)
+    rows = db.execute(q).all()
+    if not rows:
+        return []
+
+    shifts = shift_by_start(cal, sorted({r[3] for r in rows}), days)
+    delta = np.array([shifts[r[3]] for r in rows], dtype="timedelta64[D]")
+    new_starts = to_dates(as_days(r[3] for r in rows) + delta)
+    new_ends = to_dates(as_days(r[4] for r in rows) + delta)
+
+    write_overrides(
+        db, scenario,
+        {r[0]: (s, e) for r, s, e in zip(rows, new_starts, new_ends)},
+        {r[0]: (r[1], r[2]) for r in rows},
+    )
+    return [
+        {"id": r[0], "start_soll_before": r[3], "end_soll_before": r[4], "start_soll": s, "end_soll": e}
+        for r, s, e in zip(rows, new_starts, new_ends)
+    ]
+
+
+# --- Commit / odbacivanje ----------------------------------------------------------
+
+def commit_rows(rows: list[dict]) -> list[dict]:
+    """Redovi iz changes() → [{"b_id", "b_start", "b_end"}] za update_soll_dates – samo stvarne razlike."""
+    return [
+        {"b_id": c["id"], "b_start": c["start_soll"], "b_end": c["end_soll"]}
+        for c in rows
+        if (c["start_soll"], c["end_soll"]) != (c["start_soll_base"], c["end_soll_base"])
+    ]
+
+
+def drop_scenario(db: Session, scenario: ScheduleScenario) -> None:
+    # i bez ON DELETE CASCADE (SQLite bez foreign_keys pragme)
+    db.execute(delete(_O).where(_O.scenario_id == scenario.id))
+    db.delete(scenario)
+
+
+def get_scenario(db: Session, project_id: int, scenario_id: int) -> ScheduleScenario | None:
+    scenario = db.get(ScheduleScenario, scenario_id)
+    if scenario is None or scenario.project_id != project_id:
+        return None
+    return scenario
+
+
+def etag_variant(scenario: ScheduleScenario | None) -> str:
+    """Dio ETag-a za scenarij (izmjene scenarija ne mijenjaju reviziju projekta)."""
+    return f"s{scenario.id}.{scenario.version}" if scenario is not None else ""
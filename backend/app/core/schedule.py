@@ -0,0 +1,130 @@
+# app/core/schedule.py
+"""
+Zeitsprung / skip-window kao jedan UPDATE.
+
+Taskovi čiji Soll raspon preklapa prozor pomjeraju se za dužinu prozora; ako
+novi start padne na neradni dan (vikend / praznik projekta), start i kraj se
+pomjere još do prvog radnog dana. Taj dodatak ovisi samo o starom start_soll,
+pa se iz baze čitaju samo DISTINCT start datumi, kalendar ih obradi odjednom,
+a UPDATE dobije CASE start_soll WHEN ... THEN <pomak> – bez učitavanja taskova.
+"""
+from datetime import date
+
+import numpy as np
+from sqlalchemy import select, update, case, literal, func
+from sqlalchemy.orm import Session
+
+from app.core.filters import TaskFilter, filter_tasks, update_scope
+from app.core.workdays import WorkCalendar, as_days, to_dates
+from app.models.task import Task
+
+
+def overlap_conditions(start: date, end: date) -> list:
+    return [
+        Task.start_soll.isnot(None),
+        Task.end_soll.isnot(None),
+        Task.start_soll <= end,
+        Task.end_soll >= start,
+    ]
+
+
+def _scope(project_id: int, f: TaskFilter, start: date, end: date) -> list:
+    return [*update_scope(project_id, f), *overlap_conditions(start, end)]
+
+
+def shift_by_start(cal: WorkCalendar | None, starts: list[date], shift_days: int) -> dict[date, int]:
+    """{stari start_soll: ukupni pomak u danima} (pomak prozora + dodatak do radnog dana)."""
+    if not starts:
+        return {}
+    moved = as_days(starts) + np.timedelta64(shift_days, "D")
+    total = np.full(len(starts), shift_days, dtype=np.int64)
+    if cal is not None:
+        total += (cal.roll_forward(moved) - moved).astype(np.int64)
+    return dict(zip(starts, total.tolist()))
+
+
+def _add_days(db: Session, col, days_expr):
+    """col + days_expr (broj dana) kao datum, za PG i SQLite."""
+    if db.get_bind().dialect.name == "sqlite":
+        return func.date(col, func.printf("%+d days", days_expr))
+    return col + days_expr
+
+
+def _days_case(shifts: dict[date, int], default: int):
+    bumped = {d: n for d, n in shifts.items() if n != default}
+    if not bumped:
+        return literal(default)
+    return case(*[(Task.start_soll == d, n) for d, n in bumped.items()], else_=literal(default))
+
+
+def distinct_starts(db: Session, conds: list) -> list[date]:
+    return list(db.execute(select(Task.start_soll).where(*conds).distinct()).scalars())
+
+
+def preview_skip_window(
+    db: Session, project_id: int, f: TaskFilter, start: date, end: date, cal: WorkCalendar | None
+) -> list[dict]:
+    """dry_run: [{id, start/end prije i poslije}] bez upisa."""
+    q = filter_tasks(
+        select(Task.id, Task.start_soll, Task.end_soll).where(
+            Task.project_id == project_id, *overlap_conditions(start, end)
+        ),
+        f,
+    ).order_by(Task.id)
+    rows = db.execute(q).all()
+    if not rows:
+        return []
+    shift_days = (end - start).days + 1
+    shifts = shift_by_start(cal, sorted({r.start_soll for r in rows}), shift_days)
+    delta = np.array([shifts[r.start_soll] for r in rows], dtype="timedelta64[D]")
+    new_starts = to_dates(as_days(r.start_soll for r in rows) + delta)
+    new_ends = to_dates(as_days(r.end_soll for r in rows) + delta)
+    return [
+        {
+            "id": r.id,
+            "start_soll_before": r.start_soll,
+            "end_soll_before": r.end_soll,
+            "start_soll": ns,
+            "end_soll": ne,
+        }
+        for r, ns, ne in zip(rows, new_starts, new_ends)
+    ]
+
+
+def apply_skip_window(
+    db: Session, project_id: int, f: TaskFilter, start: date, end: date, cal: WorkCalendar | None
+) -> list[int]:
+    """Jedan UPDATE; vraća id-eve pomjerenih taskova (RETURNING gdje ga baza ima)."""
+    shift_days = (end - start).days + 1
+    conds = _scope(project_id, f, start, end)
+    shifts = shift_by_start(cal, distinct_starts(db, conds), shift_days)
+    if not shifts:
+        return []
+
+    days = _days_case(shifts, shift_days)
+    stmt = (
+        update(Task)
+        .where(*conds)
+        .values(
+            start_soll=_add_days(db, Task.start_soll, days),
+            end_soll=_add_days(db, Task.end_soll, days),
+            version=Task.version + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if db.get_bind().dialect.update_returning:
+        return sorted(db.execute(stmt.returning(Task.id)).scalars())
+
+    # baza bez UPDATE ... RETURNING: id-evi prije, pa isti UPDATE po id-u
+    ids = sorted(db.execute(select(Task.id).where(*conds)).scalars())
+    db.execute(
+        update(Task)
+        .where(Task.id.in_(ids))
+        .values(
+            start_soll=_add_days(db, Task.start_soll, days),
+            end_soll=_add_days(db, Task.end_soll, days),
+            version=Task.version + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return ids
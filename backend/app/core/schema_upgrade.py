@@ -0,0 +1,99 @@
+# app/core/schema_upgrade.py
+# Base.metadata.create_all() pravi samo NOVE tabele. Kolone dodane u postojeće
+# modele (i indeksi nad njima) dodaju se ovdje, idempotentno, kod starta.
+from sqlalchemy import inspect, text, select, update, bindparam, func
+from sqlalchemy.engine import Engine
+
+from app.core.natural_sort import natural_key
+from app.models.structure import Bauteil, Stiege, Ebene, Top
+from app.models.task import Task
+
+# (tabela, kolona, SQL tip)
+ADDED_COLUMNS = [
+    ("bauteile", "sort_key", "VARCHAR"),
+    ("stiegen", "sort_key", "VARCHAR"),
+    ("ebenen", "sort_key", "VARCHAR"),
+    ("tops", "sort_key", "VARCHAR"),
+    ("task_timeline_view", "gewerk_id", "INTEGER"),
+    ("tasks", "version", "INTEGER NOT NULL DEFAULT 1"),
+    ("task_timeline_view", "version", "INTEGER"),
+    ("scenario_task_overrides", "base_start_soll", "DATE"),
+    ("scenario_task_overrides", "base_end_soll", "DATE"),
+]
+
+
+def add_missing_columns(engine: Engine) -> list[str]:
+    insp = inspect(engine)
+    tables = set(insp.get_table_names())
+    added: list[str] = []
+    with engine.begin() as conn:
+        for table, column, ddl in ADDED_COLUMNS:
+            if table not in tables:
+                continue
+            existing = {c["name"] for c in insp.get_columns(table)}
+            if column in existing:
+                continue
+            conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN "{column}" {ddl}'))
+            added.append(f"{table}.{column}")
+    return added
+
+
+def ensure_indexes(engine: Engine) -> None:
+    for model in (Bauteil, Stiege, Ebene, Top):
+        for index in model.__table__.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def ensure_unique_task_index(engine: Engine) -> bool:
+    """
+    ux_tasks_project_top_step za postojeće baze. Ako već ima duplikata, indeks
+    se ne pravi (ništa se ne briše) – generate/sync i dalje filtriraju duplikate.
+    """
+    index = next(i for i in Task.__table__.indexes if i.name == "ux_tasks_project_top_step")
+    if index.name in {i["name"] for i in inspect(engine).get_indexes("tasks")}:
+        return True
+    with engine.connect() as conn:
+        dupes = conn.execute(
+            select(func.count()).select_from(
+                select(Task.project_id)
+                .group_by(Task.project_id, Task.top_id, Task.process_step_id)
+                .having(func.count() > 1)
+                .subquery()
+            )
+        ).scalar_one()
+    if dupes:
+        print(f"⚠️ {dupes} duplikata (project, top, step) u tasks – unique indeks nije kreiran")
+        return False
+    index.create(bind=engine, checkfirst=True)
+    return True
+
+
+def backfill_sort_keys(engine: Engine) -> int:
+    """Popuni sort_key tamo gdje je NULL (stari redovi prije ove kolone)."""
+    filled = 0
+    with engine.begin() as conn:
+        for model in (Bauteil, Stiege, Ebene, Top):
+            rows = conn.execute(
+                select(model.id, model.name).where(model.sort_key.is_(None), model.name.isnot(None))
+            ).all()
+            if rows:
+                t = model.__table__
+                conn.execute(
+                    update(t).where(t.c.id == bindparam("b_id")).values(sort_key=bindparam("b_key")),
+                    [{"b_id": r.id, "b_key": natural_key(r.name)} for r in rows],
+                )
+                filled += len(rows)
+    return filled
+
+
+def upgrade_schema(engine: Engine) -> bool:
+    """Vraća True ako je nešto promijenjeno (read-modele tada treba osvježiti)."""
+    added = add_missing_columns(engine)
+    ensure_indexes(engine)
+    ensure_unique_task_index(engine)
+    filled = backfill_sort_keys(engine)
+    if added:
+        print("✅ Dodane kolone:", ", ".join(added))
+    if filled:
+        print(f"✅ sort_key popunjen za {filled} čvorova strukture")
+    return bool(added or filled)
@@ -0,0 +1,208 @@
+# app/core/search.py
+"""
+Pretraga podstringa ("sadrži") koja može koristiti indeks:
+
+- Postgres: pg_trgm + GIN indeks nad kolonom → obični ILIKE '%x%' ide preko indeksa
+- SQLite:   FTS5 tabela s trigram tokenizerom (external content + trigeri),
+            uslov je  id IN (SELECT rowid FROM fts WHERE fts MATCH '"x"')
+- inače:    in-process n-gram indeks po projektu (za filtere taskova), ILIKE za ostalo
+
+Backend se bira jednom kod starta (ensure_search_indexes); sve ostalo ide
+kroz text_contains() / narrow_search().
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+
+from sqlalchemy import inspect, text, select, table, column, literal_column
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.revision import current_revision
+from app.models.task import Task
+from app.models.process import ProcessStep
+
+# (tabela, kolona) nad kojima postoji indeks za pretragu
+SEARCH_COLUMNS = [
+    ("process_steps", "activity"),
+    ("tasks", "beschreibung"),
+    ("protocol", "path"),
+    ("protocol", "user_agent"),
+]
+
+NGRAM = 3
+MAX_PROJECTS = 32
+
+_backend = "ngram"          # "pg_trgm" | "fts5" | "ngram"
+_fts_tables: set[tuple[str, str]] = set()
+
+
+def backend() -> str:
+    return _backend
+
+
+def _fts_name(tbl: str, col: str) -> str:
+    return f"fts_{tbl}_{col}"
+
+
+def _ensure_fts5(engine: Engine, tables: set[str]) -> None:
+    with engine.begin() as conn:
+        for tbl, col in SEARCH_COLUMNS:
+            if tbl not in tables:
+                continue
+            fts = _fts_name(tbl, col)
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :n"), {"n": fts}
+            ).first()
+            if not exists:
+                conn.execute(text(
+                    f"CREATE VIRTUAL TABLE {fts} USING fts5("
+                    f"{col}, content='{tbl}', content_rowid='id', tokenize='trigram')"
+                ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {tbl} BEGIN "
+                f"INSERT INTO {fts}(rowid, {col}) VALUES (new.id, new.{col}); END"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {tbl} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {col}) VALUES ('delete', old.id, old.{col}); END"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {col} ON {tbl} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {col}) VALUES ('delete', old.id, old.{col}); "
+                f"INSERT INTO {fts}(rowid, {col}) VALUES (new.id, new.{col}); END"
+            ))
+            if not exists:
+                # postojeći redovi (tabela je tek napravljena)
+                conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+            _fts_tables.add((tbl, col))
+
+
+def _ensure_pg_trgm(engine: Engine, tables: set[str]) -> None:
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for tbl, col in SEARCH_COLUMNS:
+            if tbl in tables:
+                conn.execute(text(
+                    f'CREATE INDEX IF NOT EXISTS ix_{tbl}_{col}_trgm '
+                    f'ON "{tbl}" USING gin ("{col}" gin_trgm_ops)'
+                ))
+
+
+def ensure_search_indexes(engine: Engine) -> str:
+    """Idempotentno; vraća izabrani backend. Greška → ostaje n-gram/ILIKE."""
+    global _backend
+    tables = set(inspect(engine).get_table_names())
+    try:
+        if engine.dialect.name == "postgresql":
+            _ensure_pg_trgm(engine, tables)
+            _backend = "pg_trgm"
+        elif engine.dialect.name == "sqlite":
+            _ensure_fts5(engine, tables)
+            _backend = "fts5"
+    except Exception as e:
+        print("⚠️ Indeks za pretragu nije dostupan, koristim n-gram/ILIKE:", e)
+        _fts_tables.clear()
+        _backend = "ngram"
+    return _backend
+
+
+# --- SQL uslov ----------------------------------------------------------------
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def text_contains(col, term: str):
+    """Uslov "kolona sadrži term" (bez obzira na velika/mala slova)."""
+    c = col.expression if hasattr(col, "expression") else col
+    key = (getattr(c.table, "name", None), c.name)
+    if _backend == "fts5" and key in _fts_tables and len(term) >= NGRAM:
+        fts = _fts_name(*key)
+        phrase = '"' + term.replace('"', '""') + '"'
+        pk = c.table.c.id
+        return pk.in_(
+            select(table(fts, column("rowid")).c.rowid)
+            .where(literal_column(fts).op("MATCH")(phrase))
+        )
+    # pg_trgm: GIN indeks pokriva ILIKE; inače obični full scan
+    return c.ilike(f"%{_escape_like(term)}%", escape="\\")
+
+
+# --- In-process n-gram indeks (kad baza nema ni pg_trgm ni FTS5) -------------------
+
+def _grams(s: str) -> set[str]:
+    return {s[i:i + NGRAM] for i in range(len(s) - NGRAM + 1)}
+
+
+class NgramIndex:
+    def __init__(self, items):
+        """items: (id, tekst)"""
+        self.texts: dict[int, str] = {}
+        self.postings: dict[str, set[int]] = {}
+        for i, s in items:
+            if not s:
+                continue
+            s = s.casefold()
+            self.texts[i] = s
+            for g in _grams(s):
+                self.postings.setdefault(g, set()).add(i)
+
+    def search(self, term: str) -> set[int]:
+        term = term.casefold()
+        grams = _grams(term)
+        if grams:
+            sets = sorted((self.postings.get(g, set()) for g in grams), key=len)
+            candidates = set.intersection(*sets) if sets[0] else set()
+        else:
+            candidates = self.texts.keys()
+        return {i for i in candidates if term in self.texts[i]}
+
+
+_lock = threading.Lock()
+_cache: "OrderedDict[int, tuple[int, dict[str, NgramIndex]]]" = OrderedDict()
+
+
+def project_ngram_indexes(db: Session, project_id: int) -> dict[str, NgramIndex]:
+    rev = current_revision(db, project_id)
+    with _lock:
+        hit = _cache.get(project_id)
+        if hit and hit[0] == rev:
+            _cache.move_to_end(project_id)
+            return hit[1]
+
+    rows = db.execute(
+        select(Task.id, ProcessStep.activity, Task.beschreibung)
+        .select_from(Task)
+        .outerjoin(ProcessStep, ProcessStep.id == Task.process_step_id)
+        .where(Task.project_id == project_id)
+    ).all()
+    indexes = {
+        "activity": NgramIndex((r[0], r[1]) for r in rows),
+        "beschreibung": NgramIndex((r[0], r[2]) for r in rows),
+    }
+    with _lock:
+        _cache[project_id] = (rev, indexes)
+        _cache.move_to_end(project_id)
+        while len(_cache) > MAX_PROJECTS:
+            _cache.popitem(last=False)
+    return indexes
+
+
+def narrow_search(db: Session, project_id: int, f):
+    """
+    Samo za n-gram backend: taskName/beschreibung iz TaskFilter-a → eksplicitni
+    ID-jevi iz indeksa. Kod pg_trgm/FTS5 filter ostaje SQL uslov.
+    """
+    if _backend != "ngram" or not (f.task_name or f.beschreibung):
+        return f
+    indexes = project_ngram_indexes(db, project_id)
+    ids = None
+    if f.task_name:
+        ids = indexes["activity"].search(f.task_name)
+    if f.beschreibung:
+        found = indexes["beschreibung"].search(f.beschreibung)
+        ids = found if ids is None else ids & found
+    if f.ids is not None:
+        ids &= set(f.ids)
+    return replace(f, task_name=None, beschreibung=None, ids=tuple(sorted(ids)))
@@ -0,0 +1,182 @@
+# app/core/snapshots.py
+"""
+Dnevni snimci statistike (project_stats_daily): jedan red po projekt × gewerk × dan
+sa stanjem statusa i Soll/Ist napretkom *tog* dana. /stats/history ih čita
+jednim range upitom – bez rekonstrukcije prošlosti iz današnjih IST datuma.
+
+Snimanje radi pozadinska nit u procesu (SnapshotScheduler), jednom dnevno u
+STATS_SNAPSHOT_AT (HH:MM, lokalno vrijeme, default 23:50); kod starta se snimi
+današnji dan ako ga još nema. Snimak je idempotentan (dan se prepisuje).
+STATS_SNAPSHOTS=0 isključuje nit (npr. za skripte).
+"""
+import os
+import threading
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select, delete, insert, func, case, literal
+from sqlalchemy.orm import Session
+
+from app.core.stats import status_class, gewerk_label
+from app.models.stats_snapshot import ProjectStatsDaily
+from app.models.task import Task
+from app.models.process import ProcessStep
+from app.models.gewerk import Gewerk
+
+NO_GEWERK = 0
+SERIES = ("total", "done", "in_progress", "offen", "soll_done")
+
+
+def _snapshot_select(day: date, project_ids: list[int] | None = None):
+    gid = func.coalesce(Gewerk.id, NO_GEWERK)
+    cls = status_class()
+    q = (
+        select(
+            Task.project_id,
+            literal(day, ProjectStatsDaily.day.type),
+            gid,
+            func.count(),
+            func.sum(case((cls == "done", 1), else_=0)),
+            func.sum(case((cls == "in_progress", 1), else_=0)),
+            func.sum(case((cls == "offen", 1), else_=0)),
+            func.sum(case((Task.end_soll <= day, 1), else_=0)),
+        )
+        .select_from(Task)
+        .outerjoin(ProcessStep, ProcessStep.id == Task.process_step_id)
+        .outerjoin(Gewerk, Gewerk.id == ProcessStep.gewerk_id)
+        .group_by(Task.project_id, gid)
+    )
+    if project_ids:
+        q = q.where(Task.project_id.in_(project_ids))
+    return q
+
+
+def take_snapshot(db: Session, day: date | None = None, project_ids: list[int] | None = None) -> None:
+    """Snimi (ili prepiši) dan `day` za sve ili zadane projekte; commit radi pozivatelj."""
+    day = day or date.today()
+    S = ProjectStatsDaily
+    q = delete(S).where(S.day == day)
+    if project_ids:
+        q = q.where(S.project_id.in_(project_ids))
+    db.execute(q)
+    db.execute(insert(S).from_select(
+        ["project_id", "day", "gewerk_id", "total", "done", "in_progress", "offen", "soll_done"],
+        _snapshot_select(day, project_ids),
+    ))
+
+
+def has_snapshot(db: Session, day: date) -> bool:
+    return db.execute(
+        select(ProjectStatsDaily.project_id).where(ProjectStatsDaily.day == day).limit(1)
+    ).first() is not None
+
+
+def history(
+    db: Session,
+    project_id: int,
+    start: date | None = None,
+    end: date | None = None,
+    gewerke: list[str] | None = None,
+) -> dict:
+    """Serije po danu (ukupno i po gewerku) iz jednog range upita."""
+    S = ProjectStatsDaily
+    label = gewerk_label().label("gewerk")
+    q = (
+        select(S.day, label, S.total, S.done, S.in_progress, S.offen, S.soll_done)
+        .select_from(S)
+        .outerjoin(Gewerk, Gewerk.id == S.gewerk_id)
+        .where(S.project_id == project_id)
+        .order_by(S.day)
+    )
+    if start:
+        q = q.where(S.day >= start)
+    if end:
+        q = q.where(S.day <= end)
+
+    wanted = set(gewerke or ())
+    days: list[date] = []
+    totals: dict[date, list[int]] = {}
+    by_gewerk: dict[str, dict[date, list[int]]] = {}
+    for day, g, *values in db.execute(q):
+        if wanted and g not in wanted:
+            continue
+        if day not in totals:
+            days.append(day)
+            totals[day] = [0] * len(SERIES)
+        per_day = by_gewerk.setdefault(g, {}).setdefault(day, [0] * len(SERIES))
+        for i, v in enumerate(values):
+            totals[day][i] += v
+            per_day[i] += v
+
+    def series(rows: dict[date, list[int]]) -> dict:
+        return {
+            name: [rows.get(d, [0] * len(SERIES))[i] for d in days]
+            for i, name in enumerate(SERIES)
+        }
+
+    out = {"labels": [d.isoformat() for d in days], **series(totals)}
+    out["percent_done"] = [round(d / t * 100, 2) if t else 0.0 for d, t in zip(out["done"], out["total"])]
+    out["percent_soll"] = [round(s / t * 100, 2) if t else 0.0 for s, t in zip(out["soll_done"], out["total"])]
+    out["by_gewerk"] = [
+        {"gewerk": g, **series(by_gewerk[g])}
+        for g in sorted(by_gewerk, key=str.lower)
+    ]
+    return out
+
+
+# --- Pozadinski raspored -----------------------------------------------------------
+
+def _parse_hhmm(value: str) -> tuple[int, int]:
+    try:
+        h, m = value.split(":")
+        return int(h) % 24, int(m) % 60
+    except ValueError:
+        return 23, 50
+
+
+class SnapshotScheduler:
+    """Jedna nit po procesu; više workera snima isti dan idempotentno."""
+
+    def __init__(self, session_factory, at: str | None = None):
+        self.session_factory = session_factory
+        self.at = _parse_hhmm(at or os.getenv("STATS_SNAPSHOT_AT", "23:50"))
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def next_run(self, now: datetime) -> datetime:
+        run = now.replace(hour=self.at[0], minute=self.at[1], second=0, microsecond=0)
+        return run if run > now else run + timedelta(days=1)
+
+    def run_once(self, only_if_missing: bool = False) -> None:
+        db = self.session_factory()
+        try:
+            today = date.today()
+            if only_if_missing and has_snapshot(db, today):
+                return
+            take_snapshot(db, today)
+            db.commit()
+            print(f"✅ Dnevni snimak statistike: {today}")
+        except Exception as e:
+            db.rollback()
+            print("⚠️ Greška pri dnevnom snimku statistike:", e)
+        finally:
+            db.close()
+
+    def _loop(self) -> None:
+        self.run_once(only_if_missing=True)
+        while not self._stop.is_set():
+            wait = (self.next_run(datetime.now()) - datetime.now()).total_seconds()
+            if self._stop.wait(max(wait, 1.0)):
+                break
+            self.run_once()
+
+    def start(self) -> None:
+        if os.getenv("STATS_SNAPSHOTS", "1") == "0" or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="stats-snapshots", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
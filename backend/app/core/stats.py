@@ -0,0 +1,170 @@
+# app/core/stats.py
+"""
+Agregacije za /stats, /task-stats i /progress-curve u SQL-u: klasifikacija
+statusa (CASE, uklj. "until" presjek), grupisanje po gewerku i sedmice
+idu u GROUP BY – iz baze dolaze samo agregirani redovi, ne taskovi.
+JSON oblik odgovora je isti kao ranije.
+"""
+from datetime import date
+
+from sqlalchemy import select, func, case, literal, and_, or_, extract
+from sqlalchemy.orm import Session
+
+from app.models.task import Task
+from app.models.process import ProcessStep
+from app.models.gewerk import Gewerk
+from app.core import scenarios
+
+DEFAULT_GEWERK = "Allgemein"
+
+
+def status_class(until: date | None = None, start_soll=Task.start_soll):
+    """
+    'done' | 'in_progress' | 'offen' po IST datumima; uz `until` se gleda stanje
+    na taj dan, a NULL znači da task u presjeku ne postoji (još nije počeo po planu).
+    `start_soll`: izraz za Soll start (npr. datum iz scenarija).
+    """
+    if until is None:
+        return case(
+            (Task.end_ist.isnot(None), literal("done")),
+            (Task.start_ist.isnot(None), literal("in_progress")),
+            else_=literal("offen"),
+        )
+    return case(
+        (and_(Task.end_ist.isnot(None), Task.end_ist <= until), literal("done")),
+        (
+            and_(
+                Task.start_ist.isnot(None), Task.start_ist <= until,
+                or_(Task.end_ist.is_(None), Task.end_ist > until),
+            ),
+            literal("in_progress"),
+        ),
+        (or_(start_soll.is_(None), start_soll <= until), literal("offen")),
+        else_=None,
+    )
+
+
+def gewerk_label():
+    # prazno/NULL ime (ili task bez gewerka) → "Allgemein"
+    return func.coalesce(func.nullif(func.trim(Gewerk.name), ""), literal(DEFAULT_GEWERK))
+
+
+def project_stats(
+    db: Session, project_id: int, until: date | None = None, scenario_id: int | None = None
+) -> dict:
+    gname = gewerk_label().label("gewerk")
+    start_soll = scenarios.effective_start() if scenario_id is not None else Task.start_soll
+    cls = status_class(until, start_soll).label("cls")
+    q = (
+        select(gname, cls, func.count().label("n"))
+        .select_from(Task)
+        .outerjoin(ProcessStep, ProcessStep.id == Task.process_step_id)
+        .outerjoin(Gewerk, Gewerk.id == ProcessStep.gewerk_id)
+        .where(Task.project_id == project_id)
+        .group_by(gname, cls)
+    )
+    if scenario_id is not None:
+        q = scenarios.overlay(q, scenario_id)
+    rows = db.execute(q).all()
+
+    totals = {"done": 0, "in_progress": 0, "offen": 0}
+    by_gewerk: dict[str, dict] = {}
+    for g, c, n in rows:
+        # i gewerke bez taskova u "until" rezu dobiju 0/0/0 zapis
+        entry = by_gewerk.setdefault(g, {"gewerk": g, "done": 0, "in_progress": 0, "offen": 0})
+        if c is None:
+            continue
+        entry[c] += n
+        totals[c] += n
+
+    total = sum(totals.values())
+    done = totals["done"]
+    return {
+        "total": total,
+        "done": done,
+        "in_progress": totals["in_progress"],
+        "offen": totals["offen"],
+        "percent_done": round((done / total) * 100, 2) if total else 0.0,
+        "by_gewerk": sorted(by_gewerk.values(), key=lambda r: r["gewerk"].lower()),
+    }
+
+
+def task_status_stats(db: Session, project_id: int) -> dict:
+    """Brojevi po koloni Task.status (done/in_progress/offen), ukupno i po gewerku."""
+    status_rows = db.execute(
+        select(Task.status, func.count())
+        .where(Task.project_id == project_id)
+        .group_by(Task.status)
+    ).all()
+    counts = {s: n for s, n in status_rows}
+    total = sum(counts.values())
+    done = counts.get("done", 0)
+
+    # samo taskovi s gewerkom; redoslijed gewerka = redoslijed prvog taska (kao ranije)
+    gewerk_rows = db.execute(
+        select(Gewerk.name, Task.status, func.count(), func.min(Task.id))
+        .select_from(Task)
+        .join(ProcessStep, ProcessStep.id == Task.process_step_id)
+        .join(Gewerk, Gewerk.id == ProcessStep.gewerk_id)
+        .where(Task.project_id == project_id)
+        .group_by(Gewerk.name, Task.status)
+    ).all()
+    first_id: dict = {}
+    gewerk_stats: dict = {}
+    for name, status, n, min_id in gewerk_rows:
+        first_id[name] = min(first_id.get(name, min_id), min_id)
+        stats = gewerk_stats.setdefault(name, {"done": 0, "in_progress": 0, "offen": 0})
+        if status in stats:
+            stats[status] += n
+
+    return {
+        "total": total,
+        "done": done,
+        "in_progress": counts.get("in_progress", 0),
+        "offen": counts.get("offen", 0),
+        "percent_done": round((done / total) * 100, 1) if total else 0,
+        "by_gewerk": [
+            {"gewerk": name, **gewerk_stats[name]}
+            for name in sorted(gewerk_stats, key=lambda n: first_id[n])
+        ],
+    }
+
+
+def _week_counts(db: Session, project_id: int, day_col, scenario_id: int | None = None) -> dict[str, int]:
+    """{"<isogodina>-KW<sedmica>": broj} za dan iz `day_col` (NULL se preskače)."""
+    base = select().select_from(Task).where(Task.project_id == project_id, day_col.isnot(None))
+    if scenario_id is not None:
+        base = scenarios.overlay(base, scenario_id)
+    out: dict[str, int] = {}
+    if db.get_bind().dialect.name == "postgresql":
+        year = extract("isoyear", day_col)
+        week = extract("week", day_col)
+        for y, w, n in db.execute(base.add_columns(year, week, func.count()).group_by(year, week)):
+            key = f"{int(y)}-KW{int(w)}"
+            out[key] = out.get(key, 0) + n
+        return out
+
+    # ostale baze: grupiši po danu u SQL-u, ISO sedmicu složi ovdje (par stotina redova)
+    for d, n in db.execute(base.add_columns(day_col, func.count()).group_by(day_col)):
+        if isinstance(d, str):
+            d = date.fromisoformat(d)
+        y, w, _ = d.isocalendar()
+        key = f"{y}-KW{w}"
+        out[key] = out.get(key, 0) + n
+    return out
+
+
+def progress_curve(db: Session, project_id: int, scenario_id: int | None = None) -> dict:
+    # Soll = planirano (start, inače kraj), Ist = stvarno (kraj, inače start)
+    if scenario_id is not None:
+        soll_day = func.coalesce(scenarios.effective_start(), scenarios.effective_end())
+    else:
+        soll_day = func.coalesce(Task.start_soll, Task.end_soll)
+    soll = _week_counts(db, project_id, soll_day, scenario_id)
+    ist = _week_counts(db, project_id, func.coalesce(Task.end_ist, Task.start_ist))
+    labels = sorted(set(soll) | set(ist))
+    return {
+        "labels": labels,
+        "soll": [soll.get(k, 0) for k in labels],
+        "ist": [ist.get(k, 0) for k in labels],
+    }
@@ -0,0 +1,127 @@
+# app/core/stats_sweep.py
+"""
+"Status na svaki dan" (S-kriva / burndown) u jednom vektorizovanom prolazu:
+isti rezultat kao /stats?until=<dan> za svaki dan (ili sedmicu) u rasponu,
+ali se datumi taskova učitaju jednom u NumPy nizove.
+
+Za presjek u (ordinal dana), po pravilima iz app/core/stats.status_class:
+  done(u)        = #(E <= u)
+  in_progress(u) = #(S <= u) - #(max(S, E) <= u)
+  offen(u)       = #(P <= u) - #(max(P, min(S, E)) <= u)
+gdje je E = end_ist, S = start_ist (NULL → +∞), P = start_soll (NULL → -∞).
+Svaki #(X <= u) je searchsorted nad sortiranim X – za sve dane odjednom.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.stats import gewerk_label
+from app.core import scenarios
+from app.models.task import Task
+from app.models.process import ProcessStep
+from app.models.gewerk import Gewerk
+
+INF = np.iinfo(np.int64).max // 2
+STEPS = {"day": 1, "week": 7}
+MAX_POINTS = 3660
+
+
+def _ordinals(values, missing: int) -> np.ndarray:
+    return np.fromiter(
+        (d.toordinal() if d else missing for d in values), dtype=np.int64, count=len(values)
+    )
+
+
+def _counts_le(keys: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """Za svaku tačku u: koliko ključeva je <= u."""
+    return np.searchsorted(np.sort(keys), points, side="right")
+
+
+def _sweep(P: np.ndarray, S: np.ndarray, E: np.ndarray, points: np.ndarray) -> dict[str, np.ndarray]:
+    done = _counts_le(E, points)
+    in_progress = _counts_le(S, points) - _counts_le(np.maximum(S, E), points)
+    offen = _counts_le(P, points) - _counts_le(np.maximum(P, np.minimum(S, E)), points)
+    return {"done": done, "in_progress": in_progress, "offen": offen}
+
+
+def load_dates(db: Session, project_id: int, scenario_id: int | None = None):
+    start_soll = scenarios.effective_start() if scenario_id is not None else Task.start_soll
+    q = (
+        select(gewerk_label(), start_soll, Task.start_ist, Task.end_ist)
+        .select_from(Task)
+        .outerjoin(ProcessStep, ProcessStep.id == Task.process_step_id)
+        .outerjoin(Gewerk, Gewerk.id == ProcessStep.gewerk_id)
+        .where(Task.project_id == project_id)
+    )
+    if scenario_id is not None:
+        q = scenarios.overlay(q, scenario_id)
+    rows = db.execute(q).all()
+    labels = [r[0] for r in rows]
+    P = _ordinals([r[1] for r in rows], -INF)
+    S = _ordinals([r[2] for r in rows], INF)
+    E = _ordinals([r[3] for r in rows], INF)
+    return labels, P, S, E
+
+
+def default_range(P: np.ndarray, S: np.ndarray, E: np.ndarray) -> tuple[date, date] | None:
+    """Od prvog do zadnjeg poznatog datuma (Soll start / Ist start / Ist kraj)."""
+    known = np.concatenate([P[P > -INF], S[S < INF], E[E < INF]])
+    if not known.size:
+        return None
+    return date.fromordinal(int(known.min())), date.fromordinal(int(known.max()))
+
+
+def stats_sweep(
+    db: Session,
+    project_id: int,
+    start: date | None = None,
+    end: date | None = None,
+    step: str = "day",
+    gewerke: list[str] | None = None,
+    scenario_id: int | None = None,
+) -> dict | None:
+    """Serije po danu/sedmici; None ako raspon ima više od MAX_POINTS tačaka."""
+    labels, P, S, E = load_dates(db, project_id, scenario_id)
+    if gewerke:
+        wanted = set(gewerke)
+        keep = np.array([g in wanted for g in labels], dtype=bool)
+        labels = [g for g in labels if g in wanted]
+        P, S, E = P[keep], S[keep], E[keep]
+
+    if start is None or end is None:
+        rng = default_range(P, S, E)
+        if rng is None:
+            return {"labels": [], "total": [], "done": [], "in_progress": [], "offen": [],
+                    "percent_done": [], "by_gewerk": []}
+        start = start or rng[0]
+        end = end or rng[1]
+
+    stride = STEPS.get(step, 1)
+    if step == "week":
+        start = start - timedelta(days=start.weekday())  # od ponedjeljka
+    points = np.arange(start.toordinal(), end.toordinal() + 1, stride, dtype=np.int64)
+    if points.size > MAX_POINTS:
+        return None
+
+    overall = _sweep(P, S, E, points)
+    total = overall["done"] + overall["in_progress"] + overall["offen"]
+
+    by_gewerk = []
+    if labels:
+        names, codes = np.unique(np.array(labels, dtype=object), return_inverse=True)
+        for i in sorted(range(len(names)), key=lambda k: names[k].lower()):
+            mask = codes == i
+            per = _sweep(P[mask], S[mask], E[mask], points)
+            by_gewerk.append({"gewerk": names[i], **{k: v.tolist() for k, v in per.items()}})
+
+    return {
+        "labels": [date.fromordinal(int(p)).isoformat() for p in points],
+        "total": total.tolist(),
+        **{k: v.tolist() for k, v in overall.items()},
+        "percent_done": np.where(
+            total > 0, np.round(overall["done"] * 100.0 / np.maximum(total, 1), 2), 0.0
+        ).tolist(),
+        "by_gewerk": by_gewerk,
+    }
@@ -0,0 +1,107 @@
+# app/core/step_templates.py
+"""
+Predložak process modela: sortirani koraci i njihov (start, end) pomak u
+radnim danima od baznog datuma TOP-a. Ovisi samo o koracima modela, pa se
+kompajlira jednom i kešira; TOP-ovi istog modela se onda planiraju jednim
+busday_offset pozivom nad matricom (TOP × korak).
+
+Keš je po model_id; zapis vrijedi dok su koraci isti (usporedba s koracima
+iz baze, pa i drugi workeri vide promjenu). Rute process modela ga još i
+eksplicitno poništavaju (invalidate).
+"""
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Iterable, NamedTuple, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.task_generation import StepRow, load_models
+from app.core.workdays import WorkCalendar, as_days, to_dates, step_offsets
+
+MAX_ENTRIES = 1024
+
+_lock = threading.Lock()
+_cache: "OrderedDict[int, StepTemplate]" = OrderedDict()
+
+
+class StepTemplate(NamedTuple):
+    model_id: int
+    steps: tuple[StepRow, ...]
+    start_offsets: np.ndarray
+    end_offsets: np.ndarray
+
+    @property
+    def span(self) -> int:
+        """Broj radnih dana od prvog početka do zadnjeg kraja."""
+        return int(self.end_offsets.max()) + 1 if len(self.steps) else 0
+
+
+def compile_template(model_id: int, steps: Sequence[StepRow]) -> StepTemplate:
+    start, end = step_offsets(
+        [s.duration_days or 1 for s in steps],
+        [s.parallel for s in steps],
+    )
+    return StepTemplate(model_id, tuple(steps), start, end)
+
+
+def template_for(model_id: int, steps: Sequence[StepRow]) -> StepTemplate:
+    steps = tuple(steps)
+    with _lock:
+        hit = _cache.get(model_id)
+        if hit is not None and hit.steps == steps:
+            _cache.move_to_end(model_id)
+            return hit
+    tpl = compile_template(model_id, steps)
+    with _lock:
+        _cache[model_id] = tpl
+        _cache.move_to_end(model_id)
+        while len(_cache) > MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return tpl
+
+
+def invalidate(model_id: int | None = None) -> None:
+    with _lock:
+        if model_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(model_id, None)
+
+
+def load_templates(db: Session, model_ids: Iterable[int]) -> tuple[dict[int, str], dict[int, StepTemplate]]:
+    """({model_id: ime}, {model_id: predložak}) – dva upita za sve modele."""
+    names, steps = load_models(db, model_ids)
+    return names, {m: template_for(m, steps[m]) for m in names}
+
+
+def plan_dates(
+    cal: WorkCalendar, tpl: StepTemplate, bases: Sequence[date]
+) -> tuple[list[list[date]], list[list[date]]]:
+    """(start_soll, end_soll) po TOP-u (red) i koraku (kolona) za bazne datume."""
+    if not bases or not tpl.steps:
+        return [[] for _ in bases], [[] for _ in bases]
+    b = as_days(bases)[:, None]
+    return (
+        to_dates(cal.offset(b, tpl.start_offsets[None, :])),
+        to_dates(cal.offset(b, tpl.end_offsets[None, :])),
+    )
+
+
+def plan_tops(
+    cal: WorkCalendar,
+    templates: dict[int, StepTemplate],
+    bases: dict[int, tuple[int, date]],
+) -> dict[int, tuple[list[date], list[date]]]:
+    """{top_id: (starts, ends)} za {top_id: (model_id, bazni datum)} – jedan poziv po modelu."""
+    by_model: dict[int, list[int]] = {}
+    for top_id, (model_id, _) in bases.items():
+        by_model.setdefault(model_id, []).append(top_id)
+
+    out: dict[int, tuple[list[date], list[date]]] = {}
+    for model_id, top_ids in by_model.items():
+        starts, ends = plan_dates(cal, templates[model_id], [bases[t][1] for t in top_ids])
+        for top_id, s, e in zip(top_ids, starts, ends):
+            out[top_id] = (s, e)
+    return out
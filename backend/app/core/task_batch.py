@@ -0,0 +1,93 @@
+# app/core/task_batch.py
+"""
+PATCH /projects/{id}/tasks/batch – više djelimičnih izmjena taskova
+(npr. Gantt drag više barova) u jednoj transakciji.
+
+Trenutno stanje svih taskova se čita jednim upitom (po CHUNK id-eva),
+izmjene se validiraju zajedno, a upis ide kao executemany UPDATE po PK –
+jedan statement po kombinaciji promijenjenih polja, ne po tasku. Stavke s
+"version" imaju version u WHERE-u, pa upis između provjere i UPDATE-a nije izgubljen.
+"""
+from typing import Iterable
+
+from sqlalchemy import select, update, bindparam
+from sqlalchemy.orm import Session
+
+from app.models.task import Task
+
+CHUNK = 500
+MAX_BATCH = 5000
+
+# polja koja batch smije mijenjati (kao TaskUpdate, bez project_id)
+FIELDS = (
+    "start_soll", "end_soll", "start_ist", "end_ist", "status",
+    "beschreibung", "top_id", "process_step_id", "sub_id",
+)
+
+
+def load_current(db: Session, project_id: int, task_ids: Iterable[int]) -> dict:
+    """{task_id: red s FIELDS i version} za taskove projekta."""
+    ids = sorted(set(task_ids))
+    cols = [Task.id, Task.version, *(getattr(Task, f) for f in FIELDS)]
+    out = {}
+    for i in range(0, len(ids), CHUNK):
+        rows = db.execute(
+            select(*cols).where(Task.project_id == project_id, Task.id.in_(ids[i:i + CHUNK]))
+        )
+        for r in rows:
+            out[r.id] = r
+    return out
+
+
+def soll_errors(current, updates: dict) -> list[str]:
+    """Provjere nad stanjem poslije izmjene (Soll start <= Soll kraj)."""
+    start = updates.get("start_soll", current.start_soll)
+    end = updates.get("end_soll", current.end_soll)
+    if start is not None and end is not None and end < start:
+        return ["Ende vor Start"]
+    return []
+
+
+def apply_changes(db: Session, changes: dict[int, dict], versions: dict[int, int] | None = None) -> list[int] | None:
+    """
+    {task_id: {polje: nova vrijednost}} → executemany UPDATE po grupi istih
+    polja. Vraća sortirane id-eve upisanih taskova.
+    Task s verzijom u `versions` upisuje se samo uz tu verziju (WHERE version = ...);
+    ako takav red nije pogođen (drugi upis u međuvremenu) → None, pozivatelj radi rollback.
+    """
+    versions = versions or {}
+    groups: dict[tuple, list[dict]] = {}
+    for tid, values in changes.items():
+        if not values:
+            continue
+        fields = tuple(sorted(values))
+        row = {"b_id": tid, **{f"b_{f}": values[f] for f in fields}}
+        checked = tid in versions
+        if checked:
+            row["b_version"] = versions[tid]
+        groups.setdefault((fields, checked), []).append(row)
+
+    T = Task.__table__
+    # bez pouzdanog rowcount-a za executemany (npr. psycopg2 batch) provjereni redovi idu pojedinačno
+    sane_rowcount = db.get_bind().dialect.supports_sane_multi_rowcount
+    for (fields, checked), rows in groups.items():
+        stmt = (
+            update(T)
+            .where(T.c.id == bindparam("b_id"))
+            .values({**{f: bindparam(f"b_{f}") for f in fields}, "version": T.c.version + 1})
+        )
+        if not checked:
+            for i in range(0, len(rows), CHUNK):
+                db.execute(stmt, rows[i:i + CHUNK])
+            continue
+        stmt = stmt.where(T.c.version == bindparam("b_version"))
+        if sane_rowcount:
+            for i in range(0, len(rows), CHUNK):
+                chunk = rows[i:i + CHUNK]
+                if db.execute(stmt, chunk).rowcount != len(chunk):
+                    return None
+        else:
+            for row in rows:
+                if db.execute(stmt, row).rowcount != 1:
+                    return None
+    return sorted(tid for tid, values in changes.items() if values)
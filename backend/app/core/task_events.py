@@ -0,0 +1,78 @@
+# app/core/task_events.py
+from collections import Counter
+from typing import Iterable
+
+from sqlalchemy import select, insert, delete
+from sqlalchemy.orm import Session
+
+from app.core.revision import bump_revision
+from app.core import timeline_view, counters
+from app.models.task import Task
+from app.models.task_change import TaskChange
+
+# Koliko revizija unazad se čuva u task_changes; stariji "since" → klijent radi puni reload
+CHANGE_LOG_KEEP = 2000
+
+
+def tasks_changed(
+    db: Session,
+    project_id: int | None,
+    task_ids: Iterable[int] = (),
+    before: Counter | None = None,
+) -> int:
+    """
+    Poziva se nakon svakog upisa koji mijenja taskove projekta (ili ono što
+    timeline o njima prikazuje), u istoj transakciji – prije commit-a.
+    Osvježava read-model i brojače statusa, povećava reviziju projekta i
+    upisuje dnevnik izmjena (task koji više ne postoji u projektu → tombstone).
+
+    `before`: counters.snapshot() uzet prije upisa – samo ako je upis već
+    otišao u bazu (npr. query.delete()); inače se uzima ovdje, prije flush-a.
+    """
+    ids = sorted({int(i) for i in task_ids if i is not None})
+    if before is None:
+        before = counters.snapshot(db, ids)
+    db.flush()
+    timeline_view.refresh_tasks(db, ids)
+    counters.apply_delta(db, before, counters.snapshot(db, ids))
+    rev = bump_revision(db, project_id)
+    if project_id is None or not ids:
+        return rev
+
+    alive: set[int] = set()
+    for i in range(0, len(ids), timeline_view.CHUNK):
+        chunk = ids[i:i + timeline_view.CHUNK]
+        alive.update(db.execute(
+            select(Task.id).where(Task.project_id == project_id, Task.id.in_(chunk))
+        ).scalars())
+
+    db.execute(insert(TaskChange), [
+        {"project_id": project_id, "revision": rev, "task_id": tid, "deleted": tid not in alive}
+        for tid in ids
+    ])
+    db.execute(delete(TaskChange).where(
+        TaskChange.project_id == project_id,
+        TaskChange.revision <= rev - CHANGE_LOG_KEEP,
+    ))
+    return rev
+
+
+def changes_since(db: Session, project_id: int, since: int) -> dict[int, bool]:
+    """{task_id: deleted} – zadnje stanje svakog taska promijenjenog nakon `since`."""
+    rows = db.execute(
+        select(TaskChange.task_id, TaskChange.deleted)
+        .where(TaskChange.project_id == project_id, TaskChange.revision > since)
+        .order_by(TaskChange.revision, TaskChange.id)
+    )
+    return {tid: deleted for tid, deleted in rows}
+
+
+def tasks_by_project(db: Session, task_ids: Iterable[int]) -> dict[int, list[int]]:
+    """{project_id: [task_id, ...]} – za promjene koje zahvataju više projekata."""
+    ids = list(task_ids)
+    out: dict[int, list[int]] = {}
+    for i in range(0, len(ids), timeline_view.CHUNK):
+        chunk = ids[i:i + timeline_view.CHUNK]
+        for tid, pid in db.execute(select(Task.id, Task.project_id).where(Task.id.in_(chunk))):
+            out.setdefault(pid, []).append(tid)
+    return out
@@ -0,0 +1,189 @@
+# app/core/task_generation.py
+"""
+Generisanje / sinhronizacija taskova iz process modela u nekoliko upita:
+hijerarhija TOP-ova (jedan JOIN), modeli i koraci (dva upita), postojeći
+taskovi (po CHUNK TOP-ova), planiranje u memoriji i upis u serijama.
+
+Duplikati (project_id, top_id, process_step_id) se odbacuju već kod
+planiranja; unique indeks ux_tasks_project_top_step ih hvata i kod
+istovremenih zahtjeva (INSERT ... ON CONFLICT DO NOTHING).
+"""
+from datetime import date
+from typing import Iterable, NamedTuple, Sequence
+
+from sqlalchemy import select, insert, update, delete, bindparam
+from sqlalchemy.orm import Session
+
+from app.models.structure import Top, Ebene, Stiege, Bauteil
+from app.models.process import ProcessModel, ProcessStep
+from app.models.task import Task
+
+CHUNK = 500
+
+
+class TopRow(NamedTuple):
+    id: int
+    name: str | None
+    ebene_id: int
+    ebene_name: str | None
+    stiege_id: int
+    stiege_name: str | None
+    bauteil_id: int
+    bauteil_name: str | None
+    model_id: int | None
+    model_source: str | None  # "top" | "ebene" | "stiege" | "bauteil"
+
+
+class StepRow(NamedTuple):
+    id: int
+    model_id: int
+    order: int | None
+    parallel: bool
+    duration_days: int | None
+    activity: str | None
+    gewerk_id: int | None
+
+
+class ExistingTask(NamedTuple):
+    id: int
+    top_id: int
+    process_step_id: int
+    start_soll: date | None
+    end_soll: date | None
+    start_ist: date | None
+
+
+def step_sort_key(step: StepRow):
+    # bez "order" → na kraj, pa po id-u
+    return (step.order if step.order is not None else 10**9, step.id)
+
+
+# --- Učitavanje ------------------------------------------------------------------
+
+def load_tops(db: Session, project_id: int, top_ids: Sequence[int] | None = None) -> list[TopRow]:
+    """TOP-ovi projekta s hijerarhijom i najbližim process modelom (Top→Ebene→Stiege→Bauteil)."""
+    q = (
+        select(
+            Top.id, Top.name, Top.process_model_id,
+            Ebene.id, Ebene.name, Ebene.process_model_id,
+            Stiege.id, Stiege.name, Stiege.process_model_id,
+            Bauteil.id, Bauteil.name, Bauteil.process_model_id,
+        )
+        .select_from(Top)
+        .join(Ebene, Ebene.id == Top.ebene_id)
+        .join(Stiege, Stiege.id == Ebene.stiege_id)
+        .join(Bauteil, Bauteil.id == Stiege.bauteil_id)
+        .where(Bauteil.project_id == project_id)
+        .order_by(Top.id)
+    )
+    if top_ids:
+        q = q.where(Top.id.in_(list(top_ids)))
+
+    out: list[TopRow] = []
+    for t_id, t_name, t_pm, e_id, e_name, e_pm, s_id, s_name, s_pm, b_id, b_name, b_pm in db.execute(q):
+        model_id, source = None, None
+        for pm, src in ((t_pm, "top"), (e_pm, "ebene"), (s_pm, "stiege"), (b_pm, "bauteil")):
+            if pm:
+                model_id, source = pm, src
+                break
+        out.append(TopRow(t_id, t_name, e_id, e_name, s_id, s_name, b_id, b_name, model_id, source))
+    return out
+
+
+def load_models(db: Session, model_ids: Iterable[int]) -> tuple[dict[int, str], dict[int, list[StepRow]]]:
+    """({model_id: ime}, {model_id: [koraci sortirani po order, id]})."""
+    ids = sorted({int(m) for m in model_ids if m})
+    if not ids:
+        return {}, {}
+    names = dict(db.execute(select(ProcessModel.id, ProcessModel.name).where(ProcessModel.id.in_(ids))).all())
+    steps: dict[int, list[StepRow]] = {m: [] for m in names}
+    rows = db.execute(
+        select(
+            ProcessStep.id, ProcessStep.model_id, ProcessStep.order, ProcessStep.parallel,
+            ProcessStep.duration_days, ProcessStep.activity, ProcessStep.gewerk_id,
+        )
+        .where(ProcessStep.model_id.in_(list(names)))
+    )
+    for sid, mid, order, parallel, duration, activity, gewerk_id in rows:
+        steps[mid].append(StepRow(sid, mid, order, bool(parallel), duration, activity, gewerk_id))
+    for m in steps:
+        steps[m].sort(key=step_sort_key)
+    return names, steps
+
+
+def load_existing(db: Session, project_id: int, top_ids: Sequence[int]) -> dict[int, list[ExistingTask]]:
+    """{top_id: [postojeći taskovi]} za zadane TOP-ove."""
+    ids = sorted(set(top_ids))
+    out: dict[int, list[ExistingTask]] = {}
+    for i in range(0, len(ids), CHUNK):
+        rows = db.execute(
+            select(Task.id, Task.top_id, Task.process_step_id, Task.start_soll, Task.end_soll, Task.start_ist)
+            .where(Task.project_id == project_id, Task.top_id.in_(ids[i:i + CHUNK]))
+            .order_by(Task.id)
+        )
+        for r in rows:
+            out.setdefault(r.top_id, []).append(ExistingTask(*r))
+    return out
+
+
+# --- Upis u serijama (datume planira app/core/step_templates.py) --------------------
+
+def new_task_row(project_id: int, top_id: int, step_id: int, start: date, end: date) -> dict:
+    return {
+        "project_id": project_id,
+        "top_id": top_id,
+        "process_step_id": step_id,
+        "start_soll": start,
+        "end_soll": end,
+        "status": "offen",
+    }
+
+
+def _insert_ignoring_duplicates(db: Session):
+    T = Task.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert(T)  # duplikati su već odbačeni kod planiranja
+    return dialect_insert(T).on_conflict_do_nothing()
+
+
+def insert_tasks(db: Session, rows: list[dict]) -> dict[tuple[int, int], int]:
+    """Upiše nove taskove; vraća {(top_id, process_step_id): task_id} stvarno upisanih."""
+    T = Task.__table__
+    stmt = _insert_ignoring_duplicates(db).returning(T.c.id, T.c.top_id, T.c.process_step_id)
+    created: dict[tuple[int, int], int] = {}
+    for i in range(0, len(rows), CHUNK):
+        for tid, top_id, step_id in db.execute(stmt, rows[i:i + CHUNK]):
+            created[(top_id, step_id)] = tid
+    return created
+
+
+def update_soll_dates(db: Session, rows: list[dict]) -> None:
+    """rows: [{"b_id", "b_start", "b_end"}] – jedan executemany UPDATE."""
+    if not rows:
+        return
+    T = Task.__table__
+    db.execute(
+        update(T)
+        .where(T.c.id == bindparam("b_id"))
+        .values(start_soll=bindparam("b_start"), end_soll=bindparam("b_end"), version=T.c.version + 1),
+        rows,
+    )
+
+
+def delete_tasks(db: Session, task_ids: Sequence[int]) -> None:
+    ids = list(task_ids)
+    for i in range(0, len(ids), CHUNK):
+        db.execute(delete(Task.__table__).where(Task.__table__.c.id.in_(ids[i:i + CHUNK])))
+
+
+def load_tasks(db: Session, task_ids: Iterable[int]) -> list[Task]:
+    ids = sorted(set(task_ids))
+    out: list[Task] = []
+    for i in range(0, len(ids), CHUNK):
+        out.extend(db.query(Task).filter(Task.id.in_(ids[i:i + CHUNK])).order_by(Task.id).all())
+    return out
@@ -0,0 +1,252 @@
+# app/core/timeline.py
+from datetime import date
+from typing import Iterable, Iterator
+
+import orjson
+from sqlalchemy import select, func, case, cast, type_coerce, literal_column, and_, or_, Date, DateTime
+
+from app.core.filters import TaskFilter, apply_joins, filter_tasks, JOIN_ORDER
+from app.core.timeline_view import source_select
+from app.core import scenarios
+from app.models.task import Task
+from app.models.structure import Top, Ebene, Stiege, Bauteil
+from app.models.gewerk import Gewerk
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Redoslijed kao na gradilištu: Bauteil → Stiege → Ebene → Top (bez čvora na kraj),
+# po prirodnom ključu (sort_key) – "Top 2" prije "Top 10"
+TIMELINE_ORDER = (
+    Bauteil.sort_key.is_(None), Bauteil.sort_key,
+    Stiege.sort_key.is_(None), Stiege.sort_key,
+    Ebene.sort_key.is_(None), Ebene.sort_key,
+    Top.sort_key.is_(None), Top.sort_key,
+    Task.id,
+)
+
+
+def timeline_row(t: Task) -> dict:
+    """Task (s učitanim top/ebene/stiege/bauteil/step/sub) → dict u obliku TimelineTask."""
+    top = t.top
+    ebene = top.ebene if top else None
+    stiege = ebene.stiege if ebene else None
+    bauteil = stiege.bauteil if stiege else None
+
+    step = t.process_step
+    model = step.model if step else None
+    gewerk_obj = step.gewerk if step else None
+
+    sub_user = t.sub if t.sub_id else None
+
+    return {
+        "id": t.id,
+        "task": step.activity if step else None,
+        "wohnung": (top.name if (top and top.name) else (f"Top-{top.id}" if top else None)),
+        "start_soll": t.start_soll,
+        "end_soll": t.end_soll,
+        "start_ist": t.start_ist,
+        "end_ist": t.end_ist,
+        "farbe": getattr(gewerk_obj, "color", "#cccccc"),
+        "gewerk_name": getattr(gewerk_obj, "name", "Unbekannt"),
+        "top": top.name if top else None,
+        "ebene": ebene.name if ebene else None,
+        "stiege": stiege.name if stiege else None,
+        "bauteil": bauteil.name if bauteil else None,
+        "process_step_id": step.id if step else None,
+        "process_model": (model.name if model else None),
+        "beschreibung": t.beschreibung,
+        "sub_id": sub_user.id if sub_user else None,
+        "sub_name": sub_user.name if sub_user else None,
+        "top_id": t.top_id,
+        "project_id": t.project_id,
+        "version": t.version,
+    }
+
+
+def wants_ndjson(fmt: str | None, accept: str | None) -> bool:
+    if fmt:
+        return fmt.lower() == "ndjson"
+    return NDJSON_MEDIA_TYPE in (accept or "")
+
+
+def ndjson_chunks(rows: Iterable[dict], batch: int = 1000) -> Iterator[bytes]:
+    """Jedan JSON objekt po liniji; šalje se u paketima od `batch` linija."""
+    buf: list[bytes] = []
+    for row in rows:
+        buf.append(orjson.dumps(row))
+        if len(buf) >= batch:
+            yield b"\n".join(buf) + b"\n"
+            buf.clear()
+    if buf:
+        yield b"\n".join(buf) + b"\n"
+
+
+# --- Kolonski (columnar) format -------------------------------------------
+# Jedan niz po polju; stringovi koji se stalno ponavljaju idu u rječnik,
+# a red pokazuje na njih cijelim brojem (indeks u dicts[<polje>]).
+
+TIMELINE_FIELDS = (
+    "id", "task", "wohnung", "start_soll", "end_soll", "start_ist", "end_ist",
+    "farbe", "gewerk_name", "top", "ebene", "stiege", "bauteil",
+    "process_step_id", "process_model", "beschreibung", "sub_id", "sub_name",
+    "top_id", "project_id", "version",
+)
+
+DICT_FIELDS = (
+    "task", "farbe", "gewerk_name", "ebene", "stiege", "bauteil",
+    "process_model", "sub_name",
+)
+
+
+def columnar_payload(rows: Iterable[dict]) -> dict:
+    columns: dict[str, list] = {f: [] for f in TIMELINE_FIELDS}
+    dicts: dict[str, list] = {f: [] for f in DICT_FIELDS}
+    codes: dict[str, dict] = {f: {} for f in DICT_FIELDS}
+
+    count = 0
+    for row in rows:
+        count += 1
+        for f in TIMELINE_FIELDS:
+            v = row[f]
+            if v is not None and f in codes:
+                code = codes[f].get(v)
+                if code is None:
+                    code = codes[f][v] = len(dicts[f])
+                    dicts[f].append(v)
+                v = code
+            columns[f].append(v)
+
+    return {
+        "layout": "columnar",
+        "count": count,
+        "fields": list(TIMELINE_FIELDS),
+        "encoded": list(DICT_FIELDS),
+        "columns": columns,
+        "dicts": dicts,
+    }
+
+
+# --- Core (bez ORM-a) ------------------------------------------------------
+
+def core_select(project_id: int, f: TaskFilter | None = None, scenario_id: int | None = None):
+    """
+    Jedan SELECT tačno onih kolona koje trebaju TimelineTask-u; redovi se
+    čitaju kao tuple-i (view_row radi i nad njima) i idu direktno u orjson.
+    source_select() već ima sve joinove, filteri dodaju samo WHERE.
+    Uz `scenario_id` Soll datumi (i filteri nad njima) dolaze iz scenarija.
+    """
+    if scenario_id is not None:
+        q = scenarios.overlay(
+            source_select(scenarios.effective_start(), scenarios.effective_end()), scenario_id
+        ).where(Task.project_id == project_id)
+        if f is not None:
+            q = scenarios.filter_scenario(q, f, have=JOIN_ORDER)
+        return q.order_by(*TIMELINE_ORDER)
+
+    q = source_select().where(Task.project_id == project_id)
+    if f is not None:
+        q = filter_tasks(q, f, have=JOIN_ORDER)
+    return q.order_by(*TIMELINE_ORDER)
+
+
+# --- Level of detail (zoom out) -------------------------------------------
+# Umjesto jednog bara po tasku: jedan bar po (ebene ili top, gewerk, sedmica/mjesec).
+
+LOD_BUCKETS = ("week", "month")
+LOD_LEVELS = ("ebene", "top")
+
+
+def lod_bucket_sql(day, lod: str, dialect: str):
+    """Bucket dana: ponedjeljak sedmice / prvi dan mjeseca, za PG i SQLite."""
+    if dialect == "sqlite":
+        if lod == "month":
+            return type_coerce(func.date(day, "start of month"), Date)
+        # 'weekday 1' ide naprijed na ponedjeljak → prvo 6 dana nazad
+        return type_coerce(func.date(day, "-6 days", "weekday 1"), Date)
+    # jedinica kao literal: isti izraz u SELECT-u i GROUP BY-u i uz server-side bind parametre
+    unit = literal_column("'month'" if lod == "month" else "'week'")
+    return cast(func.date_trunc(unit, cast(day, DateTime)), Date)
+
+
+def lod_select(
+    project_id: int,
+    f: TaskFilter | None = None,
+    level: str = "ebene",
+    scenario_id: int | None = None,
+    lod: str = "week",
+    dialect: str = "postgresql",
+    today: date | None = None,
+):
+    """
+    GROUP BY (ebene ili top, gewerk, sedmica/mjesec početka Soll): min start,
+    max end, broj taskova, gotovi i kasne po baru. Redoslijed kao na timeline-u.
+    """
+    today = today or date.today()
+    node = Top if level == "top" else Ebene
+    have = ("top", "ebene", "stiege", "bauteil", "step", "gewerk")
+    if scenario_id is not None:
+        start_soll, end_soll = scenarios.effective_start(), scenarios.effective_end()
+    else:
+        start_soll, end_soll = Task.start_soll, Task.end_soll
+    bucket = lod_bucket_sql(func.coalesce(start_soll, end_soll), lod, dialect)
+    delayed = or_(
+        and_(Task.end_ist.is_(None), end_soll < today),
+        Task.end_ist > end_soll,
+    )
+    structure = [
+        Bauteil.sort_key.is_(None), Bauteil.sort_key,
+        Stiege.sort_key.is_(None), Stiege.sort_key,
+        Ebene.sort_key.is_(None), Ebene.sort_key,
+    ]
+    if level == "top":
+        structure += [Top.sort_key.is_(None), Top.sort_key]
+    gewerk = func.coalesce(Gewerk.name, "Unbekannt")
+    keys = [
+        node.id, node.name, Bauteil.name, Stiege.name, Gewerk.id, Gewerk.name, Gewerk.color,
+        Bauteil.sort_key, Stiege.sort_key, Ebene.sort_key, *([Top.sort_key] if level == "top" else []),
+        bucket,
+    ]
+
+    q = apply_joins(
+        select(
+            node.id.label("node_id"), node.name.label("node_name"),
+            Bauteil.name.label("bauteil"), Stiege.name.label("stiege"),
+            Gewerk.id.label("gewerk_id"), gewerk.label("gewerk_name"), Gewerk.color.label("gewerk_color"),
+            bucket.label("bucket"),
+            func.min(start_soll).label("start"),
+            func.max(end_soll).label("end"),
+            func.count().label("count"),
+            func.count(Task.end_ist).label("done"),
+            func.sum(case((delayed, 1), else_=0)).label("delayed"),
+        ).select_from(Task),
+        have,
+    ).where(Task.project_id == project_id)
+    if scenario_id is not None:
+        q = scenarios.overlay(q, scenario_id)
+        if f is not None:
+            q = scenarios.filter_scenario(q, f, have=have)
+    elif f is not None:
+        q = filter_tasks(q, f, have=have)
+    return q.group_by(*keys).order_by(*structure, node.id, gewerk, bucket)
+
+
+def lod_bars(rows) -> list[dict]:
+    """Redovi iz lod_select → barovi; taskovi bez Soll datuma (bucket NULL) nemaju bar."""
+    return [
+        {
+            "group_id": r.node_id,
+            "group": r.node_name,
+            "bauteil": r.bauteil,
+            "stiege": r.stiege,
+            "gewerk_name": r.gewerk_name,
+            "farbe": r.gewerk_color if r.gewerk_id is not None else "#cccccc",
+            "bucket": r.bucket,
+            "start": r.start,
+            "end": r.end,
+            "count": r.count,
+            "done": r.done,
+            "delayed": int(r.delayed or 0),
+        }
+        for r in rows
+        if r.bucket is not None
+    ]
@@ -0,0 +1,160 @@
+# app/core/timeline_view.py
+from typing import Iterable
+
+from sqlalchemy import select, insert, delete, case, cast, literal, and_, String
+from sqlalchemy.orm import Session
+
+from app.models.task import Task
+from app.models.structure import Top, Ebene, Stiege, Bauteil
+from app.models.process import ProcessStep, ProcessModel
+from app.models.gewerk import Gewerk
+from app.models.user import User
+from app.models.timeline_view import TaskTimelineRow
+from app.core.filters import TaskFilter, apply_joins, JOIN_ORDER, VIEW_FILTER_COLUMNS
+
+CHUNK = 500  # broj ID-jeva po IN (...) – ispod limita parametara na SQLite-u
+
+
+def _sort_key(key_col):
+    # "1" = nema čvora → na kraj; inače "0" + prirodni ključ (Top 2 prije Top 10)
+    return case((key_col.is_(None), literal("1")), else_=literal("0") + key_col)
+
+
+def source_select(start_soll=Task.start_soll, end_soll=Task.end_soll):
+    """
+    Isti oblik reda kao timeline_row(), ali kao jedan Core SELECT
+    (outer join kroz cijelu hijerarhiju, kao ORM verzija). Soll kolone
+    se mogu zamijeniti izrazom (datumi scenarija, app/core/scenarios.py).
+    """
+    stmt = select(
+        Task.id.label("task_id"),
+        Task.project_id,
+        Task.top_id,
+        ProcessStep.id.label("process_step_id"),
+        User.id.label("sub_id"),
+        Gewerk.id.label("gewerk_id"),
+        Task.version,
+        start_soll.label("start_soll"),
+        end_soll.label("end_soll"),
+        Task.start_ist,
+        Task.end_ist,
+        ProcessStep.activity.label("task"),
+        case(
+            (Top.id.is_(None), None),
+            (and_(Top.name.isnot(None), Top.name != ""), Top.name),
+            else_=literal("Top-") + cast(Top.id, String),
+        ).label("wohnung"),
+        case((Gewerk.id.is_(None), literal("#cccccc")), else_=Gewerk.color).label("farbe"),
+        case((Gewerk.id.is_(None), literal("Unbekannt")), else_=Gewerk.name).label("gewerk_name"),
+        Top.name.label("top"),
+        Ebene.name.label("ebene"),
+        Stiege.name.label("stiege"),
+        Bauteil.name.label("bauteil"),
+        ProcessModel.name.label("process_model"),
+        Task.beschreibung,
+        User.name.label("sub_name"),
+        _sort_key(Bauteil.sort_key).label("bauteil_key"),
+        _sort_key(Stiege.sort_key).label("stiege_key"),
+        _sort_key(Ebene.sort_key).label("ebene_key"),
+        _sort_key(Top.sort_key).label("top_key"),
+    ).select_from(Task)
+    return apply_joins(stmt, JOIN_ORDER)
+
+
+VIEW_COLUMNS = [c.name for c in TaskTimelineRow.__table__.columns]
+
+
+def _insert_from(db: Session, *where) -> None:
+    src = source_select().where(*where)
+    db.execute(insert(TaskTimelineRow).from_select(VIEW_COLUMNS, src))
+
+
+def refresh_tasks(db: Session, task_ids: Iterable[int]) -> None:
+    """
+    Ponovo izgradi redove za zadane taskove. Obrisani taskovi nestaju iz
+    read-modela, postojeći se upisuju iznova – isti poziv za insert/update/delete.
+    """
+    ids = sorted({int(i) for i in task_ids if i is not None})
+    for i in range(0, len(ids), CHUNK):
+        chunk = ids[i:i + CHUNK]
+        db.execute(delete(TaskTimelineRow).where(TaskTimelineRow.task_id.in_(chunk)))
+        _insert_from(db, Task.id.in_(chunk))
+
+
+def refresh_project(db: Session, project_id: int) -> None:
+    db.execute(delete(TaskTimelineRow).where(TaskTimelineRow.project_id == project_id))
+    _insert_from(db, Task.project_id == project_id)
+
+
+def rebuild_all(db: Session) -> None:
+    db.execute(delete(TaskTimelineRow))
+    _insert_from(db)
+
+
+# --- ID-jevi taskova pogođenih promjenom strukture / modela / sub-a ----------
+
+def task_ids_under(db: Session, model, obj_id: int) -> list[int]:
+    q = select(Task.id).join(Top, Top.id == Task.top_id)
+    if model is Top:
+        q = q.where(Top.id == obj_id)
+    else:
+        q = q.join(Ebene, Ebene.id == Top.ebene_id)
+        if model is Ebene:
+            q = q.where(Ebene.id == obj_id)
+        else:
+            q = q.join(Stiege, Stiege.id == Ebene.stiege_id)
+            if model is Stiege:
+                q = q.where(Stiege.id == obj_id)
+            else:
+                q = q.where(Stiege.bauteil_id == obj_id)
+    return list(db.execute(q).scalars())
+
+
+def task_ids_using_model(db: Session, model_id: int) -> list[int]:
+    q = (
+        select(Task.id)
+        .join(ProcessStep, ProcessStep.id == Task.process_step_id)
+        .where(ProcessStep.model_id == model_id)
+    )
+    return list(db.execute(q).scalars())
+
+
+def task_ids_with_sub(db: Session, user_id: int) -> list[int]:
+    return list(db.execute(select(Task.id).where(Task.sub_id == user_id)).scalars())
+
+
+# --- Čitanje ---------------------------------------------------------------
+
+def view_row(r: TaskTimelineRow) -> dict:
+    return {
+        "id": r.task_id,
+        "task": r.task,
+        "wohnung": r.wohnung,
+        "start_soll": r.start_soll,
+        "end_soll": r.end_soll,
+        "start_ist": r.start_ist,
+        "end_ist": r.end_ist,
+        "farbe": r.farbe,
+        "gewerk_name": r.gewerk_name,
+        "top": r.top,
+        "ebene": r.ebene,
+        "stiege": r.stiege,
+        "bauteil": r.bauteil,
+        "process_step_id": r.process_step_id,
+        "process_model": r.process_model,
+        "beschreibung": r.beschreibung,
+        "sub_id": r.sub_id,
+        "sub_name": r.sub_name,
+        "top_id": r.top_id,
+        "project_id": r.project_id,
+        "version": r.version,
+    }
+
+
+def view_query(db: Session, project_id: int, f: TaskFilter | None = None):
+    """Isti filteri kao _timeline_query u routes/task.py, ali nad read-modelom (bez joinova)."""
+    V = TaskTimelineRow
+    q = db.query(V).filter(V.project_id == project_id)
+    if f is not None:
+        q = q.filter(*f.where(VIEW_FILTER_COLUMNS))
+    return q.order_by(V.bauteil_key, V.stiege_key, V.ebene_key, V.top_key, V.task_id)
@@ -0,0 +1,105 @@
+# app/core/workdays.py
+"""
+Kalendar radnih dana: pon–pet, minus neradni dani projekta (project_holidays).
+
+Računanje ide nad nizovima datuma preko NumPy busday_offset / busday_count,
+a kalendar (sedmična maska + sortirani neradni dani) se gradi jednom po
+skupu praznika i kešira – jedan mali upit po zahtjevu, bez petlji po danu.
+
+Pravila kao ranije u routes/task.py i routes/generate_tasks.py:
+  next_workday(d)        → d ili prvi sljedeći radni dan
+  add_workdays(s, n)     → zadnji radni dan intervala od n radnih dana (s je 1.)
+  step_offsets(...)      → početak/kraj svakog koraka u radnim danima od baze
+                           (kešira se po modelu u app/core/step_templates.py)
+"""
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Iterable, Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.holiday import ProjectHoliday
+
+WEEKMASK = "1111100"  # pon..ned
+MAX_ENTRIES = 256
+
+_lock = threading.Lock()
+_cache: "OrderedDict[tuple, WorkCalendar]" = OrderedDict()
+
+
+def as_days(values: Iterable[date]) -> np.ndarray:
+    return np.array(list(values), dtype="datetime64[D]")
+
+
+def to_dates(days: np.ndarray) -> list[date]:
+    return days.astype("datetime64[D]").astype(object).tolist()
+
+
+class WorkCalendar:
+    def __init__(self, closures: Sequence[tuple[date, date]] = ()):
+        self.closures = tuple(closures)
+        ranges = [
+            np.arange(np.datetime64(s, "D"), np.datetime64(e, "D") + 1)
+            for s, e in self.closures
+        ]
+        self.holidays = np.unique(np.concatenate(ranges)) if ranges else as_days(())
+        self.cal = np.busdaycalendar(weekmask=WEEKMASK, holidays=self.holidays)
+
+    # --- nizovi -------------------------------------------------------------
+    def is_workday(self, days: np.ndarray) -> np.ndarray:
+        return np.is_busday(days, busdaycal=self.cal)
+
+    def roll_forward(self, days: np.ndarray) -> np.ndarray:
+        return np.busday_offset(days, 0, roll="forward", busdaycal=self.cal)
+
+    def offset(self, days: np.ndarray, n) -> np.ndarray:
+        """n radnih dana od (na radni dan pomaknutog) datuma; n može biti niz."""
+        return np.busday_offset(days, n, roll="forward", busdaycal=self.cal)
+
+    def count(self, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+        """Broj radnih dana u inkluzivnom rasponu start..end."""
+        return np.busday_count(start, np.asarray(end, dtype="datetime64[D]") + 1, busdaycal=self.cal)
+
+    # --- pojedinačni datumi --------------------------------------------------
+    def next_workday(self, d: date) -> date:
+        return self.roll_forward(np.datetime64(d, "D")).astype(object)
+
+    def add_workdays(self, start: date, days: int) -> date:
+        return self.offset(np.datetime64(start, "D"), max(1, days) - 1).astype(object)
+
+
+def step_offsets(durations: Sequence[int], parallel: Sequence[bool]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Početak i kraj koraka u radnim danima od baznog datuma. Paralelni korak ne
+    pomiče sljedeći; ostali ga guraju za svoje trajanje (min. 1 dan).
+    """
+    dur = np.maximum(np.asarray(durations, dtype=np.int64), 1)
+    advance = np.where(np.asarray(parallel, dtype=bool), 0, dur)
+    start = np.concatenate(([0], np.cumsum(advance)[:-1])) if len(dur) else dur
+    return start, start + dur - 1
+
+
+def calendar_for(closures: Sequence[tuple[date, date]]) -> WorkCalendar:
+    key = tuple(closures)
+    with _lock:
+        hit = _cache.get(key)
+        if hit is not None:
+            _cache.move_to_end(key)
+            return hit
+    cal = WorkCalendar(key)
+    with _lock:
+        _cache[key] = cal
+        while len(_cache) > MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return cal
+
+
+def project_calendar(db: Session, project_id: int) -> WorkCalendar:
+    H = ProjectHoliday
+    rows = db.execute(
+        select(H.start, H.end).where(H.project_id == project_id).order_by(H.start, H.end)
+    ).all()
+    return calendar_for([(s, e) for s, e in rows])
@@ -1,10 +1,13 @@
 from sqlalchemy.orm import Session
+from app.core.revision import bump_revision, project_id_of_structure
 from app.models.structure import Bauteil, Stiege, Ebene, Top
 from app.schemas.structure import BauteilCreate, StiegeCreate, EbeneCreate, TopCreate
 
 def create_bauteil(db: Session, data: BauteilCreate):
     obj = Bauteil(**data.dict())
     db.add(obj)
+    db.flush()
+    bump_revision(db, obj.project_id)
     db.commit()
     db.refresh(obj)
     return obj
@@ -12,6 +15,8 @@ def create_bauteil(db: Session, data: BauteilCreate):
 def create_stiege(db: Session, data: StiegeCreate):
     obj = Stiege(**data.dict())
     db.add(obj)
+    db.flush()
+    bump_revision(db, project_id_of_structure(db, Stiege, obj.id))
     db.commit()
     db.refresh(obj)
     return obj
@@ -19,6 +24,8 @@ def create_stiege(db: Session, data: StiegeCreate):
 def create_ebene(db: Session, data: EbeneCreate):
     obj = Ebene(**data.dict())
     db.add(obj)
+    db.flush()
+    bump_revision(db, project_id_of_structure(db, Ebene, obj.id))
     db.commit()
     db.refresh(obj)
     return obj
@@ -26,6 +33,8 @@ def create_ebene(db: Session, data: EbeneCreate):
 def create_top(db: Session, data: TopCreate):
     obj = Top(**data.dict())
     db.add(obj)
+    db.flush()
+    bump_revision(db, project_id_of_structure(db, Top, obj.id))
     db.commit()
     db.refresh(obj)
     return obj
@@ -36,12 +45,13 @@ def get_project_structure(db: Session, project_id: int):
 def create_bauteil_for_project(db: Session, project_id: int, data: BauteilCreate):
     bauteil = Bauteil(name=data.name, project_id=project_id)
     db.add(bauteil)
+    bump_revision(db, project_id)
     db.commit()
     db.refresh(bauteil)
     return bauteil
 
 def get_full_structure(db: Session, project_id: int):
-    bauteile = db.query(Bauteil).filter(Bauteil.project_id == project_id).all()
+    bauteile = db.query(Bauteil).filter(Bauteil.project_id == project_id).order_by(Bauteil.sort_key, Bauteil.id).all()
     result = []
 
     for b in bauteile:
@@ -52,7 +62,7 @@ def get_full_structure(db: Session, project_id: int):
             "stiegen": []
         }
 
-        stiegen = db.query(Stiege).filter(Stiege.bauteil_id == b.id).all()
+        stiegen = db.query(Stiege).filter(Stiege.bauteil_id == b.id).order_by(Stiege.sort_key, Stiege.id).all()
         for s in stiegen:
             s_data = {
                 "id": s.id,
@@ -61,7 +71,7 @@ def get_full_structure(db: Session, project_id: int):
                 "ebenen": []
             }
 
-            ebenen = db.query(Ebene).filter(Ebene.stiege_id == s.id).all()
+            ebenen = db.query(Ebene).filter(Ebene.stiege_id == s.id).order_by(Ebene.sort_key, Ebene.id).all()
             for e in ebenen:
                 e_data = {
                     "id": e.id,
@@ -70,7 +80,7 @@ def get_full_structure(db: Session, project_id: int):
                     "tops": []
                 }
 
-                tops = db.query(Top).filter(Top.ebene_id == e.id).all()
+                tops = db.query(Top).filter(Top.ebene_id == e.id).order_by(Top.sort_key, Top.id).all()
                 for t in tops:
                     t_data = {
                         "id": t.id,
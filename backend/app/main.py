@@ -1,4 +1,5 @@
 # app/main.py
+from contextlib import asynccontextmanager
 from pathlib import Path
 import os
 
@@ -17,6 +18,20 @@ from app import models  # Ovaj import mora povući sve modele da bi Base znao za
 # --- Kreiraj tabele u bazi (SQLite lokalno ili Postgres na Railway-u) ---
 Base.metadata.create_all(bind=engine)
 
+# --- Nove kolone u postojećim tabelama (create_all ih ne dodaje) ---
+from app.core.schema_upgrade import upgrade_schema
+
+try:
+    SCHEMA_CHANGED = upgrade_schema(engine)
+except Exception as e:
+    print("⚠️ Greška pri nadogradnji sheme:", e)
+    SCHEMA_CHANGED = False
+
+# --- Indeksi za pretragu podstringa (pg_trgm / FTS5 / n-gram u procesu) ---
+from app.core.search import ensure_search_indexes
+
+print("Pretraga:", ensure_search_indexes(engine))
+
 # --- DB URL za provjeru da li smo na Postgresu ili SQLite-u ---
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
 if SQLALCHEMY_DATABASE_URL.startswith("postgres://"):
@@ -71,8 +86,72 @@ def reset_all_sequences():
 reset_all_sequences()
 
 
+# --- READ-MODEL ZA TIMELINE: prvi start nakon deploya ---
+def backfill_timeline_view(force: bool = False):
+    """
+    Ako je task_timeline_view prazan, a taskova ima, napuni ga jednom
+    (ili uvijek, ako je shema upravo nadograđena – npr. novi sort ključevi).
+    Za ručni rebuild: python rebuild_timeline_view.py
+    """
+    from app.database import SessionLocal
+    from app.core.timeline_view import rebuild_all
+
+    try:
+        with SessionLocal() as db:
+            has_rows = db.query(models.TaskTimelineRow.task_id).first() is not None
+            has_tasks = db.query(models.Task.id).first() is not None
+            if has_tasks and (force or not has_rows):
+                print("Punim task_timeline_view...")
+                rebuild_all(db)
+                db.commit()
+                print("✅ task_timeline_view napunjen.")
+    except Exception as e:
+        print("⚠️ Greška pri punjenju task_timeline_view:", e)
+
+
+backfill_timeline_view(force=SCHEMA_CHANGED)
+
+
+# --- BROJAČI STATUSA (project_gewerk_counters) ---
+def backfill_counters(force: bool = False):
+    """Isto kao read-model: prazni brojači (ili nova shema) → izračunaj iz taskova."""
+    from app.database import SessionLocal
+    from app.core import counters
+
+    try:
+        with SessionLocal() as db:
+            has_rows = db.query(models.ProjectGewerkCounter.project_id).first() is not None
+            has_tasks = db.query(models.Task.id).first() is not None
+            if has_tasks and (force or not has_rows):
+                print("Punim project_gewerk_counters...")
+                counters.rebuild(db)
+                db.commit()
+                print("✅ project_gewerk_counters napunjen.")
+    except Exception as e:
+        print("⚠️ Greška pri punjenju project_gewerk_counters:", e)
+
+
+backfill_counters(force=SCHEMA_CHANGED)
+
+
+# --- Dnevni snimci statistike (pozadinska nit, vidi app/core/snapshots.py) ---
+from app.core.snapshots import SnapshotScheduler
+from app.core.parallel_planning import shutdown_pool
+from app.database import SessionLocal
+
+snapshot_scheduler = SnapshotScheduler(SessionLocal)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    snapshot_scheduler.start()
+    yield
+    snapshot_scheduler.stop()
+    shutdown_pool()  # procesni pool za generate/sync (ako je pokrenut)
+
+
 # --- App (NAPOMENA: kreiraj SAMO JEDNOM) ---
-app = FastAPI(default_response_class=ORJSONResponse)
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
 # --- Putanje (konzistentne) ---
 BASE_DIR = Path(__file__).resolve().parent
@@ -95,6 +174,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 # GZip može ostati POSLIJE CORS-a
@@ -116,6 +196,8 @@ from app.routes import (
     aktivitaet,
     task,
     generate_tasks,
+    holiday,
+    scenario,
     user,
 )
 
@@ -132,6 +214,8 @@ app.include_router(gewerk.router,         dependencies=[Depends(bind_user)])
 app.include_router(aktivitaet.router,     dependencies=[Depends(bind_user)])
 app.include_router(task.router,           dependencies=[Depends(bind_user)])
 app.include_router(generate_tasks.router, dependencies=[Depends(bind_user)])
+app.include_router(holiday.router,        dependencies=[Depends(bind_user)])
+app.include_router(scenario.router,       dependencies=[Depends(bind_user)])
 app.include_router(user.router,           dependencies=[Depends(bind_user)])
 
 # Auth rute (bez bindera)
@@ -12,6 +12,27 @@ from .structure import Top, Ebene, Stiege, Bauteil
 # process.* modeli (ProcessModel/ProcessStep su u process.py)
 from .process import ProcessModel, ProcessStep
 
+# revizija po projektu (ETag / cache)
+from .revision import ProjectRevision
+
+# read-model za timeline
+from .timeline_view import TaskTimelineRow
+
+# dnevnik izmjena (change feed)
+from .task_change import TaskChange
+
+# brojači statusa po projektu × gewerku
+from .counters import ProjectGewerkCounter
+
+# dnevni snimci statistike (trend / burndown)
+from .stats_snapshot import ProjectStatsDaily
+
+# neradni dani projekta (kalendar radnih dana)
+from .holiday import ProjectHoliday
+
+# "šta ako" scenariji plana (copy-on-write Soll datumi)
+from .scenario import ScheduleScenario, ScenarioTaskOverride
+
 # (opcionalno) aktivnosti, ako ih koristiš drugdje
 from .aktivitaet import Aktivitaet
 
@@ -27,4 +48,12 @@ __all__ = [
     "ProcessModel",
     "ProcessStep",
     "Aktivitaet",
+    "ProjectRevision",
+    "TaskTimelineRow",
+    "TaskChange",
+    "ProjectGewerkCounter",
+    "ProjectStatsDaily",
+    "ProjectHoliday",
+    "ScheduleScenario",
+    "ScenarioTaskOverride",
 ]
@@ -0,0 +1,18 @@
+# app/models/counters.py
+from sqlalchemy import Column, Integer, ForeignKey
+from app.database import Base
+
+
+class ProjectGewerkCounter(Base):
+    """
+    Broj taskova po statusu (po IST datumima, kao /stats bez "until") za
+    projekt × gewerk. gewerk_id = 0 → task bez gewerka. Održava se kod upisa
+    (app/core/counters.py).
+    """
+    __tablename__ = "project_gewerk_counters"
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    gewerk_id = Column(Integer, primary_key=True, autoincrement=False)
+    done = Column(Integer, nullable=False, default=0)
+    in_progress = Column(Integer, nullable=False, default=0)
+    offen = Column(Integer, nullable=False, default=0)
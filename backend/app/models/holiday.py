@@ -0,0 +1,21 @@
+# app/models/holiday.py
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Index
+from app.database import Base
+
+
+class ProjectHoliday(Base):
+    """
+    Neradni dani projekta (praznik, božićna pauza, zatvoreno gradilište):
+    inkluzivni raspon start..end. Vikendi su neradni uvijek (app/core/workdays.py).
+    """
+    __tablename__ = "project_holidays"
+
+    id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    start = Column(Date, nullable=False)
+    end = Column(Date, nullable=False)
+    name = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_project_holidays_project", "project_id"),
+    )
@@ -0,0 +1,11 @@
+# app/models/revision.py
+from sqlalchemy import Column, Integer, ForeignKey
+from app.database import Base
+
+
+class ProjectRevision(Base):
+    """Brojač izmjena po projektu – raste sa svakim upisom (taskovi, struktura)."""
+    __tablename__ = "project_revisions"
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    revision = Column(Integer, nullable=False, default=0)
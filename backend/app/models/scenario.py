@@ -0,0 +1,38 @@
+# app/models/scenario.py
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Index
+from app.database import Base
+
+
+class ScheduleScenario(Base):
+    """
+    "Šta ako" varijanta plana projekta. Ne kopira taskove: čuva samo Soll
+    datume koji se razlikuju od baze (ScenarioTaskOverride), sve ostalo se
+    čita iz živih taskova. `version` raste sa svakom izmjenom (ETag).
+    """
+    __tablename__ = "schedule_scenarios"
+
+    id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    name = Column(String, nullable=False)
+    base_revision = Column(Integer, nullable=False, default=0)  # revizija projekta pri kreiranju
+    version = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_schedule_scenarios_project", "project_id"),
+    )
+
+
+class ScenarioTaskOverride(Base):
+    """Soll datumi jednog taska u scenariju (copy-on-write nad tasks)."""
+    __tablename__ = "scenario_task_overrides"
+
+    scenario_id = Column(Integer, ForeignKey("schedule_scenarios.id", ondelete="CASCADE"), primary_key=True)
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    start_soll = Column(Date, nullable=False)
+    end_soll = Column(Date, nullable=False)
+    # Soll taska u bazi kad je override nastao – commit ne prepisuje kasnije izmjene baze
+    base_start_soll = Column(Date, nullable=True)
+    base_end_soll = Column(Date, nullable=True)
@@ -0,0 +1,21 @@
+# app/models/stats_snapshot.py
+from sqlalchemy import Column, Integer, Date, ForeignKey
+from app.database import Base
+
+
+class ProjectStatsDaily(Base):
+    """
+    Dnevni snimak statusa po projektu × gewerku (gewerk_id = 0 → bez gewerka):
+    stanje kakvo je bilo tog dana, za trend/burndown (/stats/history).
+    """
+    __tablename__ = "project_stats_daily"
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    gewerk_id = Column(Integer, primary_key=True, autoincrement=False)
+
+    total = Column(Integer, nullable=False, default=0)
+    done = Column(Integer, nullable=False, default=0)
+    in_progress = Column(Integer, nullable=False, default=0)
+    offen = Column(Integer, nullable=False, default=0)
+    soll_done = Column(Integer, nullable=False, default=0)  # po planu završeno do tog dana (end_soll <= day)
@@ -1,12 +1,14 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, event
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.core.natural_sort import natural_key
 
 class Bauteil(Base):
     __tablename__ = "bauteile"
 
     id = Column(Integer, primary_key=True)
     name = Column(String)
+    sort_key = Column(String)  # natural_key(name), puni se automatski
     project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
     process_model_id = Column(Integer, ForeignKey("process_models.id"), nullable=True)
     project = relationship("Project", back_populates="bauteile")
@@ -16,14 +18,18 @@ class Bauteil(Base):
         back_populates="bauteil",
         cascade="all, delete-orphan",
         passive_deletes=True,
+        order_by="Stiege.sort_key",
     )
 
+    __table_args__ = (Index("ix_bauteile_project_sort", "project_id", "sort_key"),)
+
 
 class Stiege(Base):
     __tablename__ = "stiegen"
 
     id = Column(Integer, primary_key=True)
     name = Column(String)
+    sort_key = Column(String)  # natural_key(name), puni se automatski
     bauteil_id = Column(Integer, ForeignKey("bauteile.id", ondelete="CASCADE"), nullable=False)
     process_model_id = Column(Integer, ForeignKey("process_models.id"), nullable=True)
 
@@ -34,14 +40,18 @@ class Stiege(Base):
         back_populates="stiege",
         cascade="all, delete-orphan",
         passive_deletes=True,
+        order_by="Ebene.sort_key",
     )
 
+    __table_args__ = (Index("ix_stiegen_bauteil_sort", "bauteil_id", "sort_key"),)
+
 
 class Ebene(Base):
     __tablename__ = "ebenen"
 
     id = Column(Integer, primary_key=True)
     name = Column(String)
+    sort_key = Column(String)  # natural_key(name), puni se automatski
     stiege_id = Column(Integer, ForeignKey("stiegen.id", ondelete="CASCADE"), nullable=False)
     process_model_id = Column(Integer, ForeignKey("process_models.id"), nullable=True)
 
@@ -52,16 +62,30 @@ class Ebene(Base):
         back_populates="ebene",
         cascade="all, delete-orphan",
         passive_deletes=True,
+        order_by="Top.sort_key",
     )
 
+    __table_args__ = (Index("ix_ebenen_stiege_sort", "stiege_id", "sort_key"),)
+
 
 class Top(Base):
     __tablename__ = "tops"
 
     id = Column(Integer, primary_key=True)
     name = Column(String)
+    sort_key = Column(String)  # natural_key(name), puni se automatski
     ebene_id = Column(Integer, ForeignKey("ebenen.id", ondelete="CASCADE"), nullable=False)
     process_model_id = Column(Integer, ForeignKey("process_models.id"), nullable=True)
 
 
     ebene = relationship("Ebene", back_populates="tops")
+
+    __table_args__ = (Index("ix_tops_ebene_sort", "ebene_id", "sort_key"),)
+
+
+# sort_key prati name – kod kreiranja i kod svakog preimenovanja
+def _sync_sort_key(target, value, oldvalue, initiator):
+    target.sort_key = natural_key(value)
+
+for _cls in (Bauteil, Stiege, Ebene, Top):
+    event.listen(_cls.name, "set", _sync_sort_key)
@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, Integer, Date, ForeignKey, String, Text
+from sqlalchemy import Column, Integer, Date, ForeignKey, String, Text, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -17,8 +17,18 @@ class Task(Base):
     project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)  # ⬅︎ DODANO
     beschreibung = Column(Text, nullable=True)
     sub_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    # optimističko zaključavanje: raste sa svakim upisom (If-Match na PUT / batch)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     sub = relationship("User", foreign_keys=[sub_id], lazy="joined")
     top = relationship("Top")
     process_step = relationship("ProcessStep")
     project = relationship("Project")
+
+    __table_args__ = (
+        # jedan task po TOP-u i koraku (generate/sync rade upsert nad ovim)
+        Index("ux_tasks_project_top_step", "project_id", "top_id", "process_step_id", unique=True),
+    )
+    # ORM UPDATE/DELETE ide s "WHERE version = <učitana>" i povećava verziju;
+    # set-based UPDATE-i (bulk, batch, skip-window, sync) rade version + 1 sami
+    __mapper_args__ = {"version_id_col": version}
@@ -0,0 +1,18 @@
+# app/models/task_change.py
+from sqlalchemy import Column, Integer, Boolean, Index
+from app.database import Base
+
+
+class TaskChange(Base):
+    """Dnevnik izmjena taskova po reviziji projekta (za /tasks-timeline/changes)."""
+    __tablename__ = "task_changes"
+
+    id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, nullable=False)
+    revision = Column(Integer, nullable=False)
+    task_id = Column(Integer, nullable=False)
+    deleted = Column(Boolean, nullable=False, default=False)  # tombstone
+
+    __table_args__ = (
+        Index("ix_task_changes_project_revision", "project_id", "revision"),
+    )
@@ -0,0 +1,50 @@
+# app/models/timeline_view.py
+from sqlalchemy import Column, Integer, String, Date, Text, ForeignKey, Index
+from app.database import Base
+
+
+class TaskTimelineRow(Base):
+    """
+    Read-model za /tasks-timeline: jedan red po tasku, sve kolone za prikaz
+    i ključevi za sortiranje su već izračunati. Održava se kod upisa
+    (app/core/timeline_view.py), nikad se ne mijenja direktno.
+    """
+    __tablename__ = "task_timeline_view"
+
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    project_id = Column(Integer, nullable=False)
+    top_id = Column(Integer)
+    process_step_id = Column(Integer)
+    sub_id = Column(Integer)
+    gewerk_id = Column(Integer)  # za project_gewerk_counters (app/core/counters.py)
+    version = Column(Integer)    # Task.version (If-Match)
+
+    start_soll = Column(Date)
+    end_soll = Column(Date)
+    start_ist = Column(Date)
+    end_ist = Column(Date)
+
+    task = Column(String)
+    wohnung = Column(String)
+    farbe = Column(String)
+    gewerk_name = Column(String)
+    top = Column(String)
+    ebene = Column(String)
+    stiege = Column(String)
+    bauteil = Column(String)
+    process_model = Column(String)
+    beschreibung = Column(Text)
+    sub_name = Column(String)
+
+    # "0<natural_key>" ili "1" (bez čvora) → redoslijed kao ORDER BY x IS NULL, x
+    bauteil_key = Column(String)
+    stiege_key = Column(String)
+    ebene_key = Column(String)
+    top_key = Column(String)
+
+    __table_args__ = (
+        Index(
+            "ix_task_timeline_view_order",
+            "project_id", "bauteil_key", "stiege_key", "ebene_key", "top_key", "task_id",
+        ),
+    )
@@ -3,16 +3,21 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import exists, and_
-from datetime import date, datetime, timedelta
+from datetime import date, datetime
 
 from app.core.protocol import log_protocol
+from app.core.task_events import tasks_changed
+from app.core.workdays import project_calendar
+from app.core.task_generation import (
+    TopRow, StepRow, load_tops, load_existing, new_task_row, insert_tasks, load_tasks,
+)
+from app.core.step_templates import load_templates
+from app.core.parallel_planning import plan_tops_async
+from app.core import progress
 from app.database import get_db
 from app.models.project import Project
-from app.models.structure import Top, Ebene, Stiege, Bauteil
-from app.models.process import ProcessModel, ProcessStep
-from app.models.task import Task
 from app.schemas.task import TaskRead
 
 router = APIRouter()
@@ -28,25 +33,6 @@ def _to_date(v):
         except Exception: return None
     return None
 
-def is_weekend(d: date) -> bool:
-    return d.weekday() >= 5  # 5=Sub, 6=Ned
-
-def next_workday(d: date) -> date:
-    while is_weekend(d):
-        d += timedelta(days=1)
-    return d
-
-def add_workdays(start: date, days: int) -> date:
-    """Vrati zadnji radni dan intervala dužine 'days'.
-       start se računa kao 1. radni dan (inkluzivan)."""
-    d = next_workday(start)
-    remaining = max(1, days) - 1
-    while remaining > 0:
-        d += timedelta(days=1)
-        if not is_weekend(d):
-            remaining -= 1
-    return d
-
 
 @router.post("/projects/{project_id}/generate-tasks", response_model=list[TaskRead])
 async def generate_tasks(project_id: int, request: Request, db: Session = Depends(get_db)):
@@ -69,13 +55,8 @@ async def generate_tasks(project_id: int, request: Request, db: Session = Depend
     if not project:
         raise HTTPException(status_code=404, detail="Projekt nicht gefunden")
 
-    # Svi TOP-ovi u projektu (preko hijerarhije)
-    tops: list[Top] = (
-        db.query(Top)
-        .join(Ebene).join(Stiege).join(Bauteil)
-        .filter(Bauteil.project_id == project_id)
-        .all()
-    )
+    # Svi TOP-ovi u projektu s hijerarhijom i najbližim modelom (jedan upit)
+    tops: list[TopRow] = load_tops(db, project_id)
     if not tops:
         raise HTTPException(status_code=404, detail="No TOPs found in project.")
 
@@ -87,137 +68,100 @@ async def generate_tasks(project_id: int, request: Request, db: Session = Depend
     start_map = (payload or {}).get("start_map") or {}
     start_map_top: dict[str, str] = (start_map or {}).get("top") or {}
 
-    created_tasks: list[Task] = []
-    skipped_no_model: list[int] = []
-    skipped_duplicates: list[tuple[int, int]] = []
-    traces: list[dict] = []
-
-    for top in tops:
-        # Hijerarhija (za trace i pronalazak modela)
-        ebene: Ebene | None = db.query(Ebene).filter_by(id=top.ebene_id).first()
-        stiege: Stiege | None = db.query(Stiege).filter_by(id=ebene.stiege_id).first() if ebene else None
-        bauteil: Bauteil | None = db.query(Bauteil).filter_by(id=stiege.bauteil_id).first() if stiege else None
-
-        # Pronađi najbliži process model uzlazno
-        model: ProcessModel | None = None
-        model_source: str | None = None
-        if getattr(top, "process_model_id", None):
-            model = db.query(ProcessModel).filter_by(id=top.process_model_id).first()
-            model_source = "top"
-        elif ebene and getattr(ebene, "process_model_id", None):
-            model = db.query(ProcessModel).filter_by(id=ebene.process_model_id).first()
-            model_source = "ebene"
-        elif stiege and getattr(stiege, "process_model_id", None):
-            model = db.query(ProcessModel).filter_by(id=stiege.process_model_id).first()
-            model_source = "stiege"
-        elif bauteil and getattr(bauteil, "process_model_id", None):
-            model = db.query(ProcessModel).filter_by(id=bauteil.process_model_id).first()
-            model_source = "bauteil"
-
-        trace = {
-            "top": {"id": top.id, "name": getattr(top, "name", f"Top#{top.id}")},
-            "ebene": {"id": ebene.id, "name": getattr(ebene, "name", f"Ebene#{ebene.id}")} if ebene else None,
-            "stiege": {"id": stiege.id, "name": getattr(stiege, "name", f"Stiege#{stiege.id}")} if stiege else None,
-            "bauteil": {"id": bauteil.id, "name": getattr(bauteil, "name", f"Bauteil#{bauteil.id}")} if bauteil else None,
-            "model": {"id": model.id, "name": getattr(model, "name", f"Model#{model.id}")} if model else None,
-            "model_source": model_source,
-            "steps_considered": [],
-            "steps_skipped_duplicate": [],
-            "tasks_created": [],
-            "reason": None,
-        }
-
-        if not model:
-            skipped_no_model.append(top.id)
-            trace["reason"] = "no_process_model_found"
-            traces.append(trace)
-            continue
-
-        # Sortiraj i deduplikuj korake
-        steps_sorted: list[ProcessStep] = sorted(
-            model.steps,
-            key=lambda s: (s.order if getattr(s, "order", None) is not None else 10**9, s.id),
-        )
-        seen_step_ids: set[int] = set()
-        unique_steps: list[ProcessStep] = []
-        for step in steps_sorted:
-            sid = int(step.id)
-            trace["steps_considered"].append({
-                "id": sid,
-                "name": getattr(step, "name", f"Step#{sid}"),
-                "order": getattr(step, "order", None),
-                "parallel": getattr(step, "parallel", False),
-                "duration_days": getattr(step, "duration_days", None),
-            })
-            if sid in seen_step_ids:
-                continue
-            seen_step_ids.add(sid)
-            unique_steps.append(step)
-
-        # Početni datum za ovaj TOP:
-        # 1) mapa iz frontenda  2) project.start_date  3) today
-        # Početni datum – samo ako je iz mape; inače preskoči TOP
-        base_str = start_map_top.get(str(top.id))
-        if not base_str:
-            continue  # bez datuma -> ne generiraj ništa za ovaj TOP
-
-        base_date = _to_date(base_str)
-        if not base_date:
-            continue
-        current_date = next_workday(base_date)      
-
-
-        # Kreiraj taskove po redu
-        for step in unique_steps:
-            # Preskoči duplikate (ako task već postoji)
-            already = db.query(
-                exists().where(
-                    and_(
-                        Task.project_id == project.id,
-                        Task.top_id == top.id,
-                        Task.process_step_id == step.id,
-                    )
-                )
-            ).scalar()
-
-            duration = getattr(step, "duration_days", None) or 1
-            start_soll = next_workday(current_date)             # ⬅️
-            end_soll   = add_workdays(start_soll, duration)     # ⬅️
-
-
-            if already:
-                skipped_duplicates.append((top.id, step.id))
-                trace["steps_skipped_duplicate"].append({"id": int(step.id)})
-                if not getattr(step, "parallel", False):
-                    current_date = end_soll + timedelta(days=1)
+    job = request.query_params.get("job")  # napredak: GET /generate-jobs/{job}
+    with progress.tracking(job, "generate", project_id):
+        calendar = project_calendar(db, project_id)
+        model_names, templates = load_templates(db, (t.model_id for t in tops))
+        existing = load_existing(db, project_id, [t.id for t in tops])
+
+        new_rows: list[dict] = []
+        skipped_no_model: list[int] = []
+        skipped_duplicates: list[tuple[int, int]] = []
+        traces: list[dict] = []
+        trace_rows: dict[tuple[int, int], tuple[dict, dict, StepRow]] = {}
+        dated: list[tuple[TopRow, dict]] = []
+        bases: dict[int, tuple[int, date]] = {}
+
+        for top in tops:
+            model_id = top.model_id if top.model_id in model_names else None
+            trace = {
+                "top": {"id": top.id, "name": top.name},
+                "ebene": {"id": top.ebene_id, "name": top.ebene_name},
+                "stiege": {"id": top.stiege_id, "name": top.stiege_name},
+                "bauteil": {"id": top.bauteil_id, "name": top.bauteil_name},
+                "model": {"id": model_id, "name": model_names[model_id]} if model_id else None,
+                "model_source": top.model_source,
+                "steps_considered": [],
+                "steps_skipped_duplicate": [],
+                "tasks_created": [],
+                "reason": None,
+            }
+
+            if not model_id:
+                skipped_no_model.append(top.id)
+                trace["reason"] = "no_process_model_found"
+                traces.append(trace)
                 continue
 
-            task = Task(
-                top_id=top.id,
-                process_step_id=step.id,
-                start_soll=start_soll,
-                end_soll=end_soll,  # traženo ponašanje
-                project_id=project.id,
-                status="offen",
-            )
-            db.add(task)
-            db.flush()
+            steps = templates[model_id].steps
+            trace["steps_considered"] = [
+                {
+                    "id": st.id,
+                    "name": f"Step#{st.id}",
+                    "order": st.order,
+                    "parallel": st.parallel,
+                    "duration_days": st.duration_days,
+                }
+                for st in steps
+            ]
+
+            # Početni datum – samo ako je iz mape; inače preskoči TOP
+            base_date = _to_date(start_map_top.get(str(top.id)))
+            if not base_date:
+                continue  # bez datuma -> ne generiraj ništa za ovaj TOP
+
+            bases[top.id] = (model_id, base_date)
+            dated.append((top, trace))
+            traces.append(trace)
 
+        # Datumi svih TOP-ova odjednom: pomaci iz predloška modela + kalendar projekta
+        planned = await plan_tops_async(calendar, templates, bases, job)
+
+        for top, trace in dated:
+            steps = templates[bases[top.id][0]].steps
+            starts, ends = planned[top.id]
+            have = {t.process_step_id for t in existing.get(top.id, ())}
+
+            for step, start_soll, end_soll in zip(steps, starts, ends):
+                # Preskoči duplikate (ako task već postoji)
+                if step.id in have:
+                    skipped_duplicates.append((top.id, step.id))
+                    trace["steps_skipped_duplicate"].append({"id": step.id})
+                    continue
+                row = new_task_row(project_id, top.id, step.id, start_soll, end_soll)
+                new_rows.append(row)
+                trace_rows[(top.id, step.id)] = (trace, row, step)
+
+        progress.update(job, phase="write")
+
+        # Jedan serijski upis (duplikati iz paralelnog zahtjeva se tiho preskaču)
+        created = insert_tasks(db, new_rows) if new_rows else {}
+        for (top_id, step_id), task_id in created.items():
+            trace, row, step = trace_rows[(top_id, step_id)]
             trace["tasks_created"].append({
-                "task_id": task.id,
-                "step_id": int(step.id),
-                "start_soll": str(start_soll),
-                "end_soll": str(end_soll),
-                "parallel": bool(getattr(step, "parallel", False)),
+                "task_id": task_id,
+                "step_id": step_id,
+                "start_soll": str(row["start_soll"]),
+                "end_soll": str(row["end_soll"]),
+                "parallel": step.parallel,
             })
-            created_tasks.append(task)
-
-            if not getattr(step, "parallel", False):
-                current_date = end_soll + timedelta(days=1)
-
-        traces.append(trace)
+        for (top_id, step_id) in trace_rows.keys() - created.keys():
+            skipped_duplicates.append((top_id, step_id))
 
-    db.commit()
+        if created:
+            tasks_changed(db, project_id, created.values())
+        db.commit()
+        created_tasks = load_tasks(db, created.values())
 
     details = {
         "project_id": project_id,
@@ -241,3 +185,12 @@ async def generate_tasks(project_id: int, request: Request, db: Session = Depend
         print("[task.generate.debug]", json.dumps(details, ensure_ascii=False, default=str)[:20000], file=sys.stdout)
 
     return created_tasks
+
+
+@router.get("/generate-jobs/{job_id}")
+def generate_job_progress(job_id: str):
+    """Napredak generate/sync zahtjeva pokrenutog s ?job=<job_id>."""
+    job = progress.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Auftrag nicht gefunden")
+    return ORJSONResponse(job, headers={"Cache-Control": "no-store"})
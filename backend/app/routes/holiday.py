@@ -0,0 +1,80 @@
+# app/routes/holiday.py
+from datetime import date
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.core.protocol import log_protocol
+from app.core.workdays import project_calendar, as_days
+from app.models.holiday import ProjectHoliday
+from app.models.project import Project
+from app.schemas.holiday import HolidayCreate, HolidayRead
+
+router = APIRouter()
+
+MAX_CLOSURE_DAYS = 366
+
+
+def _get_project(db: Session, project_id: int) -> Project:
+    project = db.get(Project, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Projekt nicht gefunden")
+    return project
+
+
+@router.get("/projects/{project_id}/holidays", response_model=List[HolidayRead])
+def list_holidays(project_id: int, db: Session = Depends(get_db)):
+    _get_project(db, project_id)
+    return (
+        db.query(ProjectHoliday)
+        .filter(ProjectHoliday.project_id == project_id)
+        .order_by(ProjectHoliday.start, ProjectHoliday.end)
+        .all()
+    )
+
+
+@router.post("/projects/{project_id}/holidays", response_model=HolidayRead, status_code=201)
+def create_holiday(project_id: int, data: HolidayCreate, request: Request, db: Session = Depends(get_db)):
+    _get_project(db, project_id)
+    end = data.end or data.start
+    if end < data.start:
+        raise HTTPException(status_code=400, detail="Ende vor Start")
+    if (end - data.start).days + 1 > MAX_CLOSURE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Zeitraum zu lang (max. {MAX_CLOSURE_DAYS} Tage)")
+
+    holiday = ProjectHoliday(project_id=project_id, start=data.start, end=end, name=data.name)
+    db.add(holiday)
+    db.commit()
+    db.refresh(holiday)
+    log_protocol(db, request, action="project.holiday.create", ok=True, status_code=201,
+                 details={"project_id": project_id, "id": holiday.id,
+                          "start": str(holiday.start), "end": str(holiday.end), "name": holiday.name})
+    return holiday
+
+
+@router.delete("/projects/{project_id}/holidays/{holiday_id}", status_code=204)
+def delete_holiday(project_id: int, holiday_id: int, request: Request, db: Session = Depends(get_db)):
+    holiday = db.get(ProjectHoliday, holiday_id)
+    if not holiday or holiday.project_id != project_id:
+        raise HTTPException(status_code=404, detail="Feiertag nicht gefunden")
+    db.delete(holiday)
+    db.commit()
+    log_protocol(db, request, action="project.holiday.delete", ok=True, status_code=204,
+                 details={"project_id": project_id, "id": holiday_id})
+    return
+
+
+@router.get("/projects/{project_id}/workdays")
+def count_workdays(
+    project_id: int,
+    from_: date = Query(..., alias="from"),
+    to: date = Query(...),
+    db: Session = Depends(get_db),
+):
+    """Broj radnih dana (inkluzivno) po kalendaru projekta."""
+    if to < from_:
+        raise HTTPException(status_code=400, detail="Ende vor Start")
+    cal = project_calendar(db, project_id)
+    return {"from": from_, "to": to, "workdays": int(cal.count(as_days([from_]), as_days([to]))[0])}
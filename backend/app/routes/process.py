@@ -1,11 +1,16 @@
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import date
 from app.database import get_db
 from app.models.process import ProcessModel, ProcessStep
 from app.schemas.process import ProcessModelCreate, ProcessModelRead
 from app.core.protocol import log_protocol
+from app.core.task_events import tasks_changed, tasks_by_project
+from app.core.timeline_view import task_ids_using_model
+from app.core import step_templates
+from app.core.workdays import project_calendar, calendar_for
 
 router = APIRouter()
 
@@ -38,8 +43,12 @@ def delete_model(model_id: int, request: Request, db: Session = Depends(get_db))
     model = db.query(ProcessModel).filter_by(id=model_id).first()
     if not model:
         raise HTTPException(status_code=404, detail="Model not found")
+    affected = tasks_by_project(db, task_ids_using_model(db, model_id))
     db.delete(model)
+    for pid, ids in affected.items():
+        tasks_changed(db, pid, ids)
     db.commit()
+    step_templates.invalidate(model_id)
     log_protocol(db, request, action="processmodel.delete", ok=True, status_code=204,
                  details={"id": model.id, "name": model.name, "steps": [s.activity for s in model.steps]})
     return {"message": "Deleted"}
@@ -50,6 +59,7 @@ def update_process_model(model_id: int, data: ProcessModelCreate, request: Reque
     if not model:
         raise HTTPException(status_code=404, detail="Model not found")
 
+    affected = tasks_by_project(db, task_ids_using_model(db, model_id))
     model.name = data.name
     model.steps.clear()  # izbriši stare stepove
 
@@ -57,8 +67,49 @@ def update_process_model(model_id: int, data: ProcessModelCreate, request: Reque
         step = ProcessStep(**step_data.dict())
         model.steps.append(step)
 
+    for pid, ids in affected.items():
+        tasks_changed(db, pid, ids)
     db.commit()
+    step_templates.invalidate(model_id)
     db.refresh(model)
     log_protocol(db, request, action="processmodel.update", ok=True, status_code=200,
                  details={"id": model.id, "name": model.name, "steps": [s.activity for s in model.steps]})
-    return model
\ No newline at end of file
+    return model
+
+@router.get("/process-models/{model_id}/preview")
+def preview_model(
+    model_id: int,
+    start: date = Query(...),
+    project_id: Optional[int] = Query(None),
+    db: Session = Depends(get_db),
+):
+    """Plan koraka za jedan TOP od datuma `start` (kalendar projekta ako je zadan), bez upisa."""
+    names, templates = step_templates.load_templates(db, [model_id])
+    if model_id not in names:
+        raise HTTPException(status_code=404, detail="Model not found")
+    tpl = templates[model_id]
+    cal = project_calendar(db, project_id) if project_id else calendar_for(())
+    starts, ends = step_templates.plan_dates(cal, tpl, [start])
+    steps = [
+        {
+            "id": st.id,
+            "activity": st.activity,
+            "gewerk_id": st.gewerk_id,
+            "order": st.order,
+            "parallel": st.parallel,
+            "duration_days": st.duration_days,
+            "start_offset": int(so),
+            "end_offset": int(eo),
+            "start_soll": s,
+            "end_soll": e,
+        }
+        for st, so, eo, s, e in zip(tpl.steps, tpl.start_offsets, tpl.end_offsets, starts[0], ends[0])
+    ]
+    return {
+        "model_id": model_id,
+        "name": names[model_id],
+        "start": steps[0]["start_soll"] if steps else None,
+        "end": max((s["end_soll"] for s in steps), default=None),
+        "workdays": tpl.span,
+        "steps": steps,
+    }
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
+from sqlalchemy import or_
 from datetime import datetime
 from typing import Optional
 from app.database import get_db
 from app.models.protocol import ProtocolEntry
+from app.core.search import text_contains
 
 router = APIRouter(prefix="/api/audit-logs", tags=["protocol"])
 
@@ -27,7 +29,7 @@ def list_protocol(
     if user_id:     qy = qy.filter(ProtocolEntry.user_id == user_id)
     if ok is not None: qy = qy.filter(ProtocolEntry.ok == ok)
     if method:      qy = qy.filter(ProtocolEntry.method == method.upper())
-    if path:        qy = qy.filter(ProtocolEntry.path.ilike(f"%{path}%"))
+    if path:        qy = qy.filter(text_contains(ProtocolEntry.path, path))
     if status_code: qy = qy.filter(ProtocolEntry.status_code == status_code)
     if from_:
         try: qy = qy.filter(ProtocolEntry.timestamp >= datetime.fromisoformat(from_))
@@ -36,8 +38,7 @@ def list_protocol(
         try: qy = qy.filter(ProtocolEntry.timestamp <= datetime.fromisoformat(to))
         except: pass
     if q:
-        pat = f"%{q}%"
-        qy = qy.filter((ProtocolEntry.path.ilike(pat)) | (ProtocolEntry.user_agent.ilike(pat)))
+        qy = qy.filter(or_(text_contains(ProtocolEntry.path, q), text_contains(ProtocolEntry.user_agent, q)))
 
     total = qy.count()
     rows = (qy.order_by(ProtocolEntry.timestamp.desc())
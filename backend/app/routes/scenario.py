@@ -0,0 +1,169 @@
+# app/routes/scenario.py
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.core import scenarios, counters
+from app.core.filters import TaskFilter
+from app.core.protocol import log_protocol
+from app.core.revision import current_revision
+from app.core.task_events import tasks_changed
+from app.core.task_generation import update_soll_dates
+from app.core.workdays import project_calendar
+from app.models.project import Project
+from app.models.scenario import ScheduleScenario
+from app.schemas.scenario import ScenarioCreate, ScenarioRead, ScenarioTaskDates, ScenarioShiftRequest
+
+router = APIRouter()
+
+
+def _get_scenario(db: Session, project_id: int, scenario_id: int) -> ScheduleScenario:
+    scenario = scenarios.get_scenario(db, project_id, scenario_id)
+    if scenario is None:
+        raise HTTPException(status_code=404, detail="Szenario nicht gefunden")
+    return scenario
+
+
+def _read(db: Session, scenario: ScheduleScenario) -> ScenarioRead:
+    out = ScenarioRead.model_validate(scenario)
+    out.changed_tasks = scenarios.change_count(db, scenario.id)
+    return out
+
+
+@router.get("/projects/{project_id}/scenarios", response_model=List[ScenarioRead])
+def list_scenarios(project_id: int, db: Session = Depends(get_db)):
+    rows = (
+        db.query(ScheduleScenario)
+        .filter(ScheduleScenario.project_id == project_id)
+        .order_by(ScheduleScenario.id)
+        .all()
+    )
+    return [_read(db, s) for s in rows]
+
+
+@router.post("/projects/{project_id}/scenarios", response_model=ScenarioRead, status_code=201)
+def create_scenario(project_id: int, data: ScenarioCreate, request: Request, db: Session = Depends(get_db)):
+    if not db.get(Project, project_id):
+        raise HTTPException(status_code=404, detail="Projekt nicht gefunden")
+    scenario = ScheduleScenario(
+        project_id=project_id, name=data.name, base_revision=current_revision(db, project_id), version=0,
+    )
+    db.add(scenario)
+    db.commit()
+    db.refresh(scenario)
+    log_protocol(db, request, action="scenario.create", ok=True, status_code=201,
+                 details={"project_id": project_id, "id": scenario.id, "name": scenario.name})
+    return _read(db, scenario)
+
+
+@router.get("/projects/{project_id}/scenarios/{scenario_id}")
+def get_scenario(project_id: int, scenario_id: int, db: Session = Depends(get_db)):
+    """Scenarij + taskovi koje mijenja (Soll u bazi i u scenariju)."""
+    scenario = _get_scenario(db, project_id, scenario_id)
+    changes = scenarios.changes(db, scenario)
+    payload = _read(db, scenario).model_dump()
+    payload["changed_tasks"] = len(changes)
+    payload["base_changed"] = current_revision(db, project_id) != scenario.base_revision
+    payload["conflicts"] = [c["id"] for c in scenarios.conflicts(changes)]  # commit bez force → 409
+    payload["tasks"] = changes
+    return ORJSONResponse(payload)
+
+
+@router.delete("/projects/{project_id}/scenarios/{scenario_id}", status_code=204)
+def discard_scenario(project_id: int, scenario_id: int, request: Request, db: Session = Depends(get_db)):
+    scenario = _get_scenario(db, project_id, scenario_id)
+    scenarios.drop_scenario(db, scenario)
+    db.commit()
+    log_protocol(db, request, action="scenario.discard", ok=True, status_code=204,
+                 details={"project_id": project_id, "id": scenario_id})
+    return
+
+
+@router.patch("/projects/{project_id}/scenarios/{scenario_id}/tasks")
+def set_scenario_tasks(
+    project_id: int,
+    scenario_id: int,
+    items: List[ScenarioTaskDates],
+    db: Session = Depends(get_db),
+):
+    """Soll datumi pojedinih taskova u scenariju; datum jednak bazi vraća task na bazu."""
+    scenario = _get_scenario(db, project_id, scenario_id)
+    current = scenarios.task_dates(db, scenario, (i.id for i in items))
+    missing = sorted({i.id for i in items} - current.keys())
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Task nicht gefunden: {missing[:20]}")
+
+    dates, base = {}, {}
+    for item in items:
+        bs, be, s, e = current[item.id]
+        start = item.start_soll or s
+        end = item.end_soll or e
+        if start is None or end is None:
+            raise HTTPException(status_code=400, detail=f"Task {item.id}: Start und Ende erforderlich")
+        if end < start:
+            raise HTTPException(status_code=400, detail=f"Task {item.id}: Ende vor Start")
+        dates[item.id] = (start, end)
+        base[item.id] = (bs, be)
+
+    ids = scenarios.write_overrides(db, scenario, dates, base) if dates else []
+    db.commit()
+    return {"scenario_id": scenario.id, "version": scenario.version, "ids": ids}
+
+
+@router.post("/projects/{project_id}/scenarios/{scenario_id}/shift")
+def shift_scenario_tasks(
+    project_id: int,
+    scenario_id: int,
+    payload: ScenarioShiftRequest,
+    db: Session = Depends(get_db),
+):
+    """Pomjeri filtrirane taskove u scenariju za `days` dana (npr. "Estrich +14 na Stiege 2")."""
+    scenario = _get_scenario(db, project_id, scenario_id)
+    f = TaskFilter.from_skip_window(payload.filters)
+    cal = project_calendar(db, project_id) if payload.skip_weekends else None
+    tasks = scenarios.shift_tasks(db, scenario, f, payload.days, cal)
+    db.commit()
+    return ORJSONResponse({
+        "scenario_id": scenario.id, "version": scenario.version, "moved": len(tasks), "tasks": tasks,
+    })
+
+
+@router.post("/projects/{project_id}/scenarios/{scenario_id}/commit")
+def commit_scenario(
+    project_id: int,
+    scenario_id: int,
+    request: Request,
+    force: bool = Query(False),  # i taskovi čiji se Soll u bazi promijenio nakon izmjene u scenariju
+    db: Session = Depends(get_db),
+):
+    """
+    Upiše datume scenarija u taskove (jedna transakcija) i ukloni scenarij.
+    Ako je Soll taska u bazi promijenjen poslije izmjene u scenariju → 409 s tim
+    taskovima; force=true ih prepiše.
+    """
+    scenario = _get_scenario(db, project_id, scenario_id)
+    base_changed = current_revision(db, project_id) != scenario.base_revision
+    changes = scenarios.changes(db, scenario)
+    stale = scenarios.conflicts(changes)
+    if stale and not force:
+        return ORJSONResponse(
+            {"detail": "Tasks wurden seit der Änderung im Szenario geändert", "conflicts": stale},
+            status_code=409,
+        )
+    rows = scenarios.commit_rows(changes)
+    ids = [r["b_id"] for r in rows]
+
+    before = counters.snapshot(db, ids)  # UPDATE ide odmah u bazu
+    update_soll_dates(db, rows)
+    if ids:
+        tasks_changed(db, project_id, ids, before=before)
+    scenarios.drop_scenario(db, scenario)
+    db.commit()
+    log_protocol(db, request, action="scenario.commit", ok=True, status_code=200,
+                 details={"project_id": project_id, "id": scenario_id, "name": scenario.name,
+                          "base_changed": base_changed, "task_ids": ids[:200], "count": len(ids),
+                          "overwritten": [c["id"] for c in stale][:200]})
+    return {"committed": len(ids), "ids": ids, "base_changed": base_changed, "overwritten": len(stale)}
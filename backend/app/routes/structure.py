@@ -1,5 +1,5 @@
 from fastapi import Request
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session, joinedload
 from app.database import get_db
 from app.models.structure import Bauteil, Stiege, Ebene, Top
@@ -8,6 +8,11 @@ from app.crud import structure as crud
 from fastapi.encoders import jsonable_encoder
 from app.schemas.structure import Bauteil as BauteilSchema
 from app.core.protocol import log_protocol
+from app.core.revision import (
+    project_id_of_structure, project_etag, etag_matches, not_modified, set_etag,
+)
+from app.core.task_events import tasks_changed
+from app.core.timeline_view import task_ids_under
 
 router = APIRouter()
 
@@ -30,7 +35,12 @@ def add_top(data: TopCreate, db: Session = Depends(get_db)):
     return crud.create_top(db, data)
 
 @router.get("/projects/{project_id}/structure", response_model=list[BauteilSchema])
-def get_structure(project_id: int, db: Session = Depends(get_db)):
+def get_structure(project_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    etag = project_etag(db, request, project_id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
     bauteile = (
         db.query(Bauteil)
         .options(
@@ -39,6 +49,7 @@ def get_structure(project_id: int, db: Session = Depends(get_db)):
             .joinedload(Ebene.tops)
         )
         .filter(Bauteil.project_id == project_id)
+        .order_by(Bauteil.sort_key, Bauteil.id)
         .all()
     )
 
@@ -58,8 +69,14 @@ def add_bauteil_to_project(
 @router.get("/projects/{project_id}/structure/full")
 def get_full_project_structure(
     project_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
+    etag = project_etag(db, request, project_id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     return crud.get_full_structure(db, project_id)
 
 # UPDATE
@@ -81,6 +98,7 @@ def update_bauteil(bauteil_id: int, request: Request, data: BauteilUpdate, db: S
     # obavezno oba polja
     bauteil.name = data.name
     bauteil.process_model_id = data.process_model_id
+    tasks_changed(db, bauteil.project_id, task_ids_under(db, Bauteil, bauteil_id))
     db.commit()
 
     if propagate and data.process_model_id is not None:
@@ -110,6 +128,7 @@ def update_stiege(stiege_id: int, data: StiegeUpdate, request: Request, db: Sess
 
     stiege.name = data.name
     stiege.process_model_id = data.process_model_id
+    tasks_changed(db, project_id_of_structure(db, Stiege, stiege_id), task_ids_under(db, Stiege, stiege_id))
     db.commit()
 
     if propagate and data.process_model_id is not None:
@@ -135,6 +154,7 @@ def update_ebene(ebene_id: int, data: EbeneUpdate, request: Request, db: Session
 
     ebene.name = data.name
     ebene.process_model_id = data.process_model_id
+    tasks_changed(db, project_id_of_structure(db, Ebene, ebene_id), task_ids_under(db, Ebene, ebene_id))
     db.commit()
 
     if propagate and data.process_model_id is not None:
@@ -154,6 +174,7 @@ def update_top(top_id: int, data: TopUpdate, request: Request, db: Session = Dep
         raise HTTPException(status_code=404, detail="Top nicht gefunden")
     obj.name = data.name
     obj.process_model_id = data.process_model_id
+    tasks_changed(db, project_id_of_structure(db, Top, top_id), task_ids_under(db, Top, top_id))
     db.commit()
     log_protocol(db, request, action="structure.top.update", ok=True, status_code=200,
                  details={"top_id": top_id, "payload": data.model_dump()})
@@ -164,7 +185,9 @@ def delete_bauteil(bauteil_id: int, request: Request, db: Session = Depends(get_
     obj = db.query(Bauteil).get(bauteil_id)
     if not obj:
         raise HTTPException(status_code=404, detail="Bauteil nicht gefunden")
+    project_id, task_ids = obj.project_id, task_ids_under(db, Bauteil, bauteil_id)
     db.delete(obj)
+    tasks_changed(db, project_id, task_ids)
     db.commit()
     log_protocol(db, request, action="structure.bauteil.delete", ok=True, status_code=204, details={"bauteil_id": bauteil_id})
     return {"message": "Gelöscht"}
@@ -174,7 +197,9 @@ def delete_stiege(stiege_id: int, request: Request, db: Session = Depends(get_db
     obj = db.query(Stiege).get(stiege_id)
     if not obj:
         raise HTTPException(status_code=404, detail="Stiege nicht gefunden")
+    project_id, task_ids = project_id_of_structure(db, Stiege, stiege_id), task_ids_under(db, Stiege, stiege_id)
     db.delete(obj)
+    tasks_changed(db, project_id, task_ids)
     db.commit()
     log_protocol(db, request, action="structure.stiege.delete", ok=True, status_code=204, details={"stiege_id": stiege_id})
     return {"message": "Gelöscht"}
@@ -184,7 +209,9 @@ def delete_ebene(ebene_id: int, request: Request, db: Session = Depends(get_db))
     obj = db.query(Ebene).get(ebene_id)
     if not obj:
         raise HTTPException(status_code=404, detail="Ebene nicht gefunden")
+    project_id, task_ids = project_id_of_structure(db, Ebene, ebene_id), task_ids_under(db, Ebene, ebene_id)
     db.delete(obj)
+    tasks_changed(db, project_id, task_ids)
     db.commit()
     log_protocol(db, request, action="structure.ebene.delete", ok=True, status_code=204, details={"ebene_id": ebene_id})
     return {"message": "Gelöscht"}
@@ -194,7 +221,9 @@ def delete_top(top_id: int, request: Request, db: Session = Depends(get_db)):
     obj = db.query(Top).get(top_id)
     if not obj:
         raise HTTPException(status_code=404, detail="Top nicht gefunden")
+    project_id, task_ids = project_id_of_structure(db, Top, top_id), task_ids_under(db, Top, top_id)
     db.delete(obj)
+    tasks_changed(db, project_id, task_ids)
     db.commit()
     log_protocol(db, request, action="structure.top.delete", ok=True, status_code=204, details={"top_id": top_id})
     return {"message": "Gelöscht"}
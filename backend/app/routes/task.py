@@ -1,22 +1,49 @@
 
 from fastapi import Request
 from fastapi import APIRouter, Depends, HTTPException, Response, Query
-from sqlalchemy.orm import Session, joinedload, load_only
-from app.database import get_db
+from sqlalchemy.orm import Session, load_only, contains_eager
+from sqlalchemy.orm.exc import StaleDataError
+from app.database import get_db, SessionLocal
 from app.models.task import Task
-from app.models.structure import Top, Ebene, Stiege, Bauteil
-from app.models.process import ProcessStep, ProcessModel
-from app.models.gewerk import Gewerk
+from app.models.structure import Top, Ebene, Stiege
+from app.models.process import ProcessStep
 from app.models.project import Project
 from app.models.user import User 
-from app.schemas.task import TaskCreate, TaskRead, TaskUpdate, TimelineTask
+from app.schemas.task import TaskCreate, TaskRead, TaskUpdate, TaskBatchItem, TimelineTask
 from app.schemas.bulk import BulkBody, BulkFilters, BulkUpdate
+from app.schemas.schedule import SkipWindowRequest
 from typing import List
-from datetime import date, timedelta, datetime
+from datetime import date, datetime
 from sqlalchemy import func, select, or_, and_, case, cast, Integer
 from app.core.protocol import compute_diff, log_protocol
-from pydantic import BaseModel
+from app.core.revision import (
+    current_revision, project_etag, day_variant, etag_matches, not_modified, set_etag,
+    version_etag, if_match_version,
+)
+from app.core.filters import TaskFilter, apply_joins, filter_tasks, JOIN_ORDER
+from app.core.interval_index import narrow_window
+from app.core.facets import project_facets
+from app.core.search import narrow_search
+from app.core import stats as stats_engine, counters, snapshots, stats_sweep, scenarios
+from app.core.task_events import tasks_changed, changes_since, CHANGE_LOG_KEEP
+from app.core.workdays import project_calendar
+from app.core.schedule import preview_skip_window, apply_skip_window
+from app.core.bulk import bulk_values, apply_bulk_update, COPY_START_SOLL, COPY_END_SOLL
+from app.core import task_batch
+from app.core.task_generation import (
+    load_tops, load_existing, new_task_row,
+    insert_tasks, update_soll_dates, delete_tasks, load_tasks,
+)
+from app.core.step_templates import load_templates
+from app.core.parallel_planning import plan_tops_async
+from app.core import progress
+from app.core.timeline_view import view_query, view_row, CHUNK
+from app.core.timeline import (
+    timeline_row, wants_ndjson, ndjson_chunks, columnar_payload, core_select,
+    lod_select, lod_bars, NDJSON_MEDIA_TYPE, TIMELINE_ORDER, LOD_BUCKETS, LOD_LEVELS,
+)
 from typing import Optional
+from collections import Counter
 
 
 today = date.today()
@@ -32,25 +59,6 @@ def _to_date(v):
         except Exception: return None
     return None
 
-def is_weekend(d: date) -> bool:
-    return d.weekday() >= 5  # 5=Sub, 6=Ned
-
-def next_workday(d: date) -> date:
-    while is_weekend(d):
-        d += timedelta(days=1)
-    return d
-
-def add_workdays(start: date, days: int) -> date:
-    """Vrati zadnji radni dan intervala dužine 'days'.
-       start se računa kao 1. radni dan (inkluzivan)."""
-    d = next_workday(start)
-    remaining = max(1, days) - 1
-    while remaining > 0:
-        d += timedelta(days=1)
-        if not is_weekend(d):
-            remaining -= 1
-    return d
-
 
 # We'll create a condition for delayed tasks
   # Condition 1: task is not done (end_ist is null) and end_soll < today
@@ -72,6 +80,8 @@ def tasks_count(project_id: int, db: Session = Depends(get_db)):
 def create_task(data: TaskCreate, request: Request, db: Session = Depends(get_db)):
     task = Task(**data.dict())
     db.add(task)
+    db.flush()
+    tasks_changed(db, task.project_id, [task.id])
     db.commit()
     db.refresh(task)
     log_protocol(db, request, action="task.create", ok=True, status_code=201,
@@ -83,11 +93,73 @@ def list_tasks(db: Session = Depends(get_db)):
     return db.query(Task).all()
 
 from fastapi import Response
+from fastapi.responses import StreamingResponse, ORJSONResponse
 import time
 
+
+def _timeline_query(db: Session, project_id: int, f: TaskFilter | None = None):
+    # Sve tabele se joinaju tačno jednom (outer join, kanonski redoslijed) –
+    # isti joinovi služe filterima, sortiranju i eager-loadu (contains_eager)
+    q = apply_joins(db.query(Task).filter(Task.project_id == project_id), JOIN_ORDER)
+    if f is not None:
+        q = filter_tasks(q, f, have=JOIN_ORDER)
+
+    return q.options(
+        contains_eager(Task.top)
+            .contains_eager(Top.ebene)
+            .contains_eager(Ebene.stiege)
+            .contains_eager(Stiege.bauteil),
+        contains_eager(Task.process_step).contains_eager(ProcessStep.gewerk),
+        contains_eager(Task.process_step).contains_eager(ProcessStep.model),
+        contains_eager(Task.sub),
+        load_only(
+            Task.id, Task.project_id, Task.top_id, Task.process_step_id,
+            Task.start_soll, Task.end_soll, Task.start_ist, Task.end_ist,
+            Task.beschreibung, Task.sub_id, Task.version
+        ),
+    ).order_by(*TIMELINE_ORDER)
+
+
+TIMELINE_STREAM_BATCH = 1000
+
+
+def _scenario_or_404(db: Session, project_id: int, scenario_id: int | None):
+    if scenario_id is None:
+        return None
+    scn = scenarios.get_scenario(db, project_id, scenario_id)
+    if scn is None:
+        raise HTTPException(status_code=404, detail="Szenario nicht gefunden")
+    return scn
+
+def _timeline_rows(db: Session, project_id: int, f: TaskFilter, source: str | None, scenario_id: int | None = None):
+    """Redovi (dict u obliku TimelineTask): ORM, read-model (source="view") ili Core (source="core")."""
+    if source == "view":
+        q = view_query(db, project_id, f).yield_per(TIMELINE_STREAM_BATCH)
+        return (view_row(r) for r in q)
+    if source == "core":
+        res = db.execute(
+            core_select(project_id, f, scenario_id),
+            execution_options={"yield_per": TIMELINE_STREAM_BATCH},
+        )
+        return (view_row(r) for r in res)
+    q = _timeline_query(db, project_id, f).yield_per(TIMELINE_STREAM_BATCH)
+    return (timeline_row(t) for t in q)
+
+
+def _stream_timeline(project_id: int, f: TaskFilter, source: str | None, scenario_id: int | None = None):
+    # Vlastita sesija: get_db se zatvara prije nego što StreamingResponse pošalje tijelo
+    db = SessionLocal()
+    try:
+        rows = _timeline_rows(db, project_id, f, source, scenario_id)
+        yield from ndjson_chunks(rows, batch=TIMELINE_STREAM_BATCH)
+    finally:
+        db.close()
+
+
 @router.get("/projects/{project_id}/tasks-timeline", response_model=List[TimelineTask])
 def project_tasks_timeline(
     project_id: int,
+    request: Request,
     response: Response,
     db: Session = Depends(get_db),
     gewerk: List[str] = Query(None),
@@ -96,153 +168,122 @@ def project_tasks_timeline(
     statuses: List[str] = Query(None, alias="status"),
     delayed: bool = Query(None),
     taskName: str = Query(None),
+    beschreibung: str = Query(None),
     top: List[str] = Query(None),
     ebene: List[str] = Query(None),
     stiege: List[str] = Query(None),
     bauteil: List[str] = Query(None),
     activity: List[str] = Query(None),
-    processModel: List[str] = Query(None)
+    processModel: List[str] = Query(None),
+    fmt: str = Query(None, alias="format"),  # "ndjson" → stream, jedan task po liniji
+    layout: str = Query(None),               # "columnar" → niz po polju + rječnici
+    source: str = Query(None),               # "view" → task_timeline_view, "core" → Core SELECT bez ORM-a
+    window: str = Query(None),               # prozor startDate/endDate nad "soll" (default), "ist" ili "any"
+    lod: str = Query(None),                  # "week" | "month" → agregirani barovi umjesto taskova
+    level: str = Query(None),                # za lod: "ebene" (default) | "top"
+    scenario: int = Query(None),             # Soll datumi iz "šta ako" scenarija (app/core/scenarios.py)
 ):
-    t0 = time.perf_counter()
-
-    # Osnovni query s joinovima
-    q = (
-        db.query(Task)
-        .filter(Task.project_id == project_id)
-        .options(
-            joinedload(Task.top)
-                .joinedload(Top.ebene)
-                .joinedload(Ebene.stiege)
-                .joinedload(Stiege.bauteil),
-            joinedload(Task.process_step).joinedload(ProcessStep.gewerk),
-            joinedload(Task.process_step).joinedload(ProcessStep.model),
-            joinedload(Task.sub),
-            load_only(
-                Task.id, Task.project_id, Task.top_id, Task.process_step_id,
-                Task.start_soll, Task.end_soll, Task.start_ist, Task.end_ist,
-                Task.beschreibung, Task.sub_id
-            ),
-        )
+    f = TaskFilter.from_params(
+        gewerk=gewerk, startDate=startDate, endDate=endDate, statuses=statuses,
+        delayed=delayed, taskName=taskName, top=top, ebene=ebene, stiege=stiege,
+        bauteil=bauteil, activity=activity, processModel=processModel,
+        beschreibung=beschreibung,
     )
 
-    # Primjeni filtere
-    if gewerk:
-        q = q.join(Task.process_step).join(ProcessStep.gewerk).filter(Gewerk.name.in_(gewerk))
-    
-    if startDate:
-        start_date = datetime.strptime(startDate, "%Y-%m-%d").date()
-        q = q.filter(Task.end_soll >= start_date)
-    
-    if endDate:
-        end_date = datetime.strptime(endDate, "%Y-%m-%d").date()
-        q = q.filter(Task.start_soll <= end_date)
-    
-    if statuses:
-        status_conditions = []
-        if "Erledigt" in statuses:
-            status_conditions.append(Task.end_ist.isnot(None))
-        if "In Bearbeitung" in statuses:
-            status_conditions.append(and_(Task.start_ist.isnot(None), Task.end_ist.is_(None)))
-        if "Offen" in statuses:
-            status_conditions.append(and_(Task.start_ist.is_(None), Task.end_ist.is_(None)))
-
-        if status_conditions:
-            q = q.filter(or_(*status_conditions))
-    
-    if delayed:
-        today = date.today()
-        q = q.filter(
-            or_(
-                and_(Task.end_ist.is_(None), Task.end_soll < today),
-                Task.end_ist > Task.end_soll
-            )
-        )
-    
-    if taskName:
-        q = q.join(Task.process_step).filter(ProcessStep.activity.ilike(f"%{taskName}%"))
-    
-    if top:
-        q = q.join(Task.top).filter(Top.name.in_(top))
-    
-    if ebene:
-        q = q.join(Task.top).join(Top.ebene).filter(Ebene.name.in_(ebene))
-    
-    if stiege:
-        q = q.join(Task.top).join(Top.ebene).join(Ebene.stiege).filter(Stiege.name.in_(stiege))
-    
-    if bauteil:
-        q = q.join(Task.top).join(Top.ebene).join(Ebene.stiege).join(Stiege.bauteil).filter(Bauteil.name.in_(bauteil))
-    
-    if activity:
-        q = q.join(Task.process_step).filter(ProcessStep.activity.in_(activity))
-    
-    if processModel:
-        q = q.join(Task.process_step).join(ProcessStep.model).filter(ProcessModel.name.in_(processModel))
-    
-    # 🔽🔽🔽 SORT 🔽🔽🔽
-    q = (
-        q.outerjoin(Task.top)
-         .outerjoin(Top.ebene)
-         .outerjoin(Ebene.stiege)
-         .outerjoin(Stiege.bauteil)
-         .order_by(
-             Bauteil.name.is_(None),  # prvo oni koji imaju bauteil
-             Bauteil.name,            # A, B, C...
-             Stiege.name.is_(None),
-             Stiege.name,             # Stiege 1, Stiege 2...
-             Ebene.name.is_(None),
-             Ebene.name,              # Ebene 1, Ebene 2...
-             Top.name                 # Top 1, Top 2, Top 10 (po abecedi/stringu)
-         )
+    scn = _scenario_or_404(db, project_id, scenario)
+    # delayed filter i "delayed" brojač lod barova gledaju današnji dan
+    etag = project_etag(
+        db, request, project_id, scenarios.etag_variant(scn) + day_variant(f.delayed or lod in LOD_BUCKETS),
     )
-    # 🔼🔼🔼 End SORT 🔼🔼🔼
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    # prozor datuma → ID-jevi iz in-memory indeksa intervala, redovi samo za njih
+    # (indeks zna samo bazne Soll datume: uz scenarij Soll prozor ostaje SQL predikat,
+    # a "any" spaja Ist iz indeksa sa Soll prozorom scenarija)
+    if scn is None or window == "ist":
+        f = narrow_window(db, project_id, f, window)
+    elif window == "any":
+        f = scenarios.narrow_window_any(db, project_id, scn.id, f)
+    f = narrow_search(db, project_id, f)
+
+    if scn is not None:
+        source = "core"  # datumi scenarija postoje samo u Core SELECT-u (outer join + COALESCE)
+
+    if lod in LOD_BUCKETS:
+        level = level if level in LOD_LEVELS else "ebene"
+        t_fetch_start = time.perf_counter()
+        # agregacija u bazi: GROUP BY (čvor, gewerk, bucket) – jedan red po baru
+        raw = db.execute(lod_select(project_id, f, level, scenario, lod, db.get_bind().dialect.name)).all()
+        t_fetch_ms = (time.perf_counter() - t_fetch_start) * 1000.0
+
+        t_build_start = time.perf_counter()
+        bars = lod_bars(raw)
+        t_build_ms = (time.perf_counter() - t_build_start) * 1000.0
+
+        return set_etag(ORJSONResponse(
+            {"lod": lod, "level": level, "tasks": sum(r.count for r in raw), "count": len(bars), "bars": bars},
+            headers={
+                "X-Items": str(len(bars)),
+                "X-FetchMs": f"{t_fetch_ms:.1f}",
+                "X-BuildMs": f"{t_build_ms:.1f}",
+            },
+        ), etag)
+
+    if wants_ndjson(fmt, request.headers.get("accept")):
+        return set_etag(
+            StreamingResponse(_stream_timeline(project_id, f, source, scenario), media_type=NDJSON_MEDIA_TYPE),
+            etag,
+        )
 
-    q = q.execution_options(stream_results=True)
+    if layout == "columnar":
+        t_build_start = time.perf_counter()
+        payload = columnar_payload(_timeline_rows(db, project_id, f, source, scenario))
+        t_build_ms = (time.perf_counter() - t_build_start) * 1000.0
+        return set_etag(ORJSONResponse(payload, headers={
+            "X-Items": str(payload["count"]),
+            "X-BuildMs": f"{t_build_ms:.1f}",
+        }), etag)
+
+    if source == "core":
+        # brzi put: tuple-i → dict → orjson, bez ORM objekata i bez druge validacije
+        t_fetch_start = time.perf_counter()
+        raw = db.execute(core_select(project_id, f, scenario)).all()
+        t_fetch_ms = (time.perf_counter() - t_fetch_start) * 1000.0
+
+        t_build_start = time.perf_counter()
+        rows = [view_row(r) for r in raw]
+        t_build_ms = (time.perf_counter() - t_build_start) * 1000.0
+
+        return set_etag(ORJSONResponse(rows, headers={
+            "X-Items": str(len(rows)),
+            "X-FetchMs": f"{t_fetch_ms:.1f}",
+            "X-BuildMs": f"{t_build_ms:.1f}",
+        }), etag)
+
+    if source == "view":
+        t_fetch_start = time.perf_counter()
+        rows = [view_row(r) for r in view_query(db, project_id, f)]
+        t_fetch_ms = (time.perf_counter() - t_fetch_start) * 1000.0
+
+        t_build_start = time.perf_counter()
+        result: list[TimelineTask] = [TimelineTask(**row) for row in rows]
+        t_build_ms = (time.perf_counter() - t_build_start) * 1000.0
+
+        response.headers["X-Items"] = str(len(result))
+        response.headers["X-FetchMs"] = f"{t_fetch_ms:.1f}"
+        response.headers["X-BuildMs"] = f"{t_build_ms:.1f}"
+        return result
+
+    q = _timeline_query(db, project_id, f)
 
-    # Ostali dio funkcije ostaje isti
     t_fetch_start = time.perf_counter()
     tasks = q.all()
     t_fetch_ms = (time.perf_counter() - t_fetch_start) * 1000.0
 
     t_build_start = time.perf_counter()
-    result: list[TimelineTask] = []
-    for t in tasks:
-        top = t.top
-        ebene = top.ebene if top else None
-        stiege = ebene.stiege if ebene else None
-        bauteil = stiege.bauteil if stiege else None
-
-        step = t.process_step
-        model = step.model if step else None
-        gewerk_obj = step.gewerk if step else None
-
-        wohnung = (top.name if (top and top.name) else (f"Top-{top.id}" if top else None))
-        farbe = getattr(gewerk_obj, "color", "#cccccc")
-        gewerk_name = getattr(gewerk_obj, "name", "Unbekannt")
-        sub_user = t.sub if t.sub_id else None
-
-        result.append(TimelineTask(
-            id=t.id,
-            task=step.activity if step else None,
-            wohnung=wohnung,
-            start_soll=t.start_soll,
-            end_soll=t.end_soll,
-            start_ist=t.start_ist,
-            end_ist=t.end_ist,
-            farbe=farbe,
-            gewerk_name=gewerk_name,
-            top=top.name if top else None,
-            ebene=ebene.name if ebene else None,
-            stiege=stiege.name if stiege else None,
-            bauteil=bauteil.name if bauteil else None,
-            process_step_id=step.id if step else None,
-            process_model=(model.name if model else None),
-            beschreibung=t.beschreibung,
-            sub_id=sub_user.id if sub_user else None,
-            sub_name=sub_user.name if sub_user else None,
-            top_id=t.top_id,
-            project_id=t.project_id,
-        ))
+    result: list[TimelineTask] = [TimelineTask(**timeline_row(t)) for t in tasks]
     t_build_ms = (time.perf_counter() - t_build_start) * 1000.0
 
     response.headers["X-Items"] = str(len(result))
@@ -252,28 +293,86 @@ def project_tasks_timeline(
     return result
 
 
+@router.get("/projects/{project_id}/tasks-timeline/facets")
+def project_tasks_timeline_facets(
+    project_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    gewerk: List[str] = Query(None),
+    startDate: str = Query(None),
+    endDate: str = Query(None),
+    statuses: List[str] = Query(None, alias="status"),
+    delayed: bool = Query(None),
+    taskName: str = Query(None),
+    beschreibung: str = Query(None),
+    top: List[str] = Query(None),
+    ebene: List[str] = Query(None),
+    stiege: List[str] = Query(None),
+    bauteil: List[str] = Query(None),
+    activity: List[str] = Query(None),
+    processModel: List[str] = Query(None),
+    window: str = Query(None),
+):
+    """Vrijednosti filtera s brojem taskova uz trenutni odabir (isti parametri kao /tasks-timeline)."""
+    f = TaskFilter.from_params(
+        gewerk=gewerk, startDate=startDate, endDate=endDate, statuses=statuses,
+        delayed=delayed, taskName=taskName, top=top, ebene=ebene, stiege=stiege,
+        bauteil=bauteil, activity=activity, processModel=processModel,
+        beschreibung=beschreibung,
+    )
+    etag = project_etag(db, request, project_id, day_variant(f.delayed))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    return set_etag(ORJSONResponse(project_facets(db, project_id, f, window)), etag)
+
+
+@router.get("/projects/{project_id}/tasks-timeline/changes")
+def project_tasks_timeline_changes(
+    project_id: int,
+    request: Request,
+    since: int = Query(..., ge=0),
+    db: Session = Depends(get_db),
+):
+    """
+    Delta za lokalnu kopiju timeline-a: redovi (oblik TimelineTask) promijenjeni
+    nakon revizije `since` + ID-jevi obrisanih. reset=True → klijent radi puni reload
+    (since je stariji od dnevnika ili iz nekog drugog stanja baze).
+    """
+    etag = project_etag(db, request, project_id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    revision = current_revision(db, project_id)
+    payload = {"revision": revision, "since": since, "reset": False, "upserted": [], "deleted": []}
+
+    if since > revision or since < revision - CHANGE_LOG_KEEP:
+        payload["reset"] = True
+        return set_etag(ORJSONResponse(payload), etag)
+
+    changed = changes_since(db, project_id, since) if since < revision else {}
+    ids = sorted(changed)
+    upserted: list[dict] = []
+    for i in range(0, len(ids), CHUNK):
+        chunk = ids[i:i + CHUNK]
+        upserted.extend(
+            view_row(r) for r in db.execute(core_select(project_id).where(Task.id.in_(chunk)))
+        )
+
+    # postojanje u bazi je mjerodavno (i za tombstone-ove i za kasnije premještene taskove)
+    alive = {row["id"] for row in upserted}
+    payload["upserted"] = upserted
+    payload["deleted"] = [tid for tid in ids if tid not in alive]
+
+    return set_etag(ORJSONResponse(payload, headers={"X-Items": str(len(upserted))}), etag)
+
+
 @router.get("/projects/{project_id}/has-tasks", response_model=bool)
 def has_tasks(project_id: int, db: Session = Depends(get_db)):
     count = db.query(Task).filter(Task.project_id == project_id).count()
     return count > 0
 
 
-def find_process_model(top: Top, db: Session):
-    if top.process_model_id:
-        return db.query(ProcessModel).filter_by(id=top.process_model_id).first()
-    ebene = db.query(Ebene).filter_by(id=top.ebene_id).first()
-    if ebene and ebene.process_model_id:
-        return db.query(ProcessModel).filter_by(id=ebene.process_model_id).first()
-    stiege = db.query(Stiege).filter_by(id=ebene.stiege_id).first() if ebene else None
-    if stiege and stiege.process_model_id:
-        return db.query(ProcessModel).filter_by(id=stiege.process_model_id).first()
-    bauteil = db.query(Bauteil).filter_by(id=stiege.bauteil_id).first() if stiege else None
-    if bauteil and bauteil.process_model_id:
-        return db.query(ProcessModel).filter_by(id=bauteil.process_model_id).first()
-    return None
-
-
-
 @router.post("/projects/{project_id}/sync-tasks", response_model=list[TaskRead])
 async def sync_tasks(project_id: int, request: Request, db: Session = Depends(get_db)):
     project = db.query(Project).filter_by(id=project_id).first()
@@ -291,21 +390,13 @@ async def sync_tasks(project_id: int, request: Request, db: Session = Depends(ge
     purge_top_ids = (payload or {}).get("purge_top_ids") or []
     top_ids = filters.get("topIds") or []
 
-    # 2) svi topovi u projektu (suženo po filterima)
-    tops_q = (
-        db.query(Top)
-        .join(Ebene)
-        .join(Stiege)
-        .join(Bauteil)
-        .filter(Bauteil.project_id == project_id)
-    )
+    # 2) svi topovi u projektu (suženo po filterima) – s hijerarhijom i modelom, jedan upit
     if top_ids:
         try:
             top_ids = [int(x) for x in top_ids]
         except Exception:
             pass
-        tops_q = tops_q.filter(Top.id.in_(top_ids))
-    tops = tops_q.all()
+    tops = load_tops(db, project_id, top_ids)
     # ograniči purge na već filtrirane TOP-ove (sigurnosna brana)
     allowed_top_ids = {t.id for t in tops}
     # ne purgaj nikad one koji imaju datum u start_map_top
@@ -317,82 +408,77 @@ async def sync_tasks(project_id: int, request: Request, db: Session = Depends(ge
 
     # PURGE: obriši sve taskove za topove bez datuma (ili kojima je datum obrisan)
     if safe_purge_ids:
-        db.query(Task).filter(
+        purge_q = db.query(Task).filter(
             Task.project_id == project_id,
             Task.top_id.in_(safe_purge_ids)
-        ).delete(synchronize_session=False)
+        )
+        purged_ids = [tid for (tid,) in purge_q.with_entities(Task.id).all()]
+        before = counters.snapshot(db, purged_ids)  # delete ide odmah u bazu
+        purge_q.delete(synchronize_session=False)
+        tasks_changed(db, project_id, purged_ids, before=before)
         db.commit()
 
 
+    job = request.query_params.get("job")  # napredak: GET /generate-jobs/{job}
+    with progress.tracking(job, "sync", project_id):
+        # 3) modeli, koraci i postojeći taskovi – nekoliko upita za sve TOP-ove
+        calendar = project_calendar(db, project_id)
+        model_names, templates = load_templates(db, (t.model_id for t in tops))
 
-    created_tasks: list[Task] = []
-
-    for top in tops:
-        model = find_process_model(top, db)
-        if not model:
-            continue
-
-        existing_tasks = db.query(Task).filter_by(top_id=top.id).all()
-        existing_task_map = {t.process_step_id: t for t in existing_tasks}
-
-        # 3) bazni datum
-        base_str = start_map_top.get(str(top.id))
-        if not base_str:
-            # NEMA datuma → preskoči generiranje za ovaj TOP (ne koristi project.start_date!)
-            continue
+        # bazni datum po TOP-u (samo TOP-ovi s modelom i datumom iz mape)
+        bases: dict[int, tuple[int, date]] = {}
+        for top in tops:
+            if top.model_id not in model_names:
+                continue
+            base_str = start_map_top.get(str(top.id))
+            if not base_str:
+                # NEMA datuma → preskoči generiranje za ovaj TOP (ne koristi project.start_date!)
+                continue
+            try:
+                bases[top.id] = (top.model_id, date.fromisoformat(base_str[:10]))
+            except Exception:
+                # nevažeći format → isto preskoči
+                continue
 
-        try:
-            base_date = date.fromisoformat(base_str[:10])
-        except Exception:
-            # nevažeći format → isto preskoči
-            continue
+        # 4) plan: pomaci iz predloška modela + kalendar projekta, svi TOP-ovi odjednom
+        planned = await plan_tops_async(calendar, templates, bases, job)
+        existing = load_existing(db, project_id, list(bases))
+
+        new_rows: list[dict] = []
+        date_updates: list[dict] = []
+        stale_ids: list[int] = []
+
+        for top_id, (model_id, _) in bases.items():
+            steps = templates[model_id].steps
+            expected_step_ids = {s.id for s in steps}
+            existing_tasks = existing.get(top_id, [])
+            existing_task_map = {t.process_step_id: t for t in existing_tasks}
+            starts, ends = planned[top_id]
+
+            for step, start_soll, end_soll in zip(steps, starts, ends):
+                task = existing_task_map.get(step.id)
+                if not task:
+                    new_rows.append(new_task_row(project_id, top_id, step.id, start_soll, end_soll))
+                elif task.start_ist is None and (task.start_soll, task.end_soll) != (start_soll, end_soll):
+                    date_updates.append({"b_id": task.id, "b_start": start_soll, "b_end": end_soll})
+
+            # 5) ukloni taskove koji više nisu u modelu
+            stale_ids.extend(
+                old.id for old in existing_tasks
+                if old.process_step_id not in expected_step_ids and old.start_ist is None
+            )
 
-        current_date = next_workday(base_date)
-
-
-        # 4) generisanje taskova po koracima
-        steps = sorted(model.steps, key=lambda s: (s.order if s.order is not None else s.id))
-        expected_step_ids = {s.id for s in steps}
-
-        for step in steps:
-            task = existing_task_map.get(step.id)
-            duration = step.duration_days or 1
-            start_soll = next_workday(current_date)
-            end_soll = add_workdays(start_soll, duration)
-
-            if not task:
-                task = Task(
-                    top_id=top.id,
-                    process_step_id=step.id,
-                    start_soll=start_soll,
-                    end_soll=end_soll,
-                    status="offen",
-                    project_id=project_id,
-                )
-                db.add(task)
-                db.flush()
-                created_tasks.append(task)
-            else:
-                if task.start_ist is None:
-                    changed = False
-                    if task.start_soll != start_soll:
-                        task.start_soll = start_soll
-                        changed = True
-                    if task.end_soll != end_soll:
-                        task.end_soll = end_soll
-                        changed = True
-                    if changed:
-                        db.add(task)
-
-            if not getattr(step, "parallel", False):
-                current_date = next_workday(end_soll + timedelta(days=1))
-
-        # 5) ukloni taskove koji više nisu u modelu
-        for old in existing_tasks:
-            if old.process_step_id not in expected_step_ids and old.start_ist is None:
-                db.delete(old)
+        progress.update(job, phase="write")
 
-    db.commit()
+        # 6) upis u serijama; brojači se snimaju prije (UPDATE/DELETE idu odmah u bazu)
+        touched_ids = [r["b_id"] for r in date_updates] + stale_ids
+        before = counters.snapshot(db, touched_ids)
+        update_soll_dates(db, date_updates)
+        delete_tasks(db, stale_ids)
+        created = insert_tasks(db, new_rows) if new_rows else {}
+        tasks_changed(db, project_id, touched_ids + list(created.values()), before=before)
+        db.commit()
+        created_tasks = load_tasks(db, created.values())
     log_protocol(
         db, request,
         action="task.sync", ok=True, status_code=200,
@@ -404,79 +490,49 @@ async def sync_tasks(project_id: int, request: Request, db: Session = Depends(ge
 
 
 @router.get("/projects/{project_id}/task-stats")
-def project_task_stats(project_id: int, db: Session = Depends(get_db)):
-    # Učitaj sve taskove po projektu direktno
-    tasks = db.query(Task).filter(Task.project_id == project_id).all()
+def project_task_stats(project_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    etag = project_etag(db, request, project_id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
 
-    # Ukupan broj taskova
-    total = len(tasks)
-    done = sum(1 for t in tasks if t.status == "done")
-    in_progress = sum(1 for t in tasks if t.status == "in_progress")
-    offen = sum(1 for t in tasks if t.status == "offen")
-    percent_done = round((done / total) * 100, 1) if total else 0
+    return stats_engine.task_status_stats(db, project_id)
 
-    # Grupisanje po gewerk (ako postoji)
-    gewerk_stats = {}
-    for task in tasks:
-        if not task.process_step or not task.process_step.gewerk:
-            continue  # preskoči ako fali veza
 
-        name = task.process_step.gewerk.name
 
-        if name not in gewerk_stats:
-            gewerk_stats[name] = {"done": 0, "in_progress": 0, "offen": 0}
+@router.get("/projects/{project_id}/progress-curve")
+def get_progress_curve(
+    project_id: int,
+    request: Request,
+    response: Response,
+    scenario: Optional[int] = Query(None),
+    db: Session = Depends(get_db),
+):
+    scn = _scenario_or_404(db, project_id, scenario)
+    etag = project_etag(db, request, project_id, scenarios.etag_variant(scn))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
 
-        if task.status in gewerk_stats[name]:
-            gewerk_stats[name][task.status] += 1
+    return stats_engine.progress_curve(db, project_id, scenario)
 
-    return {
-        "total": total,
-        "done": done,
-        "in_progress": in_progress,
-        "offen": offen,
-        "percent_done": percent_done,
-        "by_gewerk": [
-            {"gewerk": name, **counts} for name, counts in gewerk_stats.items()
-        ]
-    }
+def _task_json(t: Task) -> dict:
+    return TaskRead.model_validate(t).model_dump(mode="json", by_alias=True)
 
 
+def _version_conflict(task: Task | None) -> ORJSONResponse:
+    """409 + trenutno stanje taska (klijent ga preuzme umjesto punog reload-a)."""
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task nicht gefunden")
+    return ORJSONResponse(
+        {"detail": "Task wurde zwischenzeitlich geändert", "current": _task_json(task)},
+        status_code=409,
+        headers={"ETag": version_etag(task.version)},
+    )
 
-@router.get("/projects/{project_id}/progress-curve")
-def get_progress_curve(project_id: int, db: Session = Depends(get_db)):
-    tasks = db.query(Task).filter(Task.project_id == project_id).all()
-
-    data = {}
-
-    for task in tasks:
-        # Soll = planirano
-        soll = task.start_soll or task.end_soll
-        if soll:
-            week = soll.isocalendar()[1]
-            year = soll.isocalendar()[0]
-            key = f"{year}-KW{week}"
-            data.setdefault(key, {"soll": 0, "ist": 0})
-            data[key]["soll"] += 1
-
-        # Ist = stvarno završeno
-        ist = task.end_ist or task.start_ist
-        if ist:
-            week = ist.isocalendar()[1]
-            year = ist.isocalendar()[0]
-            key = f"{year}-KW{week}"
-            data.setdefault(key, {"soll": 0, "ist": 0})
-            data[key]["ist"] += 1
-
-    sorted_keys = sorted(data.keys())
-
-    return {
-        "labels": sorted_keys,
-        "soll": [data[k]["soll"] for k in sorted_keys],
-        "ist": [data[k]["ist"] for k in sorted_keys],
-    }
 
 @router.put("/tasks/{task_id}", response_model=TaskRead)
-def update_task(task_id: int, request: Request, task_data: TaskUpdate, db: Session = Depends(get_db)):
+def update_task(task_id: int, request: Request, response: Response, task_data: TaskUpdate, db: Session = Depends(get_db)):
     task = db.query(Task).filter(Task.id == task_id).first()
     updates = task_data.dict(exclude_unset=True)  # samo poslana polja
     diff = compute_diff(task, updates)
@@ -484,10 +540,28 @@ def update_task(task_id: int, request: Request, task_data: TaskUpdate, db: Sessi
     if not task:
         raise HTTPException(status_code=404, detail="Task nicht gefunden")
 
+    # If-Match: "<verzija>" → upis samo ako task nije mijenjan u međuvremenu
+    try:
+        expected = if_match_version(request)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Ungültiger If-Match Header")
+    if expected is not None and expected != task.version:
+        return _version_conflict(task)
+
+    old_project_id = task.project_id
     for attr, value in task_data.dict(exclude_unset=True).items():
         setattr(task, attr, value)
 
-    db.commit()
+    try:
+        # flush: UPDATE ... WHERE version = <učitana> (Task.__mapper_args__)
+        tasks_changed(db, old_project_id, [task.id])
+        if task.project_id != old_project_id:
+            # premješten: u starom projektu tombstone, u novom upsert
+            tasks_changed(db, task.project_id, [task.id])
+        db.commit()
+    except StaleDataError:
+        db.rollback()
+        return _version_conflict(db.get(Task, task_id))
     log_protocol(
         db, request,
         action="task.update", ok=True, status_code=200,
@@ -497,7 +571,7 @@ def update_task(task_id: int, request: Request, task_data: TaskUpdate, db: Sessi
         },
     )
     db.refresh(task)
-    
+    response.headers["ETag"] = version_etag(task.version)
     return task
 
 @router.delete("/tasks/{task_id}")
@@ -506,6 +580,7 @@ def delete_task(task_id: int, request: Request, db: Session = Depends(get_db)):
     if not task:
         raise HTTPException(status_code=404, detail="Task nicht gefunden")
     db.delete(task)
+    tasks_changed(db, task.project_id, [task_id])
     db.commit()
     log_protocol(db, request, action="task.delete", ok=True, status_code=200,
                  details={"task_id": task.id})
@@ -522,61 +597,15 @@ def list_subs(db: Session = Depends(get_db)):
 
 @router.patch("/projects/{project_id}/tasks/bulk")
 def bulk_update_tasks(project_id: int, request: Request, body: BulkBody, db: Session = Depends(get_db)):
-    # Bazni query za sve taskove u projektu
-    q = db.query(Task).filter(Task.project_id == project_id)
-
-    # Po ID-jevima
-    if body.ids:
-        q = q.filter(Task.id.in_(body.ids))
-
-    # Po filterima (isto kao u /tasks-timeline) + topIds
-    f = body.filters
-    if f:
-        if getattr(f, "topIds", None):
-            q = q.filter(Task.top_id.in_(f.topIds))  # ⬅️ NOVO
-        if f.gewerk:
-            q = q.join(Task.process_step).join(ProcessStep.gewerk).filter(Gewerk.name.in_(f.gewerk))
-        if f.status:
-            conds = []
-            if "Erledigt" in f.status:
-                conds.append(Task.end_ist.isnot(None))
-            if "In Bearbeitung" in f.status:
-                conds.append(and_(Task.start_ist.isnot(None), Task.end_ist.is_(None)))
-            if "Offen" in f.status:
-                conds.append(and_(Task.start_ist.is_(None), Task.end_ist.is_(None)))
-            if conds:
-                q = q.filter(or_(*conds))
-        if f.startDate:
-            q = q.filter(Task.end_soll >= f.startDate)
-        if f.endDate:
-            q = q.filter(Task.start_soll <= f.endDate)
-        if f.delayed:
-            today = date.today()
-            q = q.filter(or_(
-                and_(Task.end_ist.is_(None), Task.end_soll < today),
-                Task.end_ist > Task.end_soll
-            ))
-        if f.taskName:
-            q = q.join(Task.process_step).filter(ProcessStep.activity.ilike(f"%{f.taskName}%"))
-        if f.tops:
-            q = q.join(Task.top).filter(Top.name.in_(f.tops))
-        if f.ebenen:
-            q = q.join(Task.top).join(Top.ebene).filter(Ebene.name.in_(f.ebenen))
-        if f.stiegen:
-            q = q.join(Task.top).join(Top.ebene).join(Ebene.stiege).filter(Stiege.name.in_(f.stiegen))
-        if f.bauteile:
-            q = q.join(Task.top).join(Top.ebene).join(Ebene.stiege).join(Stiege.bauteil).filter(Bauteil.name.in_(f.bauteile))
-        if f.activities:
-            q = q.join(Task.process_step).filter(ProcessStep.activity.in_(f.activities))
-        if f.processModels:
-            q = q.join(Task.process_step).join(ProcessStep.model).filter(ProcessModel.name.in_(f.processModels))
+    # Svi taskovi u projektu, po ID-jevima i/ili filterima
+    # (isti filter-engine kao /tasks-timeline, uklj. topIds)
+    f = narrow_search(db, project_id, TaskFilter.from_bulk(body.filters, ids=body.ids))
 
     # Ako nema update dijela – nema posla
     if not body.update:
         return {"betroffen": 0}
 
     u = body.update
-    updated_ids: list[int] = []
 
     # 1) Ako se mijenja samo sub_id (tvoj postojeći slučaj)
     if u.sub_id is not None and all(getattr(u, k, None) is None for k in ("start_ist", "end_ist", "status")):
@@ -585,112 +614,102 @@ def bulk_update_tasks(project_id: int, request: Request, body: BulkBody, db: Ses
             raise HTTPException(status_code=404, detail="Subunternehmen (User) nicht gefunden")
         if (getattr(sub_user, "role", None) or "").lower() != "sub":
             raise HTTPException(status_code=400, detail="Angegebener Benutzer ist kein Subunternehmen")
-        ids = [row[0] for row in q.with_entities(Task.id).distinct().all()]
+        ids = apply_bulk_update(db, project_id, f, *bulk_values(sub_id=u.sub_id))
         if not ids:
             return {"betroffen": 0}
-        db.query(Task).filter(Task.id.in_(ids)).update({"sub_id": u.sub_id}, synchronize_session=False)
+        tasks_changed(db, project_id, ids)
         db.commit()
         return {"betroffen": len(ids)}
 
-    # 2) U suprotnom: podrži start_ist / end_ist / status (uklj. __COPY__*)
-    tasks = q.all()
-    for t in tasks:
-        changed = False
-
-        # start_ist
-        if getattr(u, "start_ist", None) is not None:
-            if isinstance(u.start_ist, str) and u.start_ist == "__COPY__start_soll":
-                if t.start_soll:
-                    t.start_ist = t.start_soll
-                    changed = True
-            else:
-                d = _to_date(u.start_ist)
-                if d:
-                    t.start_ist = d
-                    changed = True
-
-        # end_ist
-        if getattr(u, "end_ist", None) is not None:
-            if isinstance(u.end_ist, str) and u.end_ist == "__COPY__end_soll":
-                if t.end_soll:
-                    t.end_ist = t.end_soll
-                    changed = True
-            else:
-                d = _to_date(u.end_ist)
-                if d:
-                    t.end_ist = d
-                    changed = True
-
-        # status
-        if getattr(u, "status", None) is not None:
-            t.status = u.status
-            changed = True
-
-        # sub_id (kombinovano sa gore navedenim)
-        if getattr(u, "sub_id", None) is not None:
-            t.sub_id = u.sub_id
-            changed = True
-
-        if changed:
-            updated_ids.append(t.id)
-            db.add(t)
+    # 2) U suprotnom: start_ist / end_ist / status (uklj. __COPY__*) kao jedan UPDATE –
+    #    __COPY__ ide u SQL kao COALESCE(start_soll, start_ist), bez učitavanja taskova
+    values, extra = bulk_values(
+        start_ist=u.start_ist if u.start_ist == COPY_START_SOLL else _to_date(u.start_ist),
+        end_ist=u.end_ist if u.end_ist == COPY_END_SOLL else _to_date(u.end_ist),
+        status=u.status,
+        sub_id=u.sub_id,
+    )
+    updated_ids = apply_bulk_update(db, project_id, f, values, extra)
 
+    if updated_ids:
+        tasks_changed(db, project_id, updated_ids)
     db.commit()
     return {"betroffen": len(updated_ids), "ids": updated_ids}
 
 
 
-# ===== Zeitsprung / skip-window ============================================
+def _batch_conflict(db: Session, stale: list[int]) -> ORJSONResponse:
+    """409 za batch + trenutno stanje zastarjelih taskova."""
+    return ORJSONResponse(
+        {"detail": "Task wurde zwischenzeitlich geändert",
+         "conflicts": [_task_json(t) for t in load_tasks(db, stale)]},
+        status_code=409,
+    )
 
-class SkipWindowFilters(BaseModel):
-    topIds: Optional[list[int]] = None 
-    top: Optional[list[str]] = None
-    ebene: Optional[list[str]] = None
-    stiege: Optional[list[str]] = None
-    bauteil: Optional[list[str]] = None
-    gewerk: Optional[list[str]] = None
-    activity: Optional[list[str]] = None
-    processModel: Optional[list[str]] = None
-
-class SkipWindowRequest(BaseModel):
-    start: date
-    end: date
-    skip_weekends: bool = True
-    filters: Optional[SkipWindowFilters] = None
-
-def _ranges_overlap(a_start: date | None, a_end: date | None,
-                    b_start: date, b_end: date) -> bool:
-    if a_start is None or a_end is None:
-        return False
-    return a_start <= b_end and b_start <= a_end
-
-def _count_weekend_days(start: date, end: date) -> int:
-    if end < start:
-        return 0
-    days = (end - start).days + 1
-    wend = 0
-    for i in range(days):
-        d = start + timedelta(days=i)
-        if d.weekday() >= 5:  # 5=Sat, 6=Sun
-            wend += 1
-    return wend
-
-def _overlaps(a_start: date | None, a_end: date | None, b_start: date, b_end: date) -> bool:
-    if not a_start or not a_end:
-        return False
-    # intervali inkluzivni po danima
-    return not (a_end < b_start or a_start > b_end)
-
-def _next_monday(d: date) -> tuple[date, int]:
+
+@router.patch("/projects/{project_id}/tasks/batch")
+def batch_update_tasks(project_id: int, request: Request, items: List[TaskBatchItem], db: Session = Depends(get_db)):
     """
-    Ako d padne na vikend, vraća prvi ponedjeljak i koliko je dana pomaknuto.
-    Inače vraća (d, 0).
+    Više djelimičnih izmjena (npr. Gantt drag više barova) odjednom: sve se
+    validira zajedno, upis je executemany UPDATE po PK, a protokol dobije
+    jedan zapis s diffom po tasku – sve u jednoj transakciji.
     """
-    if d.weekday() < 5:
-        return d, 0
-    # subota=5 -> +2, nedjelja=6 -> +1
-    add = 7 - d.weekday()
-    return d + timedelta(days=add), add
+    if len(items) > task_batch.MAX_BATCH:
+        raise HTTPException(status_code=400, detail=f"Zu viele Tasks (max. {task_batch.MAX_BATCH})")
+
+    counts = Counter(i.id for i in items)
+    dupes = sorted(tid for tid, n in counts.items() if n > 1)
+    if dupes:
+        raise HTTPException(status_code=400, detail=f"Task mehrfach im Batch: {dupes[:20]}")
+
+    current = task_batch.load_current(db, project_id, counts)
+    missing = sorted(counts.keys() - current.keys())
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Task nicht gefunden: {missing[:20]}")
+
+    # per-item "version" (kao If-Match): zastarjela verzija → 409 za cijeli batch
+    versions = {i.id: i.version for i in items if i.version is not None}
+    stale = sorted(tid for tid, v in versions.items() if v != current[tid].version)
+    if stale:
+        return _batch_conflict(db, stale)
+
+    changes: dict[int, dict] = {}
+    diffs: list[dict] = []
+    errors: list[str] = []
+    for item in items:
+        updates = item.dict(exclude_unset=True)
+        updates.pop("id", None)
+        updates.pop("version", None)
+        if updates.pop("project_id", project_id) != project_id:
+            errors.append(f"Task {item.id}: Projektwechsel nicht erlaubt")
+            continue
+        row = current[item.id]
+        errors.extend(f"Task {item.id}: {e}" for e in task_batch.soll_errors(row, updates))
+        diff = compute_diff(row, updates)
+        changes[item.id] = {k: updates[k] for k in diff}
+        if diff:
+            diffs.append({"task_id": item.id, "changes": diff})
+    if errors:
+        raise HTTPException(status_code=400, detail="; ".join(errors[:20]))
+
+    ids = task_batch.apply_changes(db, changes, versions)
+    if ids is None:
+        # drugi upis između provjere i UPDATE-a (version u WHERE-u nije pogođen)
+        db.rollback()
+        fresh = task_batch.load_current(db, project_id, versions)
+        return _batch_conflict(db, sorted(
+            tid for tid, v in versions.items() if tid not in fresh or fresh[tid].version != v
+        ))
+    if ids:
+        tasks_changed(db, project_id, ids)
+    # log_protocol commit-a i izmjene taskova → jedna transakcija
+    log_protocol(db, request, action="task.batch", ok=True, status_code=200,
+                 details={"project_id": project_id, "count": len(ids), "tasks": diffs})
+    return {"betroffen": len(ids), "ids": ids, "tasks": [TaskRead.model_validate(t) for t in load_tasks(db, ids)]}
+
+
+
+# ===== Zeitsprung / skip-window ============================================
 
 @router.post("/projects/{project_id}/schedule/skip-window")
 def schedule_skip_window(
@@ -707,163 +726,83 @@ def schedule_skip_window(
     if shift_days <= 0:
         return {"moved": 0, "days_shifted": 0}
 
-    # helper: ako padne na vikend, pomjeri na ponedjeljak i vrati koliko je pomaknuto
-    def _bump_if_weekend(d: date) -> tuple[date, int]:
-        wd = d.weekday()  # 0=Mon ... 5=Sat 6=Sun
-        if wd < 5:
-            return d, 0
-        add = 7 - wd        # Sat->2, Sun->1
-        return d + timedelta(days=add), add
-
-    # 2) bazni query
-    q = db.query(Task).filter(Task.project_id == project_id)
-
-    # 3) filteri (uklj. topIds)
-    f = payload.filters
-    if f:
-        if getattr(f, "topIds", None):
-            q = q.filter(Task.top_id.in_(f.topIds))
-        if getattr(f, "top", None):
-            q = q.join(Task.top).filter(Top.name.in_(f.top))
-        if getattr(f, "ebene", None):
-            q = q.join(Task.top).join(Top.ebene).filter(Ebene.name.in_(f.ebene))
-        if getattr(f, "stiege", None):
-            q = q.join(Task.top).join(Top.ebene).join(Ebene.stiege).filter(Stiege.name.in_(f.stiege))
-        if getattr(f, "bauteil", None):
-            q = q.join(Task.top).join(Top.ebene).join(Ebene.stiege).join(Stiege.bauteil).filter(Bauteil.name.in_(f.bauteil))
-        if getattr(f, "gewerk", None):
-            q = q.join(Task.process_step).join(ProcessStep.gewerk).filter(Gewerk.name.in_(f.gewerk))
-        if getattr(f, "activity", None):
-            q = q.join(Task.process_step).filter(ProcessStep.activity.in_(f.activity))
-        if getattr(f, "processModel", None):
-            q = q.join(Task.process_step).join(ProcessStep.model).filter(ProcessModel.name.in_(f.processModel))
-
-    moved = 0
-    for t in q.all():
-        s = t.start_soll
-        e = t.end_soll
-        if not s and not e:
-            continue
+    # 2) filteri (uklj. topIds); pomjeramo samo taskove koji PREKLAPAJU prozor
+    f = TaskFilter.from_skip_window(payload.filters)
 
-        # pomjeramo samo one koji PREKLAPAJU prozor (ostavi ovako ako ti ovakav scope odgovara)
-        if _ranges_overlap(s, e, payload.start, payload.end):
-            ns = s + timedelta(days=shift_days) if s else None
-            ne = e + timedelta(days=shift_days) if e else None
-
-            # poslije pomaka: ako treba preskočiti vikend, gurni start na ponedjeljak
-            if payload.skip_weekends and ns is not None:
-                ns2, extra = _bump_if_weekend(ns)
-                if extra:
-                    ns = ns2
-                    if ne is not None:
-                        ne = ne + timedelta(days=extra)
-
-            if ns is not None:
-                t.start_soll = ns
-            if ne is not None:
-                t.end_soll = ne
-            moved += 1
+    # 3) novi start: + dužina prozora; ako padne na neradni dan (vikend ili praznik
+    #    projekta), gurni ga na prvi radni dan – kraj se pomjera za isto
+    cal = project_calendar(db, project_id) if payload.skip_weekends else None
 
+    if payload.dry_run:
+        tasks = preview_skip_window(db, project_id, f, payload.start, payload.end, cal)
+        return ORJSONResponse({
+            "moved": len(tasks), "days_shifted": shift_days, "dry_run": True, "tasks": tasks,
+        })
+
+    moved_ids = apply_skip_window(db, project_id, f, payload.start, payload.end, cal)
+    if moved_ids:
+        tasks_changed(db, project_id, moved_ids)
     db.commit()
-    return {"moved": moved, "days_shifted": shift_days}
+    return {"moved": len(moved_ids), "days_shifted": shift_days, "ids": moved_ids}
 
 
 
 @router.get("/projects/{project_id}/stats")
 def project_stats(
     project_id: int,
+    request: Request,
     until: Optional[date] = Query(None),
+    scenario: Optional[int] = Query(None),
     db: Session = Depends(get_db),
     response: Response = None,
 ):
+    scn = _scenario_or_404(db, project_id, scenario)
+    etag = project_etag(db, request, project_id, scenarios.etag_variant(scn))
+    if etag_matches(request, etag):
+        return not_modified(etag)
     if response is not None:
-        response.headers["X-Stats-Impl"] = "task.py-v2"  # 👈 marker
-    q = (
-        db.query(Task)
-        .join(Task.process_step, isouter=True)
-        .join(ProcessStep.gewerk, isouter=True)
-        .options(
-            joinedload(Task.process_step).joinedload(ProcessStep.gewerk),
-            load_only(
-                Task.id, Task.project_id, Task.start_soll, Task.end_soll,
-                Task.start_ist, Task.end_ist
-            ),
-        )
-        .filter(Task.project_id == project_id)
-    )
-    tasks: list[Task] = q.all()
+        response.headers["X-Stats-Impl"] = "sql-v3"  # 👈 marker (app/core/stats.py)
+        set_etag(response, etag)
+    if until is None:
+        # bez "until" status ovisi samo o IST datumima – scenarij (Soll) ga ne mijenja
+        return counters.counter_stats(db, project_id)  # inkrementalni brojači
+    return stats_engine.project_stats(db, project_id, until, scenario)
 
-    DEFAULT_G = "Allgemein"
 
-    # ⚠️ fallback na "Allgemein" umjesto "" (prazno)
-    def gname_of(t: Task) -> str:
-        try:
-            name = (t.process_step.gewerk.name or "").strip()
-        except Exception:
-            name = ""
-        return name or DEFAULT_G
-
-    # skup SVIH gewerka u projektu – uvijek formiraj listu lijevo
-    all_gewerke: set[str] = set()
-    for t in tasks:
-        all_gewerke.add(gname_of(t))  # ⚠️ već normalizirano
-
-    total = done = in_prog = offen = 0
-    by_gewerk: dict[str, dict] = {}
-
-    for t in tasks:
-        s_soll, e_soll = t.start_soll, t.end_soll
-        s_ist,  e_ist  = t.start_ist,  t.end_ist
+@router.get("/projects/{project_id}/stats/history")
+def project_stats_history(
+    project_id: int,
+    from_: Optional[date] = Query(None, alias="from"),
+    to: Optional[date] = Query(None),
+    gewerk: List[str] = Query(None),
+    db: Session = Depends(get_db),
+):
+    """Trend / burndown iz dnevnih snimaka (project_stats_daily)."""
+    return ORJSONResponse(snapshots.history(db, project_id, from_, to, gewerk))
 
-        if until:
-            # preskoči čisto buduće taskove bez IST-a
-            if (not s_ist) and (not e_ist) and (s_soll and s_soll > until):
-                continue
 
-            if e_ist and e_ist <= until:
-                cls = "done"
-            elif s_ist and s_ist <= until and (not e_ist or e_ist > until):
-                cls = "in_progress"
-            else:
-                if (s_soll is None) or (s_soll and s_soll <= until):
-                    cls = "offen"
-                else:
-                    continue
-        else:
-            if e_ist:
-                cls = "done"
-            elif s_ist and not e_ist:
-                cls = "in_progress"
-            else:
-                cls = "offen"
-
-        total += 1
-        if cls == "done":
-            done += 1
-        elif cls == "in_progress":
-            in_prog += 1
-        else:
-            offen += 1
-
-        gname = gname_of(t)  # ⚠️ uvijek normalizirano ime
-        if gname not in by_gewerk:
-            by_gewerk[gname] = {"gewerk": gname, "done": 0, "in_progress": 0, "offen": 0}
-        by_gewerk[gname][cls] += 1
-
-    # ⚠️ osiguraj 0/0/0 zapise i za gewerke bez taskova u “until” rezu
-    for gname in sorted(all_gewerke):
-        by_gewerk.setdefault(gname, {"gewerk": gname, "done": 0, "in_progress": 0, "offen": 0})
-
-    percent_done = round((done / total) * 100, 2) if total else 0.0
-
-    # (po želji sortiraj po imenu)
-    by_gewerk_list = sorted(by_gewerk.values(), key=lambda r: r["gewerk"].lower())
-
-    return {
-        "total": total,
-        "done": done,
-        "in_progress": in_prog,
-        "offen": offen,
-        "percent_done": percent_done,
-        "by_gewerk": by_gewerk_list,  # ⚠️ nikad prazni string kao ime
-    }
+@router.get("/projects/{project_id}/stats/sweep")
+def project_stats_sweep(
+    project_id: int,
+    request: Request,
+    from_: Optional[date] = Query(None, alias="from"),
+    to: Optional[date] = Query(None),
+    step: str = Query("day", pattern="^(day|week)$"),
+    gewerk: List[str] = Query(None),
+    scenario: Optional[int] = Query(None),
+    db: Session = Depends(get_db),
+):
+    """Kao /stats?until=<dan> za svaki dan (ili sedmicu) u rasponu – jedan NumPy prolaz."""
+    scn = _scenario_or_404(db, project_id, scenario)
+    etag = project_etag(db, request, project_id, scenarios.etag_variant(scn))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    if from_ and to and from_ > to:
+        raise HTTPException(status_code=400, detail="'from' darf nicht nach 'to' liegen")
+    result = stats_sweep.stats_sweep(db, project_id, from_, to, step, gewerk, scenario)
+    if result is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Zeitraum zu groß (max. {stats_sweep.MAX_POINTS} Punkte) – bitte 'step=week' verwenden",
+        )
+    return set_etag(ORJSONResponse(result), etag)
@@ -1,12 +1,16 @@
 # app/routes/task_structure.py
-from fastapi import APIRouter, Depends, Query, HTTPException, Request
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
+from sqlalchemy.orm import Session, contains_eager
 from datetime import datetime, date
 from typing import Optional, Dict, Tuple, List
 from app.database import get_db
-from app.models import Task, Top, Ebene, Stiege, Bauteil, ProcessStep, Gewerk, ProcessModel
+from app.models import Task, Top, Ebene, Stiege, ProcessStep
 from app.schemas.structure_timeline import StructureTimelineResponse, StructSegment, StructActivity
+from app.core.revision import project_etag, day_variant, etag_matches, not_modified, set_etag
+from app.core.natural_sort import natural_key
+from app.core.filters import TaskFilter, apply_joins, filter_tasks
+from app.core.interval_index import narrow_window
+from app.core.search import narrow_search
 
 router = APIRouter()
 
@@ -26,6 +30,8 @@ def _parse_date(s: Optional[str]) -> Optional[date]:
 @router.get("/projects/{project_id}/structure-timeline", response_model=StructureTimelineResponse)
 def structure_timeline(
     project_id: int,
+    request: Request,
+    response: Response,
     level: str = Query("ebene"),   
     gewerk: Optional[List[str]] = Query(None),
     status: Optional[List[str]] = Query(None),
@@ -33,6 +39,7 @@ def structure_timeline(
     endDate: Optional[str] = Query(None),
     delayed: Optional[bool] = Query(None),
     taskName: Optional[str] = Query(None),
+    beschreibung: Optional[str] = Query(None),
     topIds: Optional[List[int]] = Query(None),
     tops: Optional[List[str]] = Query(None),
     ebenen: Optional[List[str]] = Query(None),
@@ -40,66 +47,32 @@ def structure_timeline(
     bauteile: Optional[List[str]] = Query(None),
     activities: Optional[List[str]] = Query(None),
     processModels: Optional[List[str]] = Query(None),
+    window: Optional[str] = Query(None),   # "soll" (default) | "ist" | "any"
     db: Session = Depends(get_db),
 ):
+    etag = project_etag(db, request, project_id, day_variant())  # "delayed" po grupi gleda današnji dan
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
     if level not in ("ebene", "stiege", "bauteil"):
         level = "ebene"
     start_d = _parse_date(startDate)
     end_d   = _parse_date(endDate)
-    # bazni upit
-    q = (
-        db.query(Task)
-        .join(Task.process_step, isouter=True)
-        .join(Task.top, isouter=True)
-        .join(Top.ebene, isouter=True)
-        .join(Ebene.stiege, isouter=True)
-        .join(Stiege.bauteil, isouter=True)
-        .options(
-            joinedload(Task.process_step).joinedload(ProcessStep.gewerk),
-            joinedload(Task.top).joinedload(Top.ebene).joinedload(Ebene.stiege).joinedload(Stiege.bauteil),
-        )
-        .filter(Task.project_id == project_id)
+    # bazni upit – top-hijerarhija i step/gewerk joinani jednom, *isti* filteri kao /tasks-timeline
+    have = ("top", "ebene", "stiege", "bauteil", "step", "gewerk")
+    q = apply_joins(db.query(Task).filter(Task.project_id == project_id), have)
+    f = TaskFilter.from_params(
+        gewerk=gewerk, startDate=start_d, endDate=end_d, statuses=status,
+        delayed=delayed, taskName=taskName, top=tops, ebene=ebenen, stiege=stiegen,
+        bauteil=bauteile, activity=activities, processModel=processModels, topIds=topIds,
+        beschreibung=beschreibung,
+    )
+    f = narrow_search(db, project_id, narrow_window(db, project_id, f, window))
+    q = filter_tasks(q, f, have=have).options(
+        contains_eager(Task.process_step).contains_eager(ProcessStep.gewerk),
+        contains_eager(Task.top).contains_eager(Top.ebene).contains_eager(Ebene.stiege).contains_eager(Stiege.bauteil),
     )
-
-    # *isti* filteri kao u /tasks-timeline (prilagodi prema tvojoj implementaciji)
-    if topIds:
-        q = q.filter(Task.top_id.in_(topIds))
-    if tops:
-        q = q.filter(Top.name.in_(tops))
-    if gewerk:
-        q = q.join(ProcessStep.gewerk).filter(Gewerk.name.in_(gewerk))
-    if status:
-        conds = []
-        if "Erledigt" in status:
-            conds.append(Task.end_ist.isnot(None))
-        if "In Bearbeitung" in status:
-            conds.append(and_(Task.start_ist.isnot(None), Task.end_ist.is_(None)))
-        if "Offen" in status:
-            conds.append(and_(Task.start_ist.is_(None), Task.end_ist.is_(None)))
-        if conds:
-            q = q.filter(or_(*conds))
-    if start_d:
-        q = q.filter(Task.end_soll >= start_d)
-    if end_d:
-        q = q.filter(Task.start_soll <= end_d)
-    if delayed:
-        today = date.today()
-        q = q.filter(or_(
-            and_(Task.end_ist.is_(None), Task.end_soll < today),
-            Task.end_ist > Task.end_soll
-        ))
-    if taskName:
-        q = q.filter(ProcessStep.activity.ilike(f"%{taskName}%"))
-    if ebenen:
-        q = q.filter(Ebene.name.in_(ebenen))
-    if stiegen:
-        q = q.filter(Stiege.name.in_(stiegen))
-    if bauteile:
-        q = q.filter(Bauteil.name.in_(bauteile))
-    if activities:
-        q = q.filter(ProcessStep.activity.in_(activities))
-    if processModels:
-        q = q.join(ProcessStep.model).filter(ProcessModel.name.in_(processModels))
 
     tasks: List[Task] = q.all()
 
@@ -176,5 +149,5 @@ def structure_timeline(
     return StructureTimelineResponse(
         project_id=project_id,
         level=level,
-        segments=sorted(segments, key=lambda s: s.name.lower())
+        segments=sorted(segments, key=lambda s: (natural_key(s.name) or "", s.id))
     )
@@ -18,6 +18,8 @@ from app.routes.auth import get_current_user
 from app.deps import require_admin
 from app.core.security import verify_password, hash_password
 from app.core.protocol import log_protocol
+from app.core.task_events import tasks_changed, tasks_by_project
+from app.core.timeline_view import task_ids_with_sub
 
 BASE_DIR = Path(__file__).resolve().parents[2]
 STATIC_DIR = BASE_DIR / "static"
@@ -65,6 +67,10 @@ def update_user(user_id: int, patch: UserUpdate, request: Request, db: Session =
 
     for k, v in data.items():
         setattr(user, k, v)
+    if "name" in data:
+        # ime sub-a se vidi u timeline-u
+        for pid, ids in tasks_by_project(db, task_ids_with_sub(db, user.id)).items():
+            tasks_changed(db, pid, ids)
     db.commit(); db.refresh(user)
     log_protocol(db, request, action="user.update", ok=True, status_code=200,
                  details={"user_id": user.id, "changes": patch.model_dump(exclude_unset=True)})
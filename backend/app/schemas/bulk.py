@@ -10,6 +10,7 @@ class BulkFilters(BaseModel):
     endDate: date | None = None
     delayed: bool | None = None
     taskName: str | None = None
+    beschreibung: str | None = None
     tops: List[str] = []
     ebenen: List[str] = []
     stiegen: List[str] = []
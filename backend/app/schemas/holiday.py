@@ -0,0 +1,19 @@
+# app/schemas/holiday.py
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
+from datetime import date
+
+
+class HolidayCreate(BaseModel):
+    start: date
+    end: Optional[date] = None  # bez kraja → jedan dan
+    name: Optional[str] = None
+
+class HolidayRead(BaseModel):
+    id: int
+    project_id: int
+    start: date
+    end: date
+    name: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
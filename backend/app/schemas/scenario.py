@@ -0,0 +1,31 @@
+# app/schemas/scenario.py
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
+from datetime import date, datetime
+
+from app.schemas.schedule import SkipWindowFilters
+
+
+class ScenarioCreate(BaseModel):
+    name: str
+
+class ScenarioRead(BaseModel):
+    id: int
+    project_id: int
+    name: str
+    base_revision: int
+    version: int
+    created_at: datetime
+    changed_tasks: int = 0
+
+    model_config = ConfigDict(from_attributes=True)
+
+class ScenarioTaskDates(BaseModel):
+    id: int
+    start_soll: Optional[date] = None  # bez vrijednosti → ostaje trenutni datum u scenariju
+    end_soll: Optional[date] = None
+
+class ScenarioShiftRequest(BaseModel):
+    days: int
+    skip_weekends: bool = True  # novi start na neradni dan → prvi radni dan (kao skip-window)
+    filters: Optional[SkipWindowFilters] = None
@@ -0,0 +1,22 @@
+# app/schemas/schedule.py
+from pydantic import BaseModel
+from typing import Optional
+from datetime import date
+
+
+class SkipWindowFilters(BaseModel):
+    topIds: Optional[list[int]] = None
+    top: Optional[list[str]] = None
+    ebene: Optional[list[str]] = None
+    stiege: Optional[list[str]] = None
+    bauteil: Optional[list[str]] = None
+    gewerk: Optional[list[str]] = None
+    activity: Optional[list[str]] = None
+    processModel: Optional[list[str]] = None
+
+class SkipWindowRequest(BaseModel):
+    start: date
+    end: date
+    skip_weekends: bool = True  # i praznici projekta (app/core/workdays.py)
+    dry_run: bool = False       # samo prikaz prije/poslije, bez upisa
+    filters: Optional[SkipWindowFilters] = None
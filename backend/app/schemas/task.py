@@ -37,6 +37,12 @@ class TaskUpdate(BaseModel):
     model_config = ConfigDict(from_attributes=True, populate_by_name=True)
 
 
+# === BATCH (PATCH /projects/{id}/tasks/batch) ===
+class TaskBatchItem(TaskUpdate):
+    id: int
+    version: Optional[int] = None  # kao If-Match: zadnja poznata verzija taska
+
+
 # === READ ===
 class TaskRead(TaskCreate):
     id: int
@@ -54,6 +60,7 @@ class TaskRead(TaskCreate):
 
     # Ako želiš, možeš dodati i project_id u Read (ostavio sam po potrebi)
     project_id: Optional[int] = None
+    version: Optional[int] = None
 
     model_config = ConfigDict(from_attributes=True, populate_by_name=True)
 
@@ -90,5 +97,6 @@ class TimelineTask(BaseModel):
 
     top_id: Optional[int] = None
     project_id: Optional[int] = None
+    version: Optional[int] = None
 
     model_config = ConfigDict(from_attributes=True, populate_by_name=True)
@@ -0,0 +1,31 @@
+# rebuild_timeline_view.py
+# Ponovo izgradi task_timeline_view (read-model za /tasks-timeline).
+#   python rebuild_timeline_view.py          → svi projekti
+#   python rebuild_timeline_view.py 3 7      → samo projekti 3 i 7
+import sys
+
+from app.database import Base, SessionLocal, engine
+from app import models  # registruje sve tabele
+from app.core import timeline_view
+from app.core.revision import bump_revision
+
+
+def run(project_ids: list[int]):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if project_ids:
+            for pid in project_ids:
+                timeline_view.refresh_project(db, pid)
+                bump_revision(db, pid)
+                print(f"Projekt {pid}: read-model osvježen")
+        else:
+            timeline_view.rebuild_all(db)
+            print("Read-model osvježen za sve projekte")
+        db.commit()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    run([int(a) for a in sys.argv[1:]])
@@ -0,0 +1,99 @@
+# tests/conftest.py
+"""
+Zajednički fixture-i: aplikacija nad privremenom SQLite bazom (bez logina)
+i seed malog projekta s generisanim taskovima.
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+@pytest.fixture(scope="session")
+def client(tmp_path_factory):
+    # lokalna SQLite baza je "sqlite:///./test.db" → radni direktorij = privremeni
+    os.environ.pop("DATABASE_URL", None)
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("db"))
+    try:
+        from fastapi.testclient import TestClient
+        from app.main import app
+        from app.database import Base, engine
+        from app.deps import get_current_user
+        from app.models.protocol import ProtocolEntry  # noqa: F401 – nije u app.models, create_all ga mora vidjeti
+        from app.models.user import User
+
+        Base.metadata.create_all(bind=engine)
+
+        app.dependency_overrides[get_current_user] = lambda: User(id=1, email="admin@test", name="Admin", role="admin")
+        yield TestClient(app)
+        app.dependency_overrides.clear()
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.fixture(scope="session")
+def seed_project(client):
+    """seed_project(name) → (project_id, generisani taskovi kao JSON)."""
+    from app.database import SessionLocal
+    from app.models.gewerk import Gewerk
+    from app.models.process import ProcessModel, ProcessStep
+    from app.models.project import Project
+    from app.models.structure import Bauteil, Stiege, Ebene, Top
+
+    def gewerk(db, name: str, color: str | None) -> Gewerk:
+        g = db.query(Gewerk).filter(Gewerk.name == name).first()
+        if g is None:
+            g = Gewerk(name=name, color=color)
+            db.add(g)
+            db.flush()
+        return g
+
+    def seed(name: str) -> tuple[int, list[dict]]:
+        db = SessionLocal()
+        try:
+            estrich, maler = gewerk(db, "Estrich", "#ff0000"), gewerk(db, "Maler", None)
+            model = ProcessModel(name=f"Standard {name}")
+            model.steps = [
+                ProcessStep(gewerk_id=estrich.id, activity="Estrich legen", duration_days=3, parallel=False, order=1),
+                ProcessStep(gewerk_id=maler.id, activity="Malen", duration_days=2, parallel=True, order=2),
+                ProcessStep(gewerk_id=maler.id, activity="Spachteln", duration_days=4, parallel=False, order=3),
+            ]
+            project = Project(name=name)
+            db.add_all([model, project])
+            db.flush()
+
+            tops = []
+            for b in ("BT A", "BT B"):
+                bauteil = Bauteil(name=b, project_id=project.id, process_model_id=model.id)
+                db.add(bauteil)
+                db.flush()
+                stiege = Stiege(name="Stiege 1", bauteil_id=bauteil.id)
+                db.add(stiege)
+                db.flush()
+                for e in ("Ebene 2", "Ebene 10"):
+                    ebene = Ebene(name=e, stiege_id=stiege.id)
+                    db.add(ebene)
+                    db.flush()
+                    # namjerno ne po redu: natural sort mora dati Top 1, Top 2, Top 10
+                    for t in ("Top 10", "Top 2", "Top 1"):
+                        top = Top(name=t, ebene_id=ebene.id)
+                        db.add(top)
+                        db.flush()
+                        tops.append(top.id)
+            project_id = project.id
+            db.commit()
+        finally:
+            db.close()
+
+        start_map = {"top": {str(t): f"2025-03-{1 + i % 5:02d}" for i, t in enumerate(tops)}}
+        r = client.post(f"/projects/{project_id}/generate-tasks", json={"start_map": start_map})
+        assert r.status_code == 200, r.text
+        assert r.json()
+        return project_id, r.json()
+
+    return seed
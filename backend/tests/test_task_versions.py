@@ -0,0 +1,106 @@
+# tests/test_task_versions.py
+"""Optimistic locking preko Task.version: PUT s If-Match i PATCH .../tasks/batch."""
+import pytest
+from sqlalchemy import update
+
+# app.* se uvozi tek u testovima: engine mora nastati u privremenom direktoriju (conftest.client)
+
+
+@pytest.fixture
+def project(client, seed_project):
+    return seed_project("Versions")
+
+
+def _task(task_id) -> dict:
+    from app.database import SessionLocal
+    from app.models.task import Task
+
+    with SessionLocal() as db:
+        t = db.get(Task, task_id)
+        return {"status": t.status, "beschreibung": t.beschreibung, "version": t.version}
+
+
+def _bump_version(task_id):
+    """Upis "drugog klijenta" u vlastitoj transakciji."""
+    from app.database import SessionLocal
+    from app.models.task import Task
+
+    with SessionLocal() as db:
+        db.execute(update(Task).where(Task.id == task_id).values(status="Fremd", version=Task.version + 1))
+        db.commit()
+
+
+def test_put_with_current_if_match_writes_and_returns_new_etag(client, project):
+    _, tasks = project
+    t = tasks[0]
+    r = client.put(f"/tasks/{t['id']}", json={"status": "A"}, headers={"If-Match": f'"{t["version"]}"'})
+    assert r.status_code == 200, r.text
+    assert r.headers["etag"] == f'"{t["version"] + 1}"'
+
+
+def test_put_with_stale_if_match_returns_409_and_keeps_task(client, project):
+    _, tasks = project
+    t = tasks[1]
+    assert client.put(f"/tasks/{t['id']}", json={"status": "erste"}).status_code == 200
+
+    r = client.put(f"/tasks/{t['id']}", json={"status": "zweite"}, headers={"If-Match": f'"{t["version"]}"'})
+    assert r.status_code == 409
+    body = r.json()
+    assert body["current"]["status"] == "erste"
+    assert r.headers["etag"] == f'"{t["version"] + 1}"'
+    assert _task(t["id"])["status"] == "erste"
+
+
+def test_batch_with_stale_version_returns_409_and_writes_nothing(client, project):
+    project_id, tasks = project
+    a, b = tasks[2], tasks[3]
+    _bump_version(b["id"])
+
+    r = client.patch(f"/projects/{project_id}/tasks/batch", json=[
+        {"id": a["id"], "status": "batch", "version": a["version"]},
+        {"id": b["id"], "status": "batch", "version": b["version"]},
+    ])
+    assert r.status_code == 409
+    assert [c["id"] for c in r.json()["conflicts"]] == [b["id"]]
+    assert _task(a["id"])["status"] != "batch"
+    assert _task(b["id"])["status"] == "Fremd"
+
+
+def test_batch_write_racing_the_version_check_returns_409(client, project, monkeypatch):
+    from app.core import task_batch
+
+    project_id, tasks = project
+    a, b = tasks[4], tasks[5]
+    load_current = task_batch.load_current
+    raced = []
+
+    def load_then_race(*args, **kwargs):
+        rows = load_current(*args, **kwargs)
+        if not raced:
+            # drugi upis između provjere verzije i UPDATE-a
+            raced.append(b["id"])
+            _bump_version(b["id"])
+        return rows
+
+    monkeypatch.setattr(task_batch, "load_current", load_then_race)
+    r = client.patch(f"/projects/{project_id}/tasks/batch", json=[
+        {"id": a["id"], "status": "batch", "version": a["version"]},
+        {"id": b["id"], "status": "batch", "version": b["version"]},
+    ])
+    assert raced
+    assert r.status_code == 409, r.text
+    assert [c["id"] for c in r.json()["conflicts"]] == [b["id"]]
+    # cijeli batch vraćen: ni task bez konflikta nije upisan
+    assert _task(a["id"])["version"] == a["version"]
+    assert _task(a["id"])["status"] != "batch"
+    assert _task(b["id"])["status"] == "Fremd"
+
+
+def test_batch_with_current_versions_bumps_each_version(client, project):
+    project_id, tasks = project
+    items = tasks[6:9]
+    r = client.patch(f"/projects/{project_id}/tasks/batch", json=[
+        {"id": t["id"], "beschreibung": "neu", "version": t["version"]} for t in items
+    ])
+    assert r.status_code == 200, r.text
+    assert {t["id"]: t["version"] for t in r.json()["tasks"]} == {t["id"]: t["version"] + 1 for t in items}
@@ -0,0 +1,80 @@
+# tests/test_timeline_lod.py
+"""
+lod=week|month: barovi iz GROUP BY-a u bazi moraju odgovarati agregaciji
+pojedinačnih taskova s /tasks-timeline (isti filteri, isti scenarij).
+"""
+from datetime import date, timedelta
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def project(client, seed_project):
+    project_id, tasks = seed_project("LOD")
+    ids = [t["id"] for t in tasks]
+    for tid, body in (
+        (ids[0], {"start_ist": tasks[0]["start_soll"], "end_ist": tasks[0]["end_soll"]}),
+        (ids[1], {"start_ist": "2025-03-02", "end_ist": "2025-05-01"}),
+        (ids[4], {"start_ist": "2025-03-03"}),
+    ):
+        assert client.put(f"/tasks/{tid}", json=body).status_code == 200
+    scenario = client.post(f"/projects/{project_id}/scenarios", json={"name": "LOD"}).json()["id"]
+    r = client.post(f"/projects/{project_id}/scenarios/{scenario}/shift",
+                    json={"days": 9, "filters": {"gewerk": ["Maler"]}})
+    assert r.status_code == 200, r.text
+    return project_id, scenario
+
+
+def _bucket(d: date, lod: str) -> date:
+    if lod == "month":
+        return d.replace(day=1)
+    return d - timedelta(days=d.weekday())
+
+
+def _expected(rows, lod: str, level: str) -> list[dict]:
+    """Referenca: fold po tasku, ključ (čvor, gewerk, bucket)."""
+    today = date.today()
+    bars: dict[tuple, dict] = {}
+    for t in rows:
+        s, e = date.fromisoformat(t["start_soll"]), date.fromisoformat(t["end_soll"])
+        e_ist = date.fromisoformat(t["end_ist"]) if t["end_ist"] else None
+        node = t["top_id"] if level == "top" else (t["bauteil"], t["stiege"], t["ebene"])
+        key = (node, t["gewerk_name"], _bucket(s, lod).isoformat())
+        bar = bars.setdefault(key, {
+            "group": t["top"] if level == "top" else t["ebene"], "bauteil": t["bauteil"], "stiege": t["stiege"],
+            "gewerk_name": t["gewerk_name"], "bucket": key[2],
+            "start": s, "end": e, "count": 0, "done": 0, "delayed": 0,
+        })
+        bar["start"], bar["end"] = min(bar["start"], s), max(bar["end"], e)
+        bar["count"] += 1
+        bar["done"] += e_ist is not None
+        bar["delayed"] += (e_ist is None and e < today) or (e_ist is not None and e_ist > e)
+    return [{**v, "start": v["start"].isoformat(), "end": v["end"].isoformat()} for v in bars.values()]
+
+
+FIELDS = ("group", "bauteil", "stiege", "gewerk_name", "bucket", "start", "end", "count", "done", "delayed")
+
+
+@pytest.mark.parametrize("lod", ["week", "month"])
+@pytest.mark.parametrize("level", ["ebene", "top"])
+@pytest.mark.parametrize("params", [
+    {},
+    {"gewerk": ["Maler"], "bauteil": ["BT B"]},
+    {"delayed": "true"},
+    {"startDate": "2025-03-04", "endDate": "2025-03-08"},
+    {"scenario": True},
+], ids=["none", "gewerk-bauteil", "delayed", "window", "scenario"])
+def test_lod_bars_match_per_task_aggregation(client, project, lod, level, params):
+    project_id, scenario = project
+    params = {k: (scenario if k == "scenario" else v) for k, v in params.items()}
+
+    rows = client.get(f"/projects/{project_id}/tasks-timeline", params={"source": "core", **params}).json()
+    r = client.get(f"/projects/{project_id}/tasks-timeline", params={"lod": lod, "level": level, **params})
+    assert r.status_code == 200, r.text
+    body = r.json()
+
+    got = [{k: bar[k] for k in FIELDS} for bar in body["bars"]]
+    assert sorted(got, key=repr) == sorted(_expected(rows, lod, level), key=repr)
+    assert body["tasks"] == len(rows) == sum(b["count"] for b in body["bars"])
+    assert body["count"] == len(body["bars"])
+    assert all(b["bucket"] == _bucket(date.fromisoformat(b["bucket"]), lod).isoformat() for b in body["bars"])
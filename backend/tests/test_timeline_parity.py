@@ -0,0 +1,67 @@
+# tests/test_timeline_parity.py
+"""
+/tasks-timeline: ORM put (default), Core SELECT (source=core) i read-model
+(source=view) moraju vratiti identičan JSON – sa i bez filtera.
+"""
+import pytest
+
+SOURCES = (None, "orm", "core", "view")
+
+FILTERS = [
+    {},
+    {"gewerk": ["Maler"]},
+    {"status": ["Offen"]},
+    {"status": ["Erledigt", "In Bearbeitung"]},
+    {"top": ["Top 2", "Top 10"]},
+    {"startDate": "2025-03-10", "endDate": "2025-03-31"},
+    {"delayed": "true"},
+    {"taskName": "mal", "bauteil": ["BT A"]},
+]
+
+
+@pytest.fixture(scope="module")
+def project_id(client, seed_project):
+    project_id, tasks = seed_project("Parity")
+    ids = [t["id"] for t in tasks]
+
+    # malo Ist podataka: gotov na vrijeme, u toku, gotov sa zakašnjenjem
+    for tid, body in (
+        (ids[0], {"start_ist": tasks[0]["start_soll"], "end_ist": tasks[0]["end_soll"]}),
+        (ids[1], {"start_ist": "2025-03-04"}),
+        (ids[2], {"start_ist": "2025-03-01", "end_ist": "2025-04-30"}),
+    ):
+        assert client.put(f"/tasks/{tid}", json=body).status_code == 200
+    return project_id
+
+
+def _timeline(client, project_id, source, params):
+    params = dict(params)
+    if source:
+        params["source"] = source
+    r = client.get(f"/projects/{project_id}/tasks-timeline", params=params)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+@pytest.mark.parametrize("params", FILTERS, ids=lambda p: ",".join(p) or "none")
+def test_sources_return_identical_json(client, project_id, params):
+    results = {source: _timeline(client, project_id, source, params) for source in SOURCES}
+    expected = results[None]
+    for source in SOURCES[1:]:
+        assert results[source] == expected, source
+
+
+def test_unfiltered_timeline_is_not_empty_and_naturally_sorted(client, project_id):
+    rows = _timeline(client, project_id, "core", {})
+    assert rows
+    tops = []
+    for r in rows:
+        if (r["bauteil"], r["ebene"]) == ("BT A", "Ebene 2") and r["top"] not in tops:
+            tops.append(r["top"])
+    assert tops == ["Top 1", "Top 2", "Top 10"]
+
+
+def test_filters_narrow_the_result(client, project_id):
+    everything = _timeline(client, project_id, None, {})
+    for params in FILTERS[1:]:
+        assert len(_timeline(client, project_id, None, params)) < len(everything), params
@@ -0,0 +1,64 @@
+# tests/test_timeline_window.py
+"""
+Prozor datuma (window=soll|ist|any): ID-jevi iz indeksa intervala i SQL
+predikat (neselektivan prozor, MAX_IDS) moraju dati iste taskove.
+"""
+import pytest
+
+WINDOWS = [
+    {"startDate": "2025-03-04", "endDate": "2025-03-06"},
+    {"startDate": "2025-03-09"},
+    {"endDate": "2025-03-03"},
+    {"startDate": "2025-04-20", "endDate": "2025-05-31"},
+]
+
+
+@pytest.fixture(scope="module")
+def project(client, seed_project):
+    project_id, tasks = seed_project("Window")
+    ids = [t["id"] for t in tasks]
+    # Ist: gotov, još traje (otvoren nadesno), gotov kasno, izvan Soll prozora
+    for tid, body in (
+        (ids[0], {"start_ist": "2025-03-03", "end_ist": "2025-03-05"}),
+        (ids[1], {"start_ist": "2025-03-02"}),
+        (ids[2], {"start_ist": "2025-03-01", "end_ist": "2025-04-30"}),
+        (ids[3], {"start_ist": "2025-05-10", "end_ist": "2025-05-12"}),
+    ):
+        assert client.put(f"/tasks/{tid}", json=body).status_code == 200
+    scenario = client.post(f"/projects/{project_id}/scenarios", json={"name": "Window"}).json()["id"]
+    r = client.post(f"/projects/{project_id}/scenarios/{scenario}/shift",
+                    json={"days": 7, "filters": {"gewerk": ["Maler"]}})
+    assert r.status_code == 200, r.text
+    return project_id, scenario
+
+
+def _ids(client, project_id, params):
+    r = client.get(f"/projects/{project_id}/tasks-timeline", params={"source": "core", **params})
+    assert r.status_code == 200, r.text
+    return sorted(t["id"] for t in r.json())
+
+
+@pytest.mark.parametrize("with_scenario", [False, True], ids=["base", "scenario"])
+@pytest.mark.parametrize("window", ["soll", "ist", "any"])
+@pytest.mark.parametrize("dates", WINDOWS, ids=lambda d: "-".join(d.values()))
+def test_predicate_fallback_matches_index(client, project, monkeypatch, window, dates, with_scenario):
+    from app.core import interval_index
+
+    project_id, scenario = project
+    params = {"window": window, **dates}
+    if with_scenario:
+        params["scenario"] = scenario
+
+    from_index = _ids(client, project_id, params)
+    monkeypatch.setattr(interval_index, "MAX_IDS", 0)  # svaki prozor → SQL predikat
+    from_predicate = _ids(client, project_id, params)
+    assert from_predicate == from_index
+
+
+def test_any_is_union_of_soll_and_ist(client, project):
+    project_id, scenario = project
+    for dates in WINDOWS:
+        for extra in ({}, {"scenario": scenario}):
+            soll = set(_ids(client, project_id, {"window": "soll", **dates, **extra}))
+            ist = set(_ids(client, project_id, {"window": "ist", **dates, **extra}))
+            assert set(_ids(client, project_id, {"window": "any", **dates, **extra})) == soll | ist
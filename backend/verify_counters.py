@@ -0,0 +1,35 @@
+# verify_counters.py
+# Provjeri project_gewerk_counters naspram taskova (i po potrebi ih izgradi iznova).
+#   python verify_counters.py              → provjera, svi projekti
+#   python verify_counters.py 3 7          → samo projekti 3 i 7
+#   python verify_counters.py --fix [3 7]  → rebuild (svi ili navedeni projekti)
+import sys
+
+from app.database import Base, SessionLocal, engine
+from app import models  # registruje sve tabele
+from app.core import counters
+
+
+def run(project_ids: list[int], fix: bool = False) -> int:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        diffs = counters.verify(db, project_ids or None)
+        for pid, gid, want, have in diffs:
+            print(f"Projekt {pid}, gewerk {gid}: očekivano {want}, upisano {have}")
+        if not diffs:
+            print("✅ Brojači se slažu s taskovima")
+        if fix:
+            counters.rebuild(db, project_ids or None)
+            db.commit()
+            print("Brojači izgrađeni iznova")
+        return len(diffs)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    fix = "--fix" in args
+    bad = run([int(a) for a in args if a != "--fix"], fix=fix)
+    sys.exit(1 if bad and not fix else 0)